@@ -35,6 +35,7 @@ import operator
 import os
 from math import pi, sin, cos, sqrt, atan
 from add_mesh_building_basics.UtilMats import uMatRGBSet, uMatRGBSel
+from add_mesh_building_basics.UtilMesh import uBridge
 
 # constants
 MAX_SEGS = 8 # segments/levels (stackable elements).
@@ -113,10 +114,8 @@ def EXT(PR,vr,fc,lz,mz,rz):
     elif lz> 0 and rz> 0:l=3
 
     for j in range(0,l):
-        for i in range(0,m):
-            a=j*m
-            if i==m-1:fc.append([a+i+n,a+0+n+0,a+0+n+0+m,a+i+n+m])
-            else:     fc.append([a+i+n,a+i+n+1,a+i+n+1+m,a+i+n+m])
+        a=n+j*m
+        fc.extend(uBridge(range(a+m,a+m+m),range(a,a+m)).tolist())
 
 
 ################################################################################
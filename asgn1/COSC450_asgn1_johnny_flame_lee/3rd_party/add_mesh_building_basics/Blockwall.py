@@ -14,7 +14,6 @@ Generate a "block wall", suitable for many uses, typically a "castle style".
 # @todo: "Merge" more blocks.
 # @todo: review defaults and limits for all UI entries.
 # @todo: Add "reset" button to restore defaults - see "style" for other scripts.
-# @todo: replace globals with parameters
 #
 # Wish list:
 #  Block styles: "Rocks" (add_mesh_rocks), "Balls" (add_mesh_clusters), hexagon.
@@ -25,9 +24,13 @@ Generate a "block wall", suitable for many uses, typically a "castle style".
 import bpy
 from bpy.props import FloatProperty, FloatVectorProperty, BoolProperty, EnumProperty
 from add_mesh_building_basics.UtilMats import uMatRGBSet
-from random import random
+from add_mesh_building_basics.UtilMesh import uCurve, uMeshSet, uRound
 
 import math
+import numpy
+import random
+from bisect import bisect_left, bisect_right
+from heapq import merge
 from math import pi, fmod, sqrt, sin, cos, atan
 
 
@@ -42,51 +45,10 @@ ROW_H_WEIGHT=0.5 # Use 0.5, else create parameter: 0=no effect, 1=1:1 relationsh
 GAP_MIN=0.01 # minimum space between blocks.
 
 
-# globals - need review and revision... preferably removal.
-
-# General wall Settings
-settings = {'w': 1.2, 'wv': 0.3, 'h': .6, 'hv': 0.3, 'd': 0.3, 'dv': 0.1,
-            'g': 0.1, 'sdv': 0.1,
-            'hm':BLOCK_MIN, 'eoff':0.3,
-            'Round':False, 'Curve':False }
-# 'w':width 'wv':widthVariation
-# 'h':height 'hv':heightVariation
-# 'd':depth 'dv':depthVariation
-# 'g':grout
-# 'sdv':subdivision(distance or angle)
-# 'hm':height minimum
-#no width min? 'wm':width minimum
-# 'eoff':edge offset
-# 'Round': round/radial wall shape
-# 'Curve': curve (slope) wall, makes dome if "Round"
-
-# dims = area of wall (centered/splitX from 3D cursor); modified for radial.
-dims = {'s':-10, 'e':10, 't':15}
-#dims = {'s':0, 'e':pi*3/2, 't':12.3} # radial
-# 's' start, 'e' end, 't' top
-
-# Holes in wall for various apertures.
-#openingSpecs = []
-openingSpecs = [{'w':0.5, 'h':0.5, 'x':0.8, 'z':2.7, 'rp':1, 'bvl':0.0,
-                 'v':0, 'vl':0, 't':0, 'tl':0}]
-# 'w': opening width, 'h': opening height,
-# 'x': horizontal position, 'z': vertical position,
-# 'rp': repeat opening with a spacing of x,
-# 'bvl': bevel the inside of the opening,
-# 'v': height of the top arch, 'vl':height of the bottom arch,
-# 't': thickness of the top arch, 'tl': thickness of the bottom arch
-
 ############################
 #
 # Psuedo macros:
 #
-# random values (in specific range).
-    # random value +-0.5
-def rndc(): return (random() - 0.5)
-
-    # random value +-1
-def rndd(): return rndc()*2
-
 # line/circle intercepts
 # offs = distance perpendicular to the line to the center
 # r=radius
@@ -356,10 +318,7 @@ class add_Blockwall(bpy.types.Operator):
 ##
     def execute(self, context):
 
-        global openingSpecs
-
         # set a few working variables
-        halfWallW=self.properties.wallX/2
         blockHeight=self.properties.blockZ
 
         # Limit UI settings relative to other parameters.
@@ -375,206 +334,273 @@ class add_Blockwall(bpy.types.Operator):
         if blockHeight-self.properties.Grout < blockHmin:
             self.properties.Grout=blockHeight-blockHmin
 
+        wallVs,wallFs = WallBuilder(self.properties).build()
+
+        wallMesh=bpy.data.meshes.new("Wall")
+        uMeshSet(wallMesh,wallVs,[wallFs])
+
+        scene = context.scene
+
+        # Deselect all objects.
+        bpy.ops.object.select_all(action='DESELECT')
+
+        ob_new = bpy.data.objects.new("Wall",wallMesh)
+        scene.objects.link(ob_new)
+        scene.objects.active = ob_new
+        ob_new.select = True
+
+        ob_new.data.materials.append(uMatRGBSet("Wall_mat",self.wallRGB,matMod=True))
+
+        ob_new.location = tuple(context.scene.cursor_location)
+        ob_new.rotation_quaternion = [1.0,0.0,0.0,0.0]
+
+        return {'FINISHED'}
+
+
+################
+##
+#################
+##
+######################## Blocks module/script inclusion - to be reduced significantly.
+##
+#######################
+##
+
+##
+#
+# Module notes:
+#
+# consider removing wedge crit for small "c" and "cl" values
+# wrap around for openings on radial stonework?
+# repeat for opening doesn't distribute evenly when radialized
+#  - see wrap around note above.
+# if opening width == indent*2 the edge blocks fail (row of blocks cross opening).
+# if block width variance is 0, and edging is on, right edge blocks create a "vertical seam".
+#
+##
+
+
+################################################################################
+#
+# Wall generator; holds everything about one wall, so walls can be built side
+#  by side (threads, worker processes) or from a script without the operator.
+#
+class WallBuilder:
+    __doc__ = """\
+    Makes the geometry of a block wall from its settings.
+
+    props: wall settings, anything with the add_Blockwall property names as
+        attributes (the operator's properties, a types.SimpleNamespace...)
+    rng: numpy.random.Generator for the block sizes, a new one if None;
+        seed it to get the same wall again. Single values come from a
+        random.Random seeded from it (much cheaper per call).
+
+    build() returns the arrays of vertices and faces.
+    """
+
+    def __init__(self, props, rng=None):
+        self.props = props
+        self.rng = rng if rng is not None else numpy.random.default_rng()
+        self.rnd = random.Random(int(self.rng.integers(1<<62)))
+
+        # set a few working variables
+        halfWallW=props.wallX/2
+        blockHeight=props.blockZ
+        blockHmin=props.HeightMin
+
+        # General wall Settings
+        self.settings = {'w': 1.2, 'wv': 0.3, 'h': .6, 'hv': 0.3, 'd': 0.3, 'dv': 0.1,
+            'g': 0.1, 'sdv': 0.1,
+            'hm':BLOCK_MIN, 'eoff':0.3,
+            'Round':False, 'Curve':False }
+        # 'w':width 'wv':widthVariation
+        # 'h':height 'hv':heightVariation
+        # 'd':depth 'dv':depthVariation
+        # 'g':grout
+        # 'sdv':subdivision(distance or angle)
+        # 'hm':height minimum
+        #no width min? 'wm':width minimum
+        # 'eoff':edge offset
+        # 'Round': round/radial wall shape
+        # 'Curve': curve (slope) wall, makes dome if "Round"
+
+        # dims = area of wall (centered/splitX from 3D cursor); modified for radial.
+        self.dims = {'s':-10, 'e':10, 't':15}
+        # 's' start, 'e' end, 't' top
+
+        # Holes in wall for various apertures.
+        # 'w': opening width, 'h': opening height,
+        # 'x': horizontal position, 'z': vertical position,
+        # 'rp': repeat opening with a spacing of x,
+        # 'bvl': bevel the inside of the opening,
+        # 'v': height of the top arch, 'vl':height of the bottom arch,
+        # 't': thickness of the top arch, 'tl': thickness of the bottom arch
+
         # needed for rowprocessing() to center wall...
-        dims['s'] = -halfWallW
-        dims['e'] = halfWallW
+        self.dims['s'] = -halfWallW
+        self.dims['e'] = halfWallW
 
-        dims['t'] = self.properties.wallZ
+        self.dims['t'] = props.wallZ
 
-        settings['eoff'] = self.properties.EdgeOffset
+        self.settings['eoff'] = props.EdgeOffset
 
         # block sizing
-        settings['w'] = self.properties.blockX
-        settings['wv'] = self.properties.WidthVar
+        self.settings['w'] = props.blockX
+        self.settings['wv'] = props.WidthVar
 
-        if self.properties.wallCirc:
+        if props.wallCirc:
 # eliminate to allow user control for start/completion by width setting.
-            dims['s'] = 0.0 # complete radial
-            if dims['e'] > pi*2: dims['e'] = pi*2 # max end for circle
-            settings['sdv'] = 0.12
+            self.dims['s'] = 0.0 # complete radial
+            if self.dims['e'] > pi*2: self.dims['e'] = pi*2 # max end for circle
+            self.settings['sdv'] = 0.12
         else:
-            settings['sdv'] = settings['w'] 
+            self.settings['sdv'] = self.settings['w'] 
 
-        settings['h']=blockHeight
-        settings['hm']=blockHmin
+        self.settings['h']=blockHeight
+        self.settings['hm']=blockHmin
 
-        settings['d'] = self.properties.Depth
-        settings['dv'] = self.properties.DepthVar
+        self.settings['d'] = props.Depth
+        self.settings['dv'] = props.DepthVar
 
-        settings['g'] = self.properties.Grout
+        self.settings['g'] = props.Grout
 
-        settings['Round']=self.properties.wallCirc
-        settings['Curve']=self.properties.wallCurve
+        self.settings['Round']=props.wallCirc
+        self.settings['Curve']=props.wallCurve
 
 #when openings overlap they create inverse stonework - interesting but not the desired effect
 #if opening width == indent*2 the edge blocks fail (row of blocks cross opening) - bug.
-        openingSpecs = []
+        self.openingSpecs = []
         openingIdx = 0 # track opening array references for multiple uses
 
-        if self.properties.wallPort: # Door/window opening
+        if props.wallPort: # Door/window opening
             # set defaults...
-            openingSpecs += [{'w':0.5, 'h':0.5, 'x':0.8, 'z':2.7, 'rp':1, 'bvl':0, 'v':0, 'vl':0, 't':0, 'tl':0}]
+            self.openingSpecs += [{'w':0.5, 'h':0.5, 'x':0.8, 'z':2.7, 'rp':1, 'bvl':0, 'v':0, 'vl':0, 't':0, 'tl':0}]
 
-            openingSpecs[openingIdx]['w'] = self.properties.portW
-            openingSpecs[openingIdx]['h'] = self.properties.portH
-            openingSpecs[openingIdx]['x'] = self.properties.portL
-            openingSpecs[openingIdx]['z'] = self.properties.portB
-            openingSpecs[openingIdx]['rp'] = self.properties.portRpt
+            self.openingSpecs[openingIdx]['w'] = props.portW
+            self.openingSpecs[openingIdx]['h'] = props.portH
+            self.openingSpecs[openingIdx]['x'] = props.portL
+            self.openingSpecs[openingIdx]['z'] = props.portB
+            self.openingSpecs[openingIdx]['rp'] = props.portRpt
 
-            if self.properties.portArchT:
-                openingSpecs[openingIdx]['v'] = self.properties.portArchTC
-                openingSpecs[openingIdx]['t'] = self.properties.portArchTT
+            if props.portArchT:
+                self.openingSpecs[openingIdx]['v'] = props.portArchTC
+                self.openingSpecs[openingIdx]['t'] = props.portArchTT
 
-            if self.properties.portArchB:
-                openingSpecs[openingIdx]['vl'] = self.properties.portArchBC
-                openingSpecs[openingIdx]['tl'] = self.properties.portArchBT
+            if props.portArchB:
+                self.openingSpecs[openingIdx]['vl'] = props.portArchBC
+                self.openingSpecs[openingIdx]['tl'] = props.portArchBT
             
-            openingSpecs[openingIdx]['bvl'] = self.properties.portBevel
+            self.openingSpecs[openingIdx]['bvl'] = props.portBevel
 
             openingIdx += 1 # count window/door/arch opening
 
-        if self.properties.SlotV: # vertical slots
+        if props.SlotV: # vertical slots
             # create with defaults...
-            openingSpecs += [{'w':0.5, 'h':0.5, 'x':0.0, 'z':2.7, 'rp':0, 'bvl':0.0, 'v':0, 'vl':0, 't':0, 'tl':0}]
+            self.openingSpecs += [{'w':0.5, 'h':0.5, 'x':0.0, 'z':2.7, 'rp':0, 'bvl':0.0, 'v':0, 'vl':0, 't':0, 'tl':0}]
 
             # set opening using input parameters
-            openingSpecs[openingIdx]['w'] = self.properties.SlotVW
-            openingSpecs[openingIdx]['h'] = self.properties.SlotVH
-            openingSpecs[openingIdx]['x'] = self.properties.SlotVL
-            openingSpecs[openingIdx]['z'] = self.properties.SlotVZ
-            openingSpecs[openingIdx]['rp'] = self.properties.SlotVRpt
-
-            if self.properties.slotVArchT:
-                openingSpecs[openingIdx]['v'] = self.properties.SlotVW
-                openingSpecs[openingIdx]['t'] = self.properties.SlotVW/2
-            if self.properties.slotVArchB:
-                openingSpecs[openingIdx]['vl'] = self.properties.SlotVW
-                openingSpecs[openingIdx]['tl'] = self.properties.SlotVW/2
+            self.openingSpecs[openingIdx]['w'] = props.SlotVW
+            self.openingSpecs[openingIdx]['h'] = props.SlotVH
+            self.openingSpecs[openingIdx]['x'] = props.SlotVL
+            self.openingSpecs[openingIdx]['z'] = props.SlotVZ
+            self.openingSpecs[openingIdx]['rp'] = props.SlotVRpt
+
+            if props.slotVArchT:
+                self.openingSpecs[openingIdx]['v'] = props.SlotVW
+                self.openingSpecs[openingIdx]['t'] = props.SlotVW/2
+            if props.slotVArchB:
+                self.openingSpecs[openingIdx]['vl'] = props.SlotVW
+                self.openingSpecs[openingIdx]['tl'] = props.SlotVW/2
 
             openingIdx += 1 # count vertical slot opening
 
-        if self.properties.SlotH: # Horizontal slots
+        if props.SlotH: # Horizontal slots
             # create with defaults...
-            openingSpecs += [{'w':0.5, 'h':0.5, 'x':0.0, 'z':2.7, 'rp':0, 'bvl':0.0, 'v':0, 'vl':0, 't':0, 'tl':0}]
+            self.openingSpecs += [{'w':0.5, 'h':0.5, 'x':0.0, 'z':2.7, 'rp':0, 'bvl':0.0, 'v':0, 'vl':0, 't':0, 'tl':0}]
 
             # set opening using input parameters
-            openingSpecs[openingIdx]['w'] = self.properties.SlotHW
-            openingSpecs[openingIdx]['h'] = self.properties.SlotHH
-            openingSpecs[openingIdx]['x'] = self.properties.SlotHL
-            openingSpecs[openingIdx]['z'] = self.properties.SlotHZ
+            self.openingSpecs[openingIdx]['w'] = props.SlotHW
+            self.openingSpecs[openingIdx]['h'] = props.SlotHH
+            self.openingSpecs[openingIdx]['x'] = props.SlotHL
+            self.openingSpecs[openingIdx]['z'] = props.SlotHZ
 #horizontal repeat isn't same spacing as vertical...
-            openingSpecs[openingIdx]['rp'] = self.properties.SlotHRpt
+            self.openingSpecs[openingIdx]['rp'] = props.SlotHRpt
 
 # want arc to go sideways too... maybe wedge will be sufficient and can skip horiz arcs.
-            openingSpecs[openingIdx]['bvl'] = self.properties.SlotHBvl
+            self.openingSpecs[openingIdx]['bvl'] = props.SlotHBvl
 
-            if self.properties.slotHArchT:
-                openingSpecs[openingIdx]['v'] = self.properties.SlotHW/2
-                openingSpecs[openingIdx]['t'] = self.properties.SlotHW/4
-            if self.properties.slotHArchB:
-                openingSpecs[openingIdx]['vl'] = self.properties.SlotHW/2
-                openingSpecs[openingIdx]['tl'] = self.properties.SlotHW/4
+            if props.slotHArchT:
+                self.openingSpecs[openingIdx]['v'] = props.SlotHW/2
+                self.openingSpecs[openingIdx]['t'] = props.SlotHW/4
+            if props.slotHArchB:
+                self.openingSpecs[openingIdx]['vl'] = props.SlotHW/2
+                self.openingSpecs[openingIdx]['tl'] = props.SlotHW/4
 
             openingIdx += 1 # count horizontal slot opening
 
         # Crenellations (top row openings)
-        if self.properties.CrenelTog:
+        if props.CrenelTog:
 # add bottom arch option?
 # if crenel opening overlaps with arch opening it fills with blocks...
 
             # set defaults...
-            openingSpecs += [{'w':0.5, 'h':0.5, 'x':0.0, 'z':2.7, 'rp':1, 'bvl':0.0, 'v':0, 'vl':0, 't':0, 'tl':0}]
+            self.openingSpecs += [{'w':0.5, 'h':0.5, 'x':0.0, 'z':2.7, 'rp':1, 'bvl':0.0, 'v':0, 'vl':0, 't':0, 'tl':0}]
 
-            wallw=self.properties.wallX
-            crenelW = wallw*self.properties.CrenelXP # Width % opening.
+            wallw=props.wallX
+            crenelW = wallw*props.CrenelXP # Width % opening.
 
-            crenelH = self.properties.wallZ*self.properties.CrenelZP # % proportional height.
+            crenelH = props.wallZ*props.CrenelZP # % proportional height.
 
-            openingSpecs[openingIdx]['w'] = crenelW
-            openingSpecs[openingIdx]['h'] = crenelH
-            openingSpecs[openingIdx]['x'] = crenelW*2-1 # assume standard spacing
+            self.openingSpecs[openingIdx]['w'] = crenelW
+            self.openingSpecs[openingIdx]['h'] = crenelH
+            self.openingSpecs[openingIdx]['x'] = crenelW*2-1 # assume standard spacing
 
-            if not self.properties.wallCirc: # normal wall?
+            if not props.wallCirc: # normal wall?
                 # set indent 0 (center) if opening is 50% or more of wall width, no repeat.
                 if crenelW*2 >= wallw:
-                    openingSpecs[openingIdx]['x'] = 0
-                    openingSpecs[openingIdx]['rp'] = 0
+                    self.openingSpecs[openingIdx]['x'] = 0
+                    self.openingSpecs[openingIdx]['rp'] = 0
 
-            openingSpecs[openingIdx]['z'] = self.properties.wallZ - (crenelH/2) # set bottom of opening
+            self.openingSpecs[openingIdx]['z'] = props.wallZ - (crenelH/2) # set bottom of opening
 
             openingIdx += 1 # count crenel openings
 
-#########################################
-        #
-        # Process the user settings to generate a wall
-        #
-#########################################
-
-        holeList=openList()
-        wallVs,wallFs = wallBuild(self,wallPlan(self,holeList),holeList)
+    def build(self):
+        holeList=openList(self)
+        return wallBuild(self,wallPlan(self,holeList),holeList)
 
-        wallMesh=bpy.data.meshes.new("Wall")
-        wallMesh.from_pydata(wallVs,[],wallFs)
-
-        scene = context.scene
-
-        # Deselect all objects.
-        bpy.ops.object.select_all(action='DESELECT')
-
-        wallMesh.update()
-
-        ob_new = bpy.data.objects.new("Wall",wallMesh)
-        scene.objects.link(ob_new)
-        scene.objects.active = ob_new
-        ob_new.select = True
+    # random value +-0.5
+    def rndc(self): return (self.rnd.random() - 0.5)
 
-        ob_new.data.materials.append(uMatRGBSet("Wall_mat",self.wallRGB,matMod=True))
+    # random value +-1
+    def rndd(self): return self.rndc()*2
 
-        ob_new.location = tuple(context.scene.cursor_location)
-        ob_new.rotation_quaternion = [1.0,0.0,0.0,0.0]
+    # fill() with this wall's random numbers.
+    def fill(self,objXO,objXL,avedst,mindst=0.0,dev=0.0,center=0):
+        return fill(objXO,objXL,avedst,mindst,dev,center,self.rng,self.rnd)
 
-        return {'FINISHED'}
 
-
-################
-##
-#################
-##
-######################## Blocks module/script inclusion - to be reduced significantly.
-##
-#######################
-##
-
-##
-#
-# Module notes:
-#
-# consider removing wedge crit for small "c" and "cl" values
-# wrap around for openings on radial stonework?
-# repeat for opening doesn't distribute evenly when radialized
-#  - see wrap around note above.
-# if opening width == indent*2 the edge blocks fail (row of blocks cross opening).
-# if block width variance is 0, and edging is on, right edge blocks create a "vertical seam".
-#
-##
+# Build a wall in one call, e.g. for a process pool: verts and faces arrays.
+def buildWall(props, seed=None):
+    return WallBuilder(props, numpy.random.default_rng(seed)).build()
 
 
 ################################################################################
 #
 # create a list of openings from the general specifications.
 #
-def openList():
+def openList(wall):
     boundlist = []
 
     # initialize variables
 #overkill? no, first step to eliminating "globals", and, hope to improve performance.
-    areaStart=dims['s']
-    areaEnd=dims['e']
+    areaStart=wall.dims['s']
+    areaEnd=wall.dims['e']
 
-    SetWid = settings['w']
-    wallCirc=settings['Round']
+    SetWid = wall.settings['w']
+    wallCirc=wall.settings['Round']
 
-    for x in openingSpecs:
+    for x in wall.openingSpecs:
         # hope this is faster... at least for repeat.
         xOpenW=x['w']
         xOpenX=x['x']
@@ -589,12 +615,12 @@ def openList():
 
             minspacing = (xOpenW + SetWid)/r1
 
-            divs = fill(areaStart,areaEnd,spacing,minspacing,center=1)
+            divs = wall.fill(areaStart,areaEnd,spacing,minspacing,center=1)
 
             for posidx in range(len(divs)-2):
-                boundlist.append(opening(divs[posidx+1],xOpenZ,xOpenW,x['h'],x['v'],x['t'],x['vl'],x['tl'],x['bvl']))
+                boundlist.append(opening(wall,divs[posidx+1],xOpenZ,xOpenW,x['h'],x['v'],x['t'],x['vl'],x['tl'],x['bvl']))
 
-        else: boundlist.append(opening(xOpenX,xOpenZ,xOpenW,x['h'],x['v'],x['t'],x['vl'],x['tl'],x['bvl']))
+        else: boundlist.append(opening(wall,xOpenX,xOpenZ,xOpenW,x['h'],x['v'],x['t'],x['vl'],x['tl'],x['bvl']))
         #check for overlaping edges?
 
     return boundlist
@@ -605,36 +631,31 @@ def openList():
 # Build the wall, based on rows, "holeList", and parameters;
 #     geometry for the blocks, arches, steps, platforms...
 #
-# Return: verts and faces for wall object.
-#
-# @todo: replace "settings['var']" with "sRef.properties.var" (eliminate globals).
+# Return: verts (float32, n x 3) and quad faces (int32, n x 4) for wall object.
 #
-def wallBuild(sRef,rows,holeList):
-
-    wallVs=[]
-    wallFs=[]
+def wallBuild(wall,rows,holeList):
 
     AllBlocks = []
 
     # create local references for anything that's used more than once...
 
-    wallTop=dims['t']
+    wallTop=wall.dims['t']
     wallTop2=wallTop*2
 
-    wallSlope=sRef.properties.wallCurve
-    wallDisc=sRef.properties.wallCirc
+    wallSlope=wall.props.wallCurve
+    wallDisc=wall.props.wallCirc
 
-    blockWidth=sRef.properties.blockX
+    blockWidth=wall.props.blockX
 
-    blockGap=sRef.properties.Grout
+    blockGap=wall.props.Grout
     halfGrout = blockGap/2 # half grout for block size modifier
 
-    wallDhalf=settings['d']/2 # offset by half wall depth to match UI setting
+    wallDhalf=wall.settings['d']/2 # offset by half wall depth to match UI setting
 
     for rowidx in range(len(rows)): # add blocks for each row.
-        rows[rowidx].FillBlocks()
+        rows[rowidx].FillBlocks(wall)
 
-    if sRef.properties.MergeBlock: # merge (vertical) blocks in close proximity...
+    if wall.props.MergeBlock: # merge (vertical) blocks in close proximity...
         for rowidx in range(len(rows)-1):
             if wallDisc:
                 if wallSlope: r1 = wallTop*sin(abs(rows[rowidx].z)*pi/wallTop2)
@@ -670,28 +691,28 @@ def wallBuild(sRef,rows,holeList):
                 else: idxThat -= 1
 
 
-    if sRef.properties.wallShelf: # Add blocks to create a "shelf/platform".
+    if wall.props.wallShelf: # Add blocks to create a "shelf/platform".
 # Does not account for openings (crosses gaps - which is a good thing)
 
         # Use wall block settings for shelf
         shelfBW=blockWidth
-        shelfBWVar=settings['wv']
-        shelfBH=sRef.properties.blockZ
-
-        ShelfLft = sRef.properties.ShelfX
-        ShelfBtm = sRef.properties.ShelfZ
-        ShelfEnd = ShelfLft + sRef.properties.ShelfW
-        ShelfTop = ShelfBtm + sRef.properties.ShelfH
-        ShelfThk = sRef.properties.ShelfD
+        shelfBWVar=wall.settings['wv']
+        shelfBH=wall.props.blockZ
+
+        ShelfLft = wall.props.ShelfX
+        ShelfBtm = wall.props.ShelfZ
+        ShelfEnd = ShelfLft + wall.props.ShelfW
+        ShelfTop = ShelfBtm + wall.props.ShelfH
+        ShelfThk = wall.props.ShelfD
         ShelfThk2= ShelfThk*2 # double-depth to position at cursor.
 
-        if sRef.properties.ShelfBack: # place blocks on backside of wall
+        if wall.props.ShelfBack: # place blocks on backside of wall
             ShelfOffsets = [[0,ShelfThk,0],[0,wallDhalf,0],[0,ShelfThk,0],[0,wallDhalf,0],[0,ShelfThk,0],[0,wallDhalf,0],[0,ShelfThk,0],[0,wallDhalf,0]]
         else:
             ShelfOffsets = [[0,-wallDhalf,0],[0,-ShelfThk,0],[0,-wallDhalf,0],[0,-ShelfThk,0],[0,-wallDhalf,0],[0,-ShelfThk,0],[0,-wallDhalf,0],[0,-ShelfThk,0]]
 
         while ShelfBtm < ShelfTop: # Add blocks for each "shelf row" in area
-            divs = fill(ShelfLft, ShelfEnd, shelfBW, shelfBW, shelfBWVar)
+            divs = wall.fill(ShelfLft, ShelfEnd, shelfBW, shelfBW, shelfBWVar)
 
             for i in range(len(divs)-1): # add blocks for row divisions
                 ThisBlockx = (divs[i]+divs[i+1])/2
@@ -703,31 +724,31 @@ def wallBuild(sRef,rows,holeList):
 # Set shelf material/color... on wish list.
 
 
-    if sRef.properties.wallSteps: # Add blocks to create "steps".
+    if wall.props.wallSteps: # Add blocks to create "steps".
 # Does not account for openings (crosses gaps - which is a good thing)
 
-        stepsFill=sRef.properties.StepBlocks
-        steps2Left=sRef.properties.StepLeft
+        stepsFill=wall.props.StepBlocks
+        steps2Left=wall.props.StepLeft
 
         # step block "filler" by wall block settings.
         stepFW=blockWidth
-        StepFWVar=settings['wv']
+        StepFWVar=wall.settings['wv']
 
-        StepXMod = sRef.properties.StepT # step tread, also sets basic block size.
-        StepZMod = sRef.properties.StepV
+        StepXMod = wall.props.StepT # step tread, also sets basic block size.
+        StepZMod = wall.props.StepV
 
-        StepLft = sRef.properties.StepX
-        StepWide = sRef.properties.StepW
+        StepLft = wall.props.StepX
+        StepWide = wall.props.StepW
         StepRt = StepLft + StepWide
-        StepBtm = sRef.properties.StepZ + StepZMod/2 # Start offset for centered blocks
-        StepTop = StepBtm + sRef.properties.StepH
+        StepBtm = wall.props.StepZ + StepZMod/2 # Start offset for centered blocks
+        StepTop = StepBtm + wall.props.StepH
 
-        StepThk = sRef.properties.StepD
+        StepThk = wall.props.StepD
         StepThk2=StepThk*2 # use double-depth due to offsets to position at cursor.
 
         # Use "corners" to adjust steps so not centered on depth.
         # steps at cursor so no gaps between steps and wall face due to wall block depth.
-        if sRef.properties.StepBack: # place blocks on backside of wall
+        if wall.props.StepBack: # place blocks on backside of wall
             StepOffsets = [[0,StepThk,0],[0,wallDhalf,0],[0,StepThk,0],[0,wallDhalf,0],[0,StepThk,0],[0,wallDhalf,0],[0,StepThk,0],[0,wallDhalf,0]]
         else:
             StepOffsets = [[0,-wallDhalf,0],[0,-StepThk,0],[0,-wallDhalf,0],[0,-StepThk,0],[0,-wallDhalf,0],[0,-StepThk,0],[0,-wallDhalf,0],[0,-StepThk,0]]
@@ -737,7 +758,7 @@ def wallBuild(sRef,rows,holeList):
 
             # Make blocks for each step row - based on rowOb::fillblocks
             if stepsFill:
-                divs = fill(StepLft, StepRt, StepXMod, stepFW, StepFWVar)
+                divs = wall.fill(StepLft, StepRt, StepXMod, stepFW, StepFWVar)
 
                 #loop through the row divisions, adding blocks for each one
                 for i in range(len(divs)-1):
@@ -766,43 +787,43 @@ def wallBuild(sRef,rows,holeList):
         AllBlocks+=row.BlocksEdge
         AllBlocks+=row.BlocksNorm
 
-    # make individual blocks for each block specified in the plan
-
-    subDivision=settings['sdv']
+    # make the blocks specified in the plan, all in one go.
 
-    for block in AllBlocks:
-        x,z,w,h,d,corners = block
-        holeW2=w/2
+    subDivision=wall.settings['sdv']
 
-        if wallDisc:
-            if wallSlope: r1 = wallTop*sin(z*pi/wallTop2)
-            else: r1 = z
-        else: r1 = 1
+    x,z,w,h,d = numpy.array([block[:5] for block in AllBlocks], dtype=numpy.float64).reshape(-1,5).T
+    corners = numpy.zeros((len(AllBlocks),8,3))
+    for i,block in enumerate(AllBlocks):
+        if block[5] is not None: corners[i] = block[5]
 
-        geom = MakeABlock([x-holeW2, x+holeW2, z-h/2, z+h/2, -d/2, d/2], subDivision, len(wallVs), corners)
-        wallVs += geom[0]
-        wallFs += geom[1]
+    bounds = numpy.column_stack((x-w/2, x+w/2, z-h/2, z+h/2, -d/2, d/2))
+    blockVs,blockFs = MakeBlocks(bounds, subDivision, corners)
 
     # make Arches for every opening specified in the plan.
 
-    blockHMin=settings['hm']+blockGap
+    archVs=[]
+    archFs=[]
+
+    blockHMin=wall.settings['hm']+blockGap
 
     for hole in holeList:
         # lower arch stones
         if hole.vl > 0 and hole.rtl > blockHMin:
-            archGeneration(hole, wallVs, wallFs, -1)
+            archGeneration(wall, hole, archVs, archFs, -1)
 
         # top arch stones
         if hole.v > 0 and hole.rt > blockHMin:
-            archGeneration(hole, wallVs, wallFs, 1)
+            archGeneration(wall, hole, archVs, archFs, 1)
+
+    # arch stones go after the blocks.
+    wallVs = numpy.concatenate((blockVs, numpy.array(archVs, dtype=numpy.float32).reshape(-1,3)))
+    wallFs = numpy.concatenate((blockFs, numpy.array(archFs, dtype=numpy.int32).reshape(-1,4) + len(blockVs)))
 
     if wallSlope: # Curve wall, dome shape if "radialized".
-        for i,vert in enumerate(wallVs):
-            wallVs[i] = [vert[0],(wallTop+vert[1])*cos(vert[2]*pi/wallTop2),(wallTop+vert[1])*sin(vert[2]*pi/wallTop2)]
+        uCurve(wallVs,wallTop)
 
     if wallDisc: # Make wall circular, dome if sloped, else disc (flat round).
-        for i,vert in enumerate(wallVs):
-            wallVs[i] = [vert[2]*cos(vert[0]),vert[2]*sin(vert[0]),vert[1]]
+        uRound(wallVs)
 
     return wallVs,wallFs
 
@@ -817,10 +838,24 @@ def wallBuild(sRef,rows,holeList):
 #    mindst: the minimum distance between points
 #    dev: the maximum random deviation from avedst
 #    center: flag to center the elements in the range, 0 == disabled
+#    rng: numpy.random.Generator for long rows, rnd: random.Random for short
+#     ones and the centre offset; a WallBuilder passes its own.
 #
 # returns an ordered list of points, including the end points.
 #
-def fill(objXO,objXL,avedst,mindst=0.0,dev=0.0,center=0):
+# Gaps are avedst +-dev, any under mindst is redrawn as mindst + up to dev/2.
+#  Rows of up to FILL_LOOP_BLOCKS blocks step one gap at a time; longer rows
+#  draw the gaps a batch at a time, sum them (numpy.cumsum) and clip at the
+#  limit, which only pays off once numpy's per-call cost is spread out.
+#
+FILL_LOOP_BLOCKS=48
+
+def fill(objXO,objXL,avedst,mindst=0.0,dev=0.0,center=0,rng=None,rnd=None):
+
+    # nothing to space blocks by, one from end to end (the loop never ended).
+    if avedst <= 0 and mindst <= 0 and not dev: return [objXO, objXL]
+
+    if rnd is None: rnd = random # the module's own Random.
 
     curpos = objXO
     poslist = [curpos]
@@ -828,25 +863,58 @@ def fill(objXO,objXL,avedst,mindst=0.0,dev=0.0,center=0):
     # Set offset by average spacing, then add blocks (fall through);
     # if not at edge.
     if center:
-        curpos += ((objXL-objXO-mindst*2)%avedst)/2+mindst
-        if curpos-poslist[-1]<mindst: curpos = poslist[-1]+mindst+random()*dev/2
+        curpos += (((objXL-objXO-mindst*2)%avedst)/2 if avedst else 0)+mindst
+        if curpos-poslist[-1]<mindst: curpos = poslist[-1]+mindst+(rnd.random()*dev/2 if dev else 0)
 
         # clip to right edge.
-        if (objXL-curpos<mindst) or (objXL-curpos< mindst):
+        if objXL-curpos<mindst:
             poslist.append(objXL)
             return poslist
         else: poslist.append(curpos)
 
+    # batch size from the shortest likely gap, so one batch nearly always does.
+    minGap = max(mindst, avedst-dev, avedst/2)
+
+    # short rows (or no sure progress per gap): one gap at a time.
+    if minGap <= 0 or objXL-curpos < avedst*FILL_LOOP_BLOCKS:
+        draw = rnd.random
+        while True:
+            curpos += avedst+(draw()-0.5)*2*dev
+            if curpos-poslist[-1]<mindst:
+                curpos = poslist[-1]+mindst+draw()*dev/2
+
+            if objXL-curpos<mindst:
+                poslist.append(objXL) # close off edges at limit
+                return poslist
+            else: poslist.append(curpos)
+
+    if dev and rng is None: rng = numpy.random.default_rng()
+
     # make block edges
     while True:
-        curpos += avedst+rndd()*dev
-        if curpos-poslist[-1]<mindst:
-            curpos = poslist[-1]+mindst+random()*dev/2
+        count = int(max(objXL-mindst-curpos, 0)/minGap) + 2
+
+        # gaps after curpos, summed in order: the same additions as the loop.
+        gaps = numpy.empty(count+1)
+        gaps[0] = curpos
+        if dev:
+            gaps[1:] = rng.uniform(avedst-dev, avedst+dev, count)
+            if avedst-dev < mindst:
+                short = numpy.flatnonzero(gaps[1:]<mindst)+1
+                gaps[short] = rng.uniform(mindst, mindst+dev/2, len(short))
+        else:
+            gaps[1:] = max(avedst, mindst)
+
+        edges = numpy.cumsum(gaps)[1:]
+        last = int(numpy.searchsorted(edges, objXL-mindst, 'right'))
 
-        if (objXL-curpos<mindst) or (objXL-curpos< mindst):
+        if last < count:
+            poslist += edges[:last].tolist()
             poslist.append(objXL) # close off edges at limit
             return poslist
-        else: poslist.append(curpos)
+
+        poslist += edges.tolist()
+        curpos = poslist[-1]
 
 
 #######################################################################
@@ -935,6 +1003,77 @@ def MakeABlock(bounds, segsize, vll=0, Offsets=None, FaceExclude=[], bevel=0, xB
     return points, faces
 
 
+#######################################################################
+#
+# MakeBlocks: Generate the geometry of many blocks at once.
+#
+#  Same blocks as MakeABlock, but in arrays: no Python lists per vertex.
+#
+#  bounds: array of block boundaries (n x 6), as MakeABlock's bounds.
+#  segsize: the maximum size before lengthwise subdivision occurs
+#  Offsets: optional array of corner deltas (n x 8 x 3), ordered as
+#      MakeABlock's Offsets; zeros for a plain block.
+#  vll: the number of vertexes already in the mesh.
+#
+#  return vertices (float32, v x 3) and quad faces (int32, f x 4).
+#
+def MakeBlocks(bounds, segsize, Offsets=None, vll=0):
+
+    bounds = numpy.asarray(bounds, dtype=numpy.float64).reshape(-1,6)
+    left, right = bounds[:,0], bounds[:,1]
+    width = right-left
+
+    # Slices as fill(left, right, segsize, segsize, center=1): the first cut
+    #  centers the remainder, then one every segsize to within segsize of right.
+    first = left + numpy.mod(width-segsize*2, segsize)/2 + segsize
+    cuts = numpy.floor((right-first-segsize)/segsize) + 1
+    cuts[right-first < segsize] = 0
+    sliceCt = cuts.astype(numpy.int64) + 2
+
+    # Vertex and face numbers for each block, by prefix sum of the slice counts.
+    sliceEnd = numpy.cumsum(sliceCt)
+    sliceStart = sliceEnd - sliceCt
+    blockOf = numpy.repeat(numpy.arange(len(bounds)), sliceCt)
+    sliceIdx = numpy.arange(sliceEnd[-1] if len(bounds) else 0) - sliceStart[blockOf]
+    lastSlice = sliceIdx == sliceCt[blockOf]-1
+
+    x = first[blockOf] + (sliceIdx-1)*segsize
+    x[sliceIdx == 0] = left
+    x[lastSlice] = right
+
+    # 4 points a slice: bottom back, bottom front, top front, top back.
+    points = numpy.empty((len(x),4,3))
+    points[:,:,0] = x[:,None]
+    points[:,:,1] = bounds[blockOf][:,[4,5,5,4]]
+    points[:,:,2] = bounds[blockOf][:,[2,2,3,3]]
+
+    if Offsets is not None:
+        # corner offsets blend from the left end to the right end.
+        Offsets = numpy.asarray(Offsets, dtype=numpy.float64).reshape(-1,8,3)[blockOf]
+        safeW = numpy.where(width == 0, 1, width)
+        xwt = numpy.where(lastSlice, 1.0, (x-left[blockOf])/safeW[blockOf])
+        xwt[sliceIdx == 0] = 0.0
+        xwt = xwt[:,None,None]
+        points += Offsets[:,[0,1,3,2]]*(1-xwt) + Offsets[:,[4,5,7,6]]*xwt
+
+    # Faces: the left end, 4 sides per slice gap, the right end.
+    faceCt = sliceCt*4 - 2
+    faceStart = numpy.cumsum(faceCt) - faceCt
+    vertStart = sliceStart*4 + vll
+
+    faces = numpy.empty((faceCt.sum(),4), dtype=numpy.int64)
+    faces[faceStart] = vertStart[:,None] + [0,3,2,1]
+    faces[faceStart+faceCt-1] = (vertStart + (sliceCt-1)*4)[:,None] + [0,1,2,3]
+
+    gapCt = sliceCt-1
+    gapOf = numpy.repeat(numpy.arange(len(bounds)), gapCt)
+    gapIdx = numpy.arange(gapCt.sum()) - (numpy.cumsum(gapCt)-gapCt)[gapOf]
+    sideAt = (faceStart[gapOf] + 1 + gapIdx*4)[:,None] + numpy.arange(4)
+    faces[sideAt] = (vertStart[gapOf] + gapIdx*4)[:,None,None] + [[0,1,5,4],[1,2,6,5],[2,3,7,6],[3,0,4,7]]
+
+    return points.reshape(-1,3).astype(numpy.float32), faces.astype(numpy.int32)
+
+
 #
 #For generating Keystone Geometry
 def MakeAKeystone(xpos, width, zpos, ztop, zbtm, thick, bevel, vll=0, FaceExclude=[], xBevScl=1):
@@ -1056,14 +1195,14 @@ class opening:
     #
     def edgeS(edgeParms, ht, s):
 
-        wallTopZ=dims['t']
+        wallTopZ=edgeParms.wall.dims['t']
         wallHalfH=edgeParms.h/2
         wallHalfW=edgeParms.w/2
         wallBase=edgeParms.z
 
         # set the row radius: 1 for standard wall (flat)
-        if settings['Round']:
-            if settings['Curve']: r1 = abs(wallTopZ*sin(ht*pi/(wallTopZ*2)))
+        if edgeParms.wall.settings['Round']:
+            if edgeParms.wall.settings['Curve']: r1 = abs(wallTopZ*sin(ht*pi/(wallTopZ*2)))
             else: r1 = abs(ht)
         else: r1 = 1
 
@@ -1121,12 +1260,12 @@ class opening:
     # ht is the x position; archSide: 1 for top, -1 for bottom
     #
     def edgeV(self, ht, archSide):
-        wallTopZ=dims['t']
+        wallTopZ=self.wall.dims['t']
         dist = abs(self.x-ht)
 
         def radialAdjust(dist, sideVal): # adjust distance and for radial geometry.
-            if settings['Round']:
-                if settings['Curve']:
+            if self.wall.settings['Round']:
+                if self.wall.settings['Curve']:
                     dist = dist * abs(wallTopZ*sin(sideVal*pi/(wallTopZ*2)))
                 else:
                     dist = dist * sideVal
@@ -1178,11 +1317,11 @@ class opening:
 
     #
     def edgeBev(self, ht):
-        wallTopZ=dims['t']
+        wallTopZ=self.wall.dims['t']
         if ht > (self.z + self.h/2): return 0.0
         if ht < (self.z - self.h/2): return 0.0
-        if settings['Round']:
-            if settings['Curve']: r1 = abs(wallTopZ*sin(ht*pi/(wallTopZ*2)))
+        if self.wall.settings['Round']:
+            if self.wall.settings['Curve']: r1 = abs(wallTopZ*sin(ht*pi/(wallTopZ*2)))
             else: r1 = abs(ht)
         else: r1 = 1
         bevel = self.b / r1
@@ -1191,8 +1330,9 @@ class opening:
 ##
 #
 
-    def __init__(self, xpos, zpos, width, height, archHeight=0, archThk=0,
+    def __init__(self, wall, xpos, zpos, width, height, archHeight=0, archThk=0,
                  archHeightLower=0, archThkLower=0, bevel=0, edgeThk=0):
+        self.wall = wall # the WallBuilder it belongs to.
         self.x = float(xpos)
         self.z = float(zpos)
         self.w = float(width)
@@ -1257,23 +1397,23 @@ class rowOb:
 #    RowSegments = []
 #    BlocksNorm = []
 
-    def FillBlocks(self):
-        wallTopZ=dims['t']
+    def FillBlocks(self, wall):
+        wallTopZ=wall.dims['t']
 
         # Set the radius variable, in the case of radial geometry
-        if settings['Round']:
-            if settings['Curve']: self.radius = wallTopZ*(sin(self.z*pi/(wallTopZ*2)))
+        if wall.settings['Round']:
+            if wall.settings['Curve']: self.radius = wallTopZ*(sin(self.z*pi/(wallTopZ*2)))
             else: self.radius = self.z
 
         #initialize internal variables from global settings
 
-        SetH = settings['h']
+        SetH = wall.settings['h']
 # no HVar?
-        SetWid = settings['w']
-        SetWidVar = settings['wv']
-        SetGrt = settings['g']
-        SetDepth = settings['d']
-        SetDepthVar = settings['dv']
+        SetWid = wall.settings['w']
+        SetWidVar = wall.settings['wv']
+        SetGrt = wall.settings['g']
+        SetDepth = wall.settings['d']
+        SetDepthVar = wall.settings['dv']
 
         # height weight, make shorter rows have narrower blocks, and vice-versa
         rowHWt=((self.h/SetH-1)*ROW_H_WEIGHT+1)
@@ -1289,10 +1429,10 @@ class rowOb:
 
         blockGap=SetGrt/self.radius
         ThisBlockHeight = self.h
-        ThisBlockDepth = SetDepth+(rndd()*SetDepthVar)
+        ThisBlockDepth = SetDepth+(wall.rndd()*SetDepthVar)
 
         for segment in self.RowSegments:
-            divs = fill(segment[0]+grtOffset, segment[1]-grtOffset, avgDist, minDist, deviation)
+            divs = wall.fill(segment[0]+grtOffset, segment[1]-grtOffset, avgDist, minDist, deviation)
 
             # loop through the divisions, adding blocks for each one
             for i in range(len(divs)-1):
@@ -1302,7 +1442,7 @@ class rowOb:
                 self.BlocksNorm.append([ThisBlockx, self.z, ThisBlockw, ThisBlockHeight, ThisBlockDepth, None])
 
                 if SetDepthVar: # vary depth
-                    ThisBlockDepth = SetDepth+(rndd()*SetDepthVar)
+                    ThisBlockDepth = SetDepth+(wall.rndd()*SetDepthVar)
 
     def __init__(self,centerheight,rowheight,edgeoffset=0):
         self.z = float(centerheight)
@@ -1315,7 +1455,7 @@ class rowOb:
         self.BlocksNorm = []
 
 #
-def arch(ra,rt,x,z, archStart, archEnd, bevel, bevAngle, vll):
+def arch(wall,ra,rt,x,z, archStart, archEnd, bevel, bevAngle, vll):
     __doc__ = """\
     Makes a list of faces and vertexes for arches.
     ra: the radius of the arch, to the center of the bricks
@@ -1332,24 +1472,24 @@ def arch(ra,rt,x,z, archStart, archEnd, bevel, bevAngle, vll):
 
     #initialize internal variables for global settings
 #overkill? no, first step to eliminating "globals", and hope too improve performance.
-    SetH = settings['h']
-    SetWid = settings['w']
-    SetWidVar = settings['wv']
-    SetGrt = settings['g']
-    SetDepth = settings['d']
-    SetDepthVar = settings['dv']
-    wallTopZ=dims['t']
+    SetH = wall.settings['h']
+    SetWid = wall.settings['w']
+    SetWidVar = wall.settings['wv']
+    SetGrt = wall.settings['g']
+    SetDepth = wall.settings['d']
+    SetDepthVar = wall.settings['dv']
+    wallTopZ=wall.dims['t']
 
-    wallCirc=settings['Round']
+    wallCirc=wall.settings['Round']
 
     ArchInner = ra-rt/2
     ArchOuter = ra+rt/2-SetGrt
 
-    DepthBack = -SetDepth/2-rndc()*SetDepthVar
-    DepthFront = SetDepth/2+rndc()*SetDepthVar
+    DepthBack = -SetDepth/2-wall.rndc()*SetDepthVar
+    DepthFront = SetDepth/2+wall.rndc()*SetDepthVar
 
 # there's something wrong here...
-    if wallCirc: subdivision = settings['sdv']
+    if wallCirc: subdivision = wall.settings['sdv']
     else: subdivision = 0.12
 
     blockGap=SetGrt/(2*ra) # grout offset
@@ -1357,7 +1497,7 @@ def arch(ra,rt,x,z, archStart, archEnd, bevel, bevAngle, vll):
     offsets = ([[0]*2 + [bevel]] + [[0]*3]*3)*2
 
     #make the divisions in the "length" of the arch
-    divs = fill(archStart, archEnd, settings['w']/ra, settings['w']/ra, settings['wv']/ra)
+    divs = wall.fill(archStart, archEnd, wall.settings['w']/ra, wall.settings['w']/ra, wall.settings['wv']/ra)
 
     for i in range(len(divs)-1):
          # modify block offsets for bevel.
@@ -1385,8 +1525,8 @@ def arch(ra,rt,x,z, archStart, archEnd, bevel, bevAngle, vll):
         aflist += geom[1]
 
         if SetDepthVar: # vary depth
-            DepthBack = -SetDepth/2-rndc()*SetDepthVar
-            DepthFront = SetDepth/2+rndc()*SetDepthVar
+            DepthBack = -SetDepth/2-wall.rndc()*SetDepthVar
+            DepthFront = SetDepth/2+wall.rndc()*SetDepthVar
 
     for i,vert in enumerate(avlist):
         v0 = vert[2]*sin(vert[0]) + x
@@ -1394,7 +1534,7 @@ def arch(ra,rt,x,z, archStart, archEnd, bevel, bevAngle, vll):
         v2 = vert[2]*cos(vert[0]) + z
 
         if wallCirc:
-            if settings['Curve']: r1 = wallTopZ*(sin(v2*pi/(wallTopZ*2)))
+            if wall.settings['Curve']: r1 = wallTopZ*(sin(v2*pi/(wallTopZ*2)))
             else: r1 = v2
             v0 = v0/r1
 
@@ -1408,25 +1548,25 @@ def arch(ra,rt,x,z, archStart, archEnd, bevel, bevAngle, vll):
 # Make wedge blocks for openings.
 #
 #  example:
-#   wedgeBlocks(row, LeftWedgeEdge, LNerEdge, LEB, r1)
-#   wedgeBlocks(row, RNerEdge, RightWedgeEdge, rSide, r1)
+#   wedgeBlocks(wall, row, LeftWedgeEdge, LNerEdge, LEB, r1)
+#   wedgeBlocks(wall, row, RNerEdge, RightWedgeEdge, rSide, r1)
 #
-def wedgeBlocks(row, opening, leftPos, rightPos, edgeSide, r1):
+def wedgeBlocks(wall, row, opening, leftPos, rightPos, edgeSide, r1):
 
-    wedgeWRad=settings['w']/r1
+    wedgeWRad=wall.settings['w']/r1
 
-    wedgeEdges = fill(leftPos, rightPos, wedgeWRad, wedgeWRad, settings['wv']/r1)
+    wedgeEdges = wall.fill(leftPos, rightPos, wedgeWRad, wedgeWRad, wall.settings['wv']/r1)
 
-    blockDepth=settings['d']
-    blockDepthV=settings['dv']
-    blockGap=settings['g']/r1
+    blockDepth=wall.settings['d']
+    blockDepthV=wall.settings['dv']
+    blockGap=wall.settings['g']/r1
 
     for i in range(len(wedgeEdges)-1):
         x = (wedgeEdges[i+1] + wedgeEdges[i])/2
         w = wedgeEdges[i+1] - wedgeEdges[i] - blockGap
         halfBW=w/2
 
-        ThisBlockDepth = blockDepth+rndd()*blockDepthV
+        ThisBlockDepth = blockDepth+wall.rndd()*blockDepthV
 
         LeftVertOffset =  -( row.z - (row.h/2)*edgeSide - (opening.edgeV(x-halfBW,edgeSide)))
         RightVertOffset = -( row.z - (row.h/2)*edgeSide - opening.edgeV(x+halfBW,edgeSide) )
@@ -1451,28 +1591,28 @@ def wedgeBlocks(row, opening, leftPos, rightPos, edgeSide, r1):
     #if only one side intersects, run fill to get edge positions, but this should never happen
     #
 #
-def rowProcessing(row, holeList, WallBoundaries):
+def rowProcessing(wall, row, holeList, WallBoundaries):
 
-    if settings['Round']:#this checks for radial stonework, and sets the row radius if required
-        if settings['Curve']: r1 = abs(dims['t']*sin(row.z*pi/(dims['t']*2)))
+    if wall.settings['Round']:#this checks for radial stonework, and sets the row radius if required
+        if wall.settings['Curve']: r1 = abs(wall.dims['t']*sin(row.z*pi/(wall.dims['t']*2)))
         else: r1 = abs(row.z)
     else: r1 = 1
 
     # set block working values
-    blockWidth=settings['w']
-    blockWVar=settings['wv']
-    blockDepth=settings['d']
-    blockDVar=settings['dv']
+    blockWidth=wall.settings['w']
+    blockWVar=wall.settings['wv']
+    blockDepth=wall.settings['d']
+    blockDVar=wall.settings['dv']
 
-    blockGap=settings['g']/r1
+    blockGap=wall.settings['g']/r1
 
     # set row working values
     rowH=row.h
     rowH2=rowH/2
     rowEdge=row.EdgeOffset/r1
-    rowStart=dims['s']+rowEdge
+    rowStart=wall.dims['s']+rowEdge
 # shouldn't rowEnd be minus rowEdge?
-    rowEnd=dims['e']+rowEdge
+    rowEnd=wall.dims['e']+rowEdge
     rowTop = row.z+rowH2
     rowBtm = row.z-rowH2
 
@@ -1502,8 +1642,9 @@ def rowProcessing(row, holeList, WallBoundaries):
     # make the walls in order, sort the intersects.
 #  remove edge points that are out of order;
 #  else the "oddity" where overlapping openings create blocks inversely.
-    edgetop.sort()
-    edgebtm.sort()
+#  by position only: openings don't compare, and edges can coincide.
+    edgetop.sort(key=lambda edge: edge[0])
+    edgebtm.sort(key=lambda edge: edge[0])
 
     # These two loops trim the edges to the limits of the wall.
     # This way openings extending outside the wall don't enlarge the wall.
@@ -1528,7 +1669,7 @@ def rowProcessing(row, holeList, WallBoundaries):
     # Process each section, a pair of points in edgetop,
     # and place the edge blocks and inbetween normal block zones into the row object.
 
-    blockHMin=settings['hm']
+    blockHMin=wall.settings['hm']
 
     #maximum distance to span with one block
     MaxWid = (blockWidth+blockWVar)/r1
@@ -1579,7 +1720,7 @@ def rowProcessing(row, holeList, WallBoundaries):
         if (abs(LDiff) > blockWidth) or (not LeftWedgeEdge):
             #make wedge blocks
             if not LeftWedgeEdge: LeftWedgeEdge = leftOpening.x
-            wedgeBlocks(row, leftOpening, LeftWedgeEdge, LNerEdge, LEB, r1)
+            wedgeBlocks(wall, row, leftOpening, LeftWedgeEdge, LNerEdge, LEB, r1)
             #set the near and far edge settings to vertical, so the other edge blocks don't interfere
             LFarEdge , LTop , LBtm = LNerEdge, LNerEdge, LNerEdge
             LDiff = 0
@@ -1592,7 +1733,7 @@ def rowProcessing(row, holeList, WallBoundaries):
         if (abs(RDiff) > blockWidth) or (not RightWedgeEdge):
             #make wedge blocks
             if not RightWedgeEdge: RightWedgeEdge = rightOpening.x
-            wedgeBlocks(row, rightOpening, RNerEdge, RightWedgeEdge, rSide, r1)
+            wedgeBlocks(wall, row, rightOpening, RNerEdge, RightWedgeEdge, rSide, r1)
 
             #set the near and far edge settings to vertical, so the other edge blocks don't interfere
             RFarEdge , RTop , RBtm = RNerEdge, RNerEdge, RNerEdge
@@ -1602,7 +1743,7 @@ def rowProcessing(row, holeList, WallBoundaries):
         if blockXx < MaxWid:
             x = (LNerEdge + RNerEdge)/2.
             w = blockXx
-            ThisBlockDepth = rndd()*blockDVar+blockDepth
+            ThisBlockDepth = wall.rndd()*blockDVar+blockDepth
             BtmOff = LBtm - LNerEdge
             TopOff = LTop - LNerEdge
             ThisBlockOffsets = [[BtmOff,0,0]]*2 + [[TopOff,0,0]]*2
@@ -1641,19 +1782,19 @@ def rowProcessing(row, holeList, WallBoundaries):
 
         if blockXx < MaxWid*2: # only two blocks?
             #div is the x position of the dividing point between the two bricks
-            div = blockXm + (rndd()*blockWVar)/r1
+            div = blockXm + (wall.rndd()*blockWVar)/r1
 
             #set the x position and width for the left block
             x = (div + LNerEdge)/2 - blockGap/4
             w = (div - LNerEdge) - blockGap/2
-            ThisBlockDepth = rndd()*blockDVar+blockDepth
+            ThisBlockDepth = wall.rndd()*blockDVar+blockDepth
             #For reference: EdgeBlocks = [[x,z,w,h,d,[corner offset matrix]],[etc.]]
             row.BlocksEdge.append([x,row.z,w,rowH,ThisBlockDepth,leftOffsets])
 
             #Initialize for the block on the right side
             x = (div + RNerEdge)/2 + blockGap/4
             w = (RNerEdge - div) - blockGap/2
-            ThisBlockDepth = rndd()*blockDVar+blockDepth
+            ThisBlockDepth = wall.rndd()*blockDVar+blockDepth
             row.BlocksEdge.append([x,row.z,w,rowH,ThisBlockDepth,rightOffsets])
             continue
 
@@ -1663,26 +1804,26 @@ def rowProcessing(row, holeList, WallBoundaries):
         #set the x position and width for the block
         widOptions = [blockWidth, bevelL + blockWidth, leftOpening.ts]
         baseWidMax = max(widOptions)
-        w = baseWidMax+row.EdgeOffset+(rndd()*blockWVar)
+        w = baseWidMax+row.EdgeOffset+(wall.rndd()*blockWVar)
         widOptions[0] = blockWidth
         widOptions[2] = w
         w = max(widOptions) / r1 - blockGap
         x = w/2 + LNerEdge + blockGap/2
         BlockRowL = x + w/2
-        ThisBlockDepth = rndd()*blockDVar+blockDepth
+        ThisBlockDepth = wall.rndd()*blockDVar+blockDepth
         row.BlocksEdge.append([x,row.z,w,rowH,ThisBlockDepth,leftOffsets])
 
         #make Right edge block
         #set the x position and width for the block
         widOptions = [blockWidth, bevelR + blockWidth, rightOpening.ts]
         baseWidMax = max(widOptions)
-        w = baseWidMax+row.EdgeOffset+(rndd()*blockWVar)
+        w = baseWidMax+row.EdgeOffset+(wall.rndd()*blockWVar)
         widOptions[0] = blockWidth
         widOptions[2] = w
         w = max(widOptions) / r1 - blockGap
         x = RNerEdge - w/2 - blockGap/2
         BlockRowR = x - w/2
-        ThisBlockDepth = rndd()*blockDVar+blockDepth
+        ThisBlockDepth = wall.rndd()*blockDVar+blockDepth
         row.BlocksEdge.append([x,row.z,w,rowH,ThisBlockDepth,rightOffsets])
 
         row.RowSegments.append([BlockRowL,BlockRowR])
@@ -1694,16 +1835,16 @@ def rowProcessing(row, holeList, WallBoundaries):
 #
 # Returns: list of rows.
 #
-def wallPlan(sRef,holeList):
+def wallPlan(wall,holeList):
 
     rows = []
 
-    wallTop=sRef.properties.wallZ
-    wallWid=sRef.properties.wallX
-    blockHMin=sRef.properties.HeightMin
-    blockHMax=sRef.properties.blockZ
-    blockHVar=sRef.properties.HeightVar
-    groutG=sRef.properties.Grout
+    wallTop=wall.props.wallZ
+    wallWid=wall.props.wallX
+    blockHMin=wall.props.HeightMin
+    blockHMax=wall.props.blockZ
+    blockHVar=wall.props.HeightVar
+    groutG=wall.props.Grout
 
     blockHMin+=groutG
     rowHMin=blockHMin
@@ -1720,20 +1861,21 @@ def wallPlan(sRef,holeList):
 
     #divs are the normal old row divisions, add them between the top and bottom split
 # what's with "[1:-1]" at end????
-    divs = fill(splits[0],splits[-1],blockHMax,blockHMin,blockHVar)[1:-1]
-
-    #remove the divisions that are too close to the splits, so we don't get tiny thin rows
-    for i in range(len(divs)-1,-1,-1):
-        for j in range(len(splits)):
-            diff = abs(divs[i] - splits[j])
-            #(blockHMin+groutG) is the old minimum value
-            if diff < (blockHMax-blockHVar+groutG):
-                del(divs[i])
-                break
+    divs = wall.fill(splits[0],splits[-1],blockHMax,blockHMin,blockHVar)[1:-1]
+
+    #remove the divisions that are too close to the splits, so we don't get tiny thin rows;
+    # both lists are sorted, so only the splits either side of a division matter.
+    #(blockHMin+groutG) is the old minimum value
+    splitGap = blockHMax-blockHVar+groutG
+    keep = []
+    for div in divs:
+        near = bisect_left(splits, div)
+        if near > 0 and div - splits[near-1] < splitGap: continue
+        if near < len(splits) and splits[near] - div < splitGap: continue
+        keep.append(div)
 
     #now merge the divs and splits lists
-    divs += splits
-    divs.sort()
+    divs = list(merge(keep, splits))
 
     #trim the rows to the bottom and top of the wall
     if divs[0] < 0: divs[:1] = []
@@ -1742,30 +1884,25 @@ def wallPlan(sRef,holeList):
     #now, make the data for each row
     #rows = [[center height,row height,edge offset],[etc.]]
 
-    divCount = len(divs)-1 # number of divs to check
-    divCheck = 0 # current div entry
-
-    while divCheck < divCount:
-        RowZ = (divs[divCheck]+divs[divCheck+1])/2
-        RowHeight = divs[divCheck+1]-divs[divCheck]-groutG
-        EdgeOffset = settings['eoff']*(fmod(divCheck,2)-0.5)
-
-        # if row height is too shallow: delete next div entry, decrement total, and recheck current entry.
-        if RowHeight < rowHMin:
-            del(divs[divCheck+1])
-            divCount -= 1 # Adjust count for removed div entry.
-            continue
+    # one pass up the wall: a division that would make the row below it too
+    # shallow is skipped, the row then runs on to the next one.
+    rowBtm = divs[0]
+    for rowTop in divs[1:]:
+        RowHeight = rowTop-rowBtm-groutG
+        if RowHeight < rowHMin: continue
 
+        RowZ = (rowBtm+rowTop)/2
+        EdgeOffset = wall.settings['eoff']*(fmod(len(rows),2)-0.5)
         rows.append(rowOb(RowZ, RowHeight, EdgeOffset))
 
-        divCheck += 1 # on to next div entry
+        rowBtm = rowTop
 
     # set up opening object to handle the edges of the wall
-    WallBoundaries = OpeningInv((dims['s'] + dims['e'])/2,wallTop/2,wallWid,wallTop)
+    WallBoundaries = OpeningInv(wall,(wall.dims['s'] + wall.dims['e'])/2,wallTop/2,wallWid,wallTop)
 
     #Go over each row in the list, set up edge blocks and block sections
     for rownum in range(len(rows)):
-        rowProcessing(rows[rownum], holeList, WallBoundaries)
+        rowProcessing(wall, rows[rownum], holeList, WallBoundaries)
 
     return rows
 
@@ -1775,7 +1912,7 @@ def wallPlan(sRef,holeList):
 # Makes arches for the top and bottom
 # hole is the "wall opening" that the arch is for.
 #
-def archGeneration(hole, vlist, flist, sideSign):
+def archGeneration(wall, hole, vlist, flist, sideSign):
 
     avlist = []
     aflist = []
@@ -1799,10 +1936,10 @@ def archGeneration(hole, vlist, flist, sideSign):
     z = hole.z
     bev = hole.b
 
-    blockHMin=settings['hm']
-    blockGap=settings['g']
-    blockDepth=settings['d']
-    blockDVar=settings['dv']
+    blockHMin=wall.settings['hm']
+    blockGap=wall.settings['g']
+    blockDepth=wall.settings['d']
+    blockDVar=wall.settings['dv']
 
     if v > holeW2: # two arcs, to make a pointed arch
         # positioning
@@ -1818,7 +1955,7 @@ def archGeneration(hole, vlist, flist, sideSign):
         anglebeg = (pi/2)*(-sideSign)
         angleend = (pi/2)*(-sideSign) + midHalfAngle
 
-        avlist,aflist = arch(ra,rt,(xoffset)*(sideSign),zpos,anglebeg,angleend,bev,bevelAngle,len(vlist))
+        avlist,aflist = arch(wall,ra,rt,(xoffset)*(sideSign),zpos,anglebeg,angleend,bev,bevelAngle,len(vlist))
 
         for i,vert in enumerate(avlist): avlist[i] = [vert[0]+hole.x,vert[1],vert[2]]
         vlist += avlist
@@ -1829,7 +1966,7 @@ def archGeneration(hole, vlist, flist, sideSign):
         anglebeg = (pi/2)*(sideSign) - midHalfAngle
         angleend = (pi/2)*(sideSign)
 
-        avlist,aflist = arch(ra,rt,(xoffset)*(-sideSign),zpos,anglebeg,angleend,bev,bevelAngle,len(vlist))
+        avlist,aflist = arch(wall,ra,rt,(xoffset)*(-sideSign),zpos,anglebeg,angleend,bev,bevelAngle,len(vlist))
 
         for i,vert in enumerate(avlist): avlist[i] = [vert[0]+hole.x,vert[1],vert[2]]
 
@@ -1837,7 +1974,7 @@ def archGeneration(hole, vlist, flist, sideSign):
         flist += aflist
 
         #keystone
-        Dpth = blockDepth+rndc()*blockDVar
+        Dpth = blockDepth+wall.rndc()*blockDVar
         angleBevel = (pi/2)*(sideSign) - midHalfAngle
         Wdth = (rt - blockGap - bev) * 2 * sin(angleBevel) * sideSign #note, sin may be negative
         MidZ = ((sideSign)*(bevHt + h/2.0) + z) + (rt - blockGap - bev) * cos(angleBevel) #note, cos may come out negative too
@@ -1855,9 +1992,9 @@ def archGeneration(hole, vlist, flist, sideSign):
         if Wdth >= blockHMin:
             avlist,aflist = MakeAKeystone(x, Wdth, MidZ, TopHt, BtmHt, Dpth, keystoneBevel, len(vlist))
 
-            if settings['Round']:
+            if wall.settings['Round']:
                 for i,vert in enumerate(avlist):
-                    if settings['Curve']: r1 = dims['t']*sin(vert[2]*pi/(dims['t']*2))
+                    if wall.settings['Curve']: r1 = wall.dims['t']*sin(vert[2]*pi/(wall.dims['t']*2))
                     else: r1 = vert[2]
                     avlist[i] = [((vert[0]-hole.x)/r1)+hole.x,vert[1],vert[2]]
 
@@ -1882,7 +2019,7 @@ def archGeneration(hole, vlist, flist, sideSign):
             anglebeg = angleOffset - pi/2
             angleend = angleOffset + pi/2
 
-        avlist,aflist = arch(ra,rt,0,zpos,anglebeg,angleend,bev,0.0,len(vlist))
+        avlist,aflist = arch(wall,ra,rt,0,zpos,anglebeg,angleend,bev,0.0,len(vlist))
 
         for i,vert in enumerate(avlist): avlist[i] = [vert[0]+x,vert[1],vert[2]]
 
@@ -1893,8 +2030,8 @@ def archGeneration(hole, vlist, flist, sideSign):
         width = sqrt(rt**2 - c**2) - blockGap
 
         if c > blockHMin + blockGap and c < width + blockGap:
-            if settings['Round']: subdivision = settings['sdv'] * (zpos + (h/2)*sideSign)
-            else: subdivision = settings['sdv']
+            if wall.settings['Round']: subdivision = wall.settings['sdv'] * (zpos + (h/2)*sideSign)
+            else: subdivision = wall.settings['sdv']
 
             #set the height of the block, it should be as high as the max corner position, minus grout
             height = c - blockGap*(0.5 + c/(width + blockGap))
@@ -1904,7 +2041,7 @@ def archGeneration(hole, vlist, flist, sideSign):
             xstart = holeW2
             zstart = z + sideSign * (h/2 + blockGap/2)
             woffset = width*(blockHMin + blockGap/2)/(c - blockGap/2)
-            depth = blockDepth+(rndd()*blockDVar)
+            depth = blockDepth+(wall.rndd()*blockDVar)
 
             if sideSign == 1:
                 offsets = [[0]*3]*6 + [[0]*2 + [voff]]*2
@@ -1921,7 +2058,7 @@ def archGeneration(hole, vlist, flist, sideSign):
             avlist,aflist = MakeABlock([x-xstart-width, x-xstart- woffset, btmSide, topSide, -depth/2, depth/2], subdivision, len(vlist), Offsets=offsets, xBevScl=1)
 
 # top didn't use radialized in prev version; just noting for clarity - may need to revise for "sideSign == 1"
-            if settings['Round']:
+            if wall.settings['Round']:
                 for i,vert in enumerate(avlist): avlist[i] = [((vert[0]-x)/vert[2])+x,vert[1],vert[2]]
 
             vlist += avlist
@@ -1942,7 +2079,7 @@ def archGeneration(hole, vlist, flist, sideSign):
             avlist,aflist = MakeABlock([x+xstart+woffset, x+xstart+width, btmSide, topSide, -depth/2, depth/2], subdivision, len(vlist), Offsets=offsets, xBevScl=1)
 
 # top didn't use radialized in prev version; just noting for clarity - may need to revise for "sideSign == 1"
-            if settings['Round']:
+            if wall.settings['Round']:
                 for i,vert in enumerate(avlist): avlist[i] = [((vert[0]-x)/vert[2])+x,vert[1],vert[2]]
 
             vlist += avlist
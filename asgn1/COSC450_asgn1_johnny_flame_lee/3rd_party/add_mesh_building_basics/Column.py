@@ -27,9 +27,14 @@ Create a "column" at 3D cursor as architectural/decorative object in a scene.
 
 import bpy
 import mathutils
+import numpy
+import collections
+import hashlib
+import os
 from math import radians, pi, sin, cos
 from bpy.props import FloatProperty, FloatVectorProperty, IntProperty, BoolProperty, EnumProperty
-from add_mesh_building_basics.UtilMats import uMatRGBSet
+from add_mesh_building_basics.UtilMats import uMatRGBSet, uMatNormalSet
+from add_mesh_building_basics.UtilMesh import uBridge, uLathe, uMerge, uMeshSet, uSeam
 
 ################################################################################
 #
@@ -225,31 +230,6 @@ def makeSeg(segTy, segCt, segXo, segZo, segXe, segZe, segRw, seg2=True, segI=Tru
         return makeProfile(segXo, segZo, segXe, segZe, segRw, segCt, 1, 0.15, seg2, segI, segL)
 
 
-############################################################
-#
-#    Rotate shape... finish 360 as a handler sub-routine
-#
-def obj_360(objName, objVert, objEdge, objScene, objSteps=1):
-    objMesh = bpy.data.meshes.new(objName)
-    objMesh.from_pydata(objVert, objEdge, [])
-    objMesh.update()
-
-    # generate object
-    ob_new = bpy.data.objects.new(objName, objMesh)
-    objScene.objects.link(ob_new)
-    objScene.objects.active = ob_new
-    ob_new.select = True
-
-    # add faces/steps
-    bpy.ops.object.editmode_toggle()
-    bpy.ops.mesh.spin(steps=objSteps, dupli=False, center=(0,0,0), axis=(0,0,1))
-    bpy.ops.mesh.spin(steps=objSteps, dupli=False, center=(0,0,0), axis=(0,0,1))
-    bpy.ops.mesh.spin(steps=objSteps, dupli=False, center=(0,0,0), axis=(0,0,1))
-    bpy.ops.mesh.spin(steps=objSteps, dupli=False, center=(0,0,0), axis=(0,0,1))
-    bpy.ops.mesh.select_all(action='SELECT')
-    bpy.ops.object.editmode_toggle()
-
-
 ################################################################################
 #
 # A very simple "bridge" tool.
@@ -267,68 +247,11 @@ def createFaces(vertIdx1, vertIdx2, vertLoop=True, flipped=False):
     Returns:
         itmFaces  a list of faces (list of  lists); "None" for invalid options.
     '''
-    # ensure there are lists to work with.
-    if not vertIdx1 or not vertIdx2:
+    itmFaces = uBridge(vertIdx1, vertIdx2, vertLoop, flipped)
+    if itmFaces is None:
         return None
 
-    # check minimum second list verts.
-    if len(vertIdx2) < 2:
-        return None
-
-    itmFaces = []
-    workFace = []
-    fanFaces = False
-
-    # vert lists must match if not fan/star effect.
-    if len(vertIdx1) != len(vertIdx2):
-        if len(vertIdx1) == 1:
-            fanFaces = True
-        else:
-            return None
-
-    total = len(vertIdx2)
-
-    # Bridge the start with the end.
-    if vertLoop:
-        if flipped:
-            workFace = [
-                vertIdx1[0],
-                vertIdx2[0],
-                vertIdx2[total - 1]]
-
-            if not fanFaces:
-                workFace.append(vertIdx1[total - 1])
-
-            itmFaces.append(workFace)
-        else:
-            workFace = [vertIdx2[0], vertIdx1[0]]
-            if not fanFaces:
-                workFace.append(vertIdx1[total - 1])
-
-            workFace.append(vertIdx2[total - 1])
-
-            itmFaces.append(workFace)
-
-    # Bridge the rest of the faces.
-    for num in range(total - 1):
-        if flipped:
-            if fanFaces:
-                workFace = [vertIdx2[num], vertIdx1[0], vertIdx2[num + 1]]
-            else:
-                workFace = [vertIdx2[num], vertIdx1[num],
-                    vertIdx1[num + 1], vertIdx2[num + 1]]
-
-            itmFaces.append(face)
-        else:
-            if fanFaces:
-                workFace = [vertIdx1[0], vertIdx2[num], vertIdx2[num + 1]]
-            else:
-                workFace = [vertIdx1[num], vertIdx2[num],
-                    vertIdx2[num + 1], vertIdx1[num + 1]]
-
-            itmFaces.append(workFace)
-
-    return itmFaces
+    return itmFaces.tolist()
 
 
 ################################################################################
@@ -775,26 +698,173 @@ def add_extent_capital(startX, endX, shapeZ, shapeR, startZ, matchR, shapeT=1):
 
 ################################################################################
 #
+# Geometry cache.
+#
+#  The redo panel runs the operator again for every change of a setting, so
+#   the geometry of the last few settings is kept, and so are the parts it is
+#   made of (shaft, base, capital) by the settings each one uses: changing the
+#   capital only makes a new capital. Geometry from the caches is shared, it
+#   must not be changed in place.
+#
+COLUMN_CACHE_SIZE = 8
+
+# Settings that shape the column, the key of the whole geometry.
+COLUMN_GEOM_PROPS = (
+    'col_radius', 'col_taper', 'col_faces', 'col_blocks', 'row_height', 'skew',
+    'col_flutes', 'addendum', 'flute_sides', 'col_bake',
+    'col_plinth', 'plinth_height', 'plinth_width',
+    'col_base', 'base_type', 'base_faces', 'base_height', 'base_width',
+    'col_cap', 'cap_type', 'cap_faces', 'cap_height', 'cap_width',
+    'col_finale', 'finale_height', 'finale_width')
+
+
+class ColumnCache:
+    '''
+   The last few results of a builder, by the key they were made for.
+    '''
+    def __init__(self, size=COLUMN_CACHE_SIZE):
+        self.size = size
+        self.items = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, make):
+        if key in self.items:
+            self.hits += 1
+            self.items.move_to_end(key)
+            return self.items[key]
+
+        self.misses += 1
+        item = self.items[key] = make()
+        if len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+        return item
+
+    def clear(self):
+        self.items.clear()
+
+    def __repr__(self):
+        return "ColumnCache(%d/%d items, %d hits, %d misses)" % (len(self.items), self.size, self.hits, self.misses)
+
+
+colCaches = {'column': ColumnCache(), 'shaft': ColumnCache(), 'base': ColumnCache(), 'capital': ColumnCache()}
+
+
+def clearColumnCaches():
+    for cache in colCaches.values():
+        cache.clear()
+
+
+################################################################################
+#
+# Profile library for bases and capitals.
+#
+#  Every point of a base or capital profile is a weighted sum of the six
+#   parameters (startX, endX, shapeZ, shapeR, startZ, matchR), so each type is
+#   stored once as a table of weights (points x [X, Z] x 6) and only scaled
+#   when a column is made. Built in types are baked from add_extent_base() and
+#   add_extent_capital() the first time they are used; new ones can be added
+#   as data with registerProfile().
+#
+colProfiles = {'base': {}, 'capital': {}}
+profileMakers = {'base': add_extent_base, 'capital': add_extent_capital}
+
+
+def bakeProfile(kind, shapeT):
+    '''
+   Weight table for a built in type, by running its maker once per parameter.
+    '''
+    cols = []
+    for I in range(6):
+        args = [0.0] * 6
+        args[I] = 1.0
+        pVerts, pEdges = profileMakers[kind](*args, shapeT=shapeT)
+        cols.append(numpy.array(pVerts, dtype=float)[:, 1:]) # drop the 0 X.
+
+    return numpy.stack(cols, axis=2)
+
+
+def registerProfile(kind, shapeT, points):
+    '''
+   Add (or replace) a profile type.
+
+    Params:
+        kind    'base' or 'capital'.
+        shapeT  type number, as used by base_type/cap_type.
+        points  list of (shape, match, height) from bottom to top; radius is
+                 shape*shapeR + match*matchR, Z is startZ + height*shapeZ.
+                 The points on the axis at each end are added.
+    '''
+    table = numpy.zeros((len(points) + 2, 2, 6))
+    table[:, 1, 4] = 1.0 # startZ
+
+    for I, (shape, match, height) in enumerate(points):
+        table[I+1, 0, 3] = shape
+        table[I+1, 0, 5] = match
+        table[I+1, 1, 2] = height
+
+    table[-1, 1, 2] = points[-1][2] # close at the top.
+
+    colProfiles[kind][shapeT] = table
+    colCaches['column'].clear() # columns made with the old one.
+
+
+def getProfile(kind, shapeT, startX, endX, shapeZ, shapeR, startZ, matchR):
+    '''
+   Profile vertices for a type, same as add_extent_base()/add_extent_capital().
+
+    Returns:
+        array of [0, radius, z] points.
+    '''
+    table = colProfiles[kind].get(shapeT)
+    if table is None:
+        table = colProfiles[kind][shapeT] = bakeProfile(kind, shapeT)
+
+    workXZ = table.dot([startX, endX, shapeZ, shapeR, startZ, matchR])
+
+    return numpy.column_stack((numpy.zeros(len(workXZ)), workXZ))
+
+
+# Approximations of the other orders' capitals, as data.
+CAP_IONIC = 21
+CAP_CORINTHIAN = 22
+
+registerProfile('capital', CAP_IONIC, [
+    (0, 1.0, 0.0), (0, 1.1, 0.04), (0, 1.1, 0.1), (0, 1.0, 0.14), # astragal.
+    (0.7, 0, 0.3), (0.9, 0, 0.45), # echinus.
+    (1.0, 0, 0.6), (0.95, 0, 0.72), (0.85, 0, 0.78), # volutes, as a roll.
+    (1.0, 0, 0.8), (1.0, 0, 1.0)]) # abacus.
+
+registerProfile('capital', CAP_CORINTHIAN, [
+    (0, 1.0, 0.0), (0, 1.1, 0.03), (0, 1.0, 0.06), # astragal.
+    (0, 1.2, 0.3), (0, 1.05, 0.32), # lower row of leaves.
+    (0, 1.3, 0.55), (0, 1.15, 0.58), # upper row of leaves.
+    (0.8, 0, 0.8), (0.95, 0, 0.85), (0.9, 0, 0.88), # helices.
+    (1.0, 0, 0.88), (1.0, 0, 1.0)]) # abacus.
+
+
+################################################################################
+#
+# Every flute of a column has the same shape, so it is made once, starting at
+# angle 0, and rotated into place.
+#
 # @todo: Round top and bottom of flutes.
 # @todo: handle odd number of sides (flat in middle).
 #
-def add_col_flute(fAngle, fTarg, fBase, fXorg, fluteAd, fSides=2):
+def col_flute_template(fTarg, fluteAd, fSides=2):
     '''
-   Create "flutes" for column.
+   Cross-section of a flute.
 
     Parameters:
-        fAngle  starting point of flute on column face.
         fTarg   angle offset of flute end point for column face.
-        fBase   vertical position for vertices.
-        fXorg   column face radius, negative for flute extrusions.
         fluteAd flute "depth" offset from radius
         fSides  number of faces for flute
 
     Returns:
-        newpoints - a list of coordinates for flute points (list of tuples), [[x,y,z],[x,y,z],...n]
+        direction (n x 2 array of unit vectors) and depth in from the radius
+        (n array) of each flute point.
     '''
-    newpoints = []
-
     if fSides < 2: fSides = 2 # min number of sides.
 
     halfSides = fSides/2 # common value efficiency variable.
@@ -810,26 +880,102 @@ def add_col_flute(fAngle, fTarg, fBase, fXorg, fluteAd, fSides=2):
 
     stepCurve = fTarg/(divSides*2) # logorithmic delta along radius for sides.
 
+    angles = []
+    depths = []
     curStep = 0
-    tAngle = fAngle
 
     # curvature in
     while curStep < halfSides:
-        tAngle = tAngle + (curStep*curStep*stepCurve)
-        x1 = (fXorg - (stepD * (curStep+1))) * cos(tAngle)
-        y1 = (fXorg - (stepD * (curStep+1))) * sin(tAngle)
-        newpoints.append([x1, y1, fBase])
+        angles.append(curStep*curStep*stepCurve)
+        depths.append(stepD * (curStep+1))
         curStep+=1
 
     # curvature out - includes mid-point, and end-point...
     while curStep:
-        tAngle = tAngle + (curStep*curStep*stepCurve)
-        x1 = (fXorg - (stepD * curStep)) * cos(tAngle)
-        y1 = (fXorg - (stepD * curStep)) * sin(tAngle)
-        newpoints.append([x1, y1, fBase])
+        angles.append(curStep*curStep*stepCurve)
+        depths.append(stepD * curStep)
         curStep-=1
 
-    return newpoints
+    angles = numpy.cumsum(angles) # the steps accumulate along the flute.
+
+    return numpy.column_stack((numpy.cos(angles), numpy.sin(angles))), numpy.array(depths)
+
+
+def col_rotations(angles):
+    '''
+   Rotation matrices about Z for row vectors, points.dot(matrix) turns the
+    points by the angle; an array of angles gives a stack of matrices.
+    '''
+    cosA = numpy.cos(angles)
+    sinA = numpy.sin(angles)
+
+    return numpy.stack((numpy.stack((cosA, sinA), axis=-1),
+        numpy.stack((-sinA, cosA), axis=-1)), axis=-2)
+
+
+################################################################################
+#
+# One ring of the column at no skew or taper, the template add_column() turns
+# and sizes for each row.
+#
+def col_ring(c_faces, fluteCt, fluteAd, fluteFs):
+    '''
+   Points around a column ring.
+
+    Params:
+	c_faces   surfaces (faces) on column.
+	fluteCt   flute count.
+	fluteAd   Addendum, extent of flute from column face/radius.
+	fluteFs   number of "sides" (faces) for flute.
+
+    Returns:
+	direction (n x 2 array of unit vectors) and depth in from the radius
+	(n array) of each point.
+    '''
+    if fluteCt: # set working faces and modulo/flag for doing flutes...
+        c_faces -= c_faces % fluteCt
+        fluteFaces = c_faces / fluteCt
+    else:
+        fluteFaces = 0
+
+    tFaces = 2 * pi / c_faces # c_faces == 1 makes a square
+
+    faceCnt = numpy.arange(c_faces)
+    fAngle = faceCnt * tFaces
+
+    if fluteFaces:
+        isFlute = (faceCnt % fluteFaces) == 0 # due a flute?
+    else:
+        isFlute = numpy.zeros(c_faces, dtype=bool)
+
+    fluteDirs, fluteDepths = col_flute_template(tFaces, fluteAd, fluteFs)
+
+    # Where each face's points start in a ring.
+    segLen = numpy.where(isFlute, len(fluteDepths), 4)
+    segStart = numpy.concatenate(([0], numpy.cumsum(segLen)[:-1]))
+    ringLen = int(segLen.sum())
+
+    # the template ring, direction of each point and depth in from the radius.
+    ringDir = numpy.empty((ringLen, 2))
+    ringDepth = numpy.zeros(ringLen)
+
+    # column surface, four points per face.
+    plain = ~isFlute
+    if plain.any():
+        targStep = tFaces/4
+        pAngle = (fAngle[plain][:, None] + targStep * numpy.arange(4)).ravel()
+        idx = (segStart[plain][:, None] + numpy.arange(4)).ravel()
+
+        ringDir[idx] = numpy.column_stack((numpy.cos(pAngle), numpy.sin(pAngle)))
+
+    # flutes, the one flute turned to each flute's place.
+    if isFlute.any():
+        idx = (segStart[isFlute][:, None] + numpy.arange(len(fluteDepths))).ravel()
+
+        ringDir[idx] = numpy.matmul(fluteDirs, col_rotations(fAngle[isFlute])).reshape(-1, 2)
+        ringDepth[idx] = numpy.tile(fluteDepths, int(isFlute.sum()))
+
+    return ringDir, ringDepth
 
 
 ################################################################################
@@ -851,61 +997,182 @@ def add_column(colBase, colWide, taper, c_faces, colRows, colRowH, fluteCt, flut
 	colSkew   twist column, negative for "clock-wise" twist.
 
     Returns:
-	list of vertices and faces
+	numpy arrays of vertices (n x 3) and faces (n x 4)
+
+    One ring is made as a template by col_ring(), each row is the template
+    turned by its skew and moved in by its taper.
     '''
-    if fluteCt: # set working faces and modulo/flag for doing flutes...
-        c_faces -= c_faces % fluteCt
-        fluteFaces = c_faces / fluteCt
-    else:
-        fluteFaces = 0
+    # Per row values; taper applied row by row as it always was.
+    rowWide = []
+    for curRow in range(colRows):
+        rowWide.append(colWide)
 
-    tFaces = 2 * pi / c_faces # c_faces == 1 makes a square
+        if colWide > 0:
+            colWide -= taper # decrease radius
+        else:
+            colWide += taper # will decrease neg radius
 
-    verts = []
-    faces = []
+    rows = numpy.arange(colRows)
+    rowWide = numpy.array(rowWide)[:, None]
+    rowZ = colBase + (rows*colRowH)
 
-    edgeloop_prev = []
+    ringDir, ringDepth = col_ring(c_faces, fluteCt, fluteAd, fluteFs)
+    ringLen = len(ringDepth)
 
-    for curRow in range(colRows):
-        edgeloop = []
+    # every row, the template turned by the row's skew.
+    rowDir = numpy.matmul(ringDir, col_rotations(rows * colSkew)) # rows x points x 2
+    radius = rowWide - ringDepth # rows x points
 
-        for faceCnt in range(c_faces):
-            fAngle = faceCnt * tFaces
+    verts = numpy.empty((colRows, ringLen, 3))
+    verts[:, :, :2] = radius[:, :, None] * rowDir
+    verts[:, :, 2] = rowZ[:, None]
 
-            rSkew = curRow * colSkew
-            curZ = colBase + (curRow*colRowH)
+    # Faces between rings/rows, each ring bridged to the previous one.
+    ring = uBridge(numpy.arange(ringLen) + ringLen, numpy.arange(ringLen))
+    faces = (ring[None, :, :] + (rows[:-1] * ringLen)[:, None, None]).reshape(-1, 4)
 
-            if fluteFaces and not faceCnt % fluteFaces: # making "flutes", and due a flute?
-                verts1 = add_col_flute(fAngle + rSkew, tFaces, curZ, colWide, fluteAd, fluteFs)
+    return verts.reshape(-1, 3), faces
 
-            else: # column surface for section...
-                targStep = tFaces/4
-                vAngle = fAngle + rSkew
 
-                # create list of coordinates for column face points (list of four tuples), [[x,y,z],[x,y,z],...4]
-                verts1 = [(colWide * cos(vAngle+(targStep*I)), colWide * sin(vAngle+(targStep*I)), curZ) for I in range(4)]
+################################################################################
+#
+# Flutes baked into a normal map.
+#
+#  With col_bake the shaft is made as a plain low-poly tube and the flutes are
+#   drawn on it by a tangent space normal map. The flutes run straight up the
+#   column, so the map only varies around the ring: each pixel takes the
+#   normal of the fluted ring at its angle, measured against the facet of the
+#   plain ring under it. Maps are saved in the user's data files by a hash of
+#   the settings that shape them and loaded from there the next time.
+#
+# @todo: taper changes the flute size a little up the column, ignored.
+#
+COLUMN_BAKE_FACES = 8 # faces of the plain tube (4 points each).
+COLUMN_BAKE_SIZE = 1024 # width of the map.
+COLUMN_BAKE_DIR = "column_normals"
 
-# track down list(range(listStart,listEnd))...
-            edgeloop.extend(list(range(len(verts), len(verts) + len(verts1))))
-            verts.extend(verts1)
 
-        # Create faces between rings/rows.
-        if edgeloop_prev:
-            faces.extend(createFaces(edgeloop, edgeloop_prev))
-        edgeloop_prev = edgeloop # Track ring/row vertices for next iteration.
+def col_flute_normals(colWide, c_faces, fluteCt, fluteAd, fluteFs, lowFaces, width=COLUMN_BAKE_SIZE, samples=4):
+    '''
+   Tangent space normal map of the flutes.
 
-        # apply taper to rows.
-        if colWide > 0: 
-            colWide -= taper # decrease radius
-        else:
-            colWide += taper # will decrease neg radius
+    Params:
+        colWide    radius of the column, negative for flute extrusions.
+        c_faces, fluteCt, fluteAd, fluteFs  the fluted ring, as add_column().
+        lowFaces   faces of the plain ring the map goes on.
+        width      pixels around the ring.
+        samples    samples per pixel.
+
+    Returns:
+        RGBA pixels (4 x width x 4 array); the bottom row is flat, for the
+         parts of the mesh that are not the shaft, the others are the flutes.
+    '''
+    ringDir, ringDepth = col_ring(c_faces, fluteCt, fluteAd, fluteFs)
+    high = (colWide - ringDepth)[:, None] * ringDir
+    lowDir, lowDepth = col_ring(lowFaces, 0, 0, 2)
+    lowCt = len(lowDepth)
+
+    # angles from the first point of the plain ring, where U is 0.
+    start = numpy.arctan2(colWide * lowDir[0, 1], colWide * lowDir[0, 0])
+    highA = start + numpy.mod(numpy.arctan2(high[:, 1], high[:, 0]) - start, 2*pi)
+
+    first = numpy.argmin(highA)
+    high = numpy.roll(high, -first, axis=0)
+    highA = numpy.append(numpy.roll(highA, -first), highA[first] + 2*pi)
+
+    # outward normal of each edge of the fluted ring (counter-clockwise).
+    edges = numpy.roll(high, -1, axis=0) - high
+    edgeN = numpy.column_stack((edges[:, 1], -edges[:, 0]))
+    edgeN /= numpy.maximum(numpy.sqrt((edgeN**2).sum(axis=1)), 1e-12)[:, None]
+
+    sampleU = (numpy.arange(width * samples) + 0.5) / (width * samples)
+    sampleA = start + sampleU * 2*pi
+
+    onEdge = numpy.clip(numpy.searchsorted(highA, sampleA, side='right') - 1, 0, len(edges) - 1)
+    normal = edgeN[onEdge]
+
+    # the plain ring's facet under each sample.
+    facetA = start + (numpy.floor(sampleU * lowCt) + 0.5) * (2*pi/lowCt)
+    radial = numpy.column_stack((numpy.cos(facetA), numpy.sin(facetA)))
+    tangent = numpy.column_stack((-radial[:, 1], radial[:, 0]))
+
+    mapN = numpy.zeros((len(sampleU), 3))
+    mapN[:, 0] = (normal * tangent).sum(axis=1)
+    mapN[:, 2] = (normal * radial).sum(axis=1)
+
+    mapN = mapN.reshape(width, samples, 3).mean(axis=1)
+    mapN /= numpy.sqrt((mapN**2).sum(axis=1))[:, None]
+
+    pixels = numpy.ones((4, width, 4))
+    pixels[:, :, :3] = mapN * 0.5 + 0.5
+    pixels[0, :, :3] = (0.5, 0.5, 1.0) # flat.
+
+    return pixels
+
+
+def col_flute_uvs(faces, first, ringLen, rows):
+    '''
+   UVs for a baked shaft.
+
+    Params:
+        faces    list of face arrays of the column.
+        first    index of the shaft's first vertex.
+        ringLen  vertices per ring of the shaft.
+        rows     rings in the shaft.
+
+    Returns:
+        list of (n x size x 2) arrays, a UV per face corner. Shaft faces go
+         round the map, everything else is on its flat row.
+    '''
+    uvs = []
+    for fSet in faces:
+        local = fSet - first
+        onShaft = ((local >= 0) & (local < ringLen * rows)).all(axis=1)[:, None]
+
+        # the closing face of each ring goes from the end of the map to the start.
+        workU = (local % ringLen) / float(ringLen)
+        wrap = onShaft & ((workU.max(axis=1) - workU.min(axis=1)) > 0.5)[:, None]
+        workU = numpy.where(wrap & (workU < 0.5), workU + 1, workU)
+
+        work = numpy.empty(fSet.shape + (2,))
+        work[:, :, 0] = numpy.where(onShaft, workU, 0.5)
+        work[:, :, 1] = numpy.where(onShaft, 0.75, 0.125)
+        uvs.append(work)
+
+    return uvs
+
+
+def column_normal_image(self):
+    '''
+   Normal map image for the operator settings, made and saved if it is not
+    already on disk.
+    '''
+    key = (round(self.col_radius, 6), self.col_faces, self.col_flutes,
+        round(self.addendum, 6), self.flute_sides, COLUMN_BAKE_FACES, COLUMN_BAKE_SIZE)
+    name = "col_flutes_" + hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+
+    path = os.path.join(bpy.utils.user_resource('DATAFILES', COLUMN_BAKE_DIR, autocreate=True), name + ".png")
+
+    if os.path.exists(path):
+        img = bpy.data.images.load(path, check_existing=True)
+    else:
+        pixels = col_flute_normals(self.col_radius, self.col_faces, self.col_flutes,
+            self.addendum, self.flute_sides, min(COLUMN_BAKE_FACES, self.col_faces))
+
+        img = bpy.data.images.new(name, pixels.shape[1], pixels.shape[0], alpha=True)
+        img.pixels[:] = pixels.ravel().tolist()
+        img.filepath_raw = path
+        img.file_format = 'PNG'
+        img.save()
+
+    img.colorspace_settings.name = 'Non-Color'
 
-    return verts, faces
+    return img
 
 
 ################################################################################
 #
-def create_columnObj(self,context):
+def create_columnGeom(self):
     # validate UI setting limits, individual and relative to other parameters.
 
     # Radius can't be 0.00
@@ -916,6 +1183,20 @@ def create_columnObj(self,context):
     if self.properties.col_flutes > self.properties.col_faces:
         self.properties.col_flutes = self.properties.col_faces # Reset UI if input out of bounds...
 
+    # Taper can't exceed radius
+    if self.properties.col_taper > abs(self.properties.col_radius):
+        self.properties.col_taper = abs(self.properties.col_radius) # Reset UI if input out of bounds...
+
+    key = tuple(getattr(self, name) for name in COLUMN_GEOM_PROPS)
+
+    return colCaches['column'].get(key, lambda: build_columnGeom(self))
+
+
+################################################################################
+#
+# Geometry for (validated) settings, see create_columnGeom().
+#
+def build_columnGeom(self):
     colWidth = self.properties.col_radius
     colTubeH = self.row_height * self.col_blocks
     checkFlutes = 0
@@ -928,21 +1209,15 @@ def create_columnObj(self,context):
     else:
         checkRadius = colWidth
 
-    # Taper can't exceed radius
-    if self.properties.col_taper > checkRadius:
-        self.properties.col_taper = checkRadius # Reset UI if input out of bounds...
-
     plinthH = 0.00
     vertsPlinth = []
     edgesPlinth = []
 
     baseH = 0.00
     vertsBase = []
-    edgesBase = []
 
     capH = 0.00
     vertsCap = []
-    edgesCap = []
 
     finaleH = 0.00
     vertsFinale = []
@@ -961,14 +1236,15 @@ def create_columnObj(self,context):
         baseM = checkRadius + checkFlutes # match column with extruded flutes.
 
         # Create column base, type used to modify "style".
-        vertsBase, edgesBase = add_extent_base(
+        vertsBase = getProfile(
+            'base',
+            self.base_type,
             0.0,
             0.0,
             baseH,
             self.base_width,
             plinthH,
-            baseM,
-            self.base_type
+            baseM
             )
 
     if self.col_cap: # making a capital
@@ -977,14 +1253,15 @@ def create_columnObj(self,context):
         capM = checkRadius + checkFlutes - self.properties.col_taper # same as base with taper.
 
         # Create column capital, type used to modify "style".
-        vertsCap, edgesCap = add_extent_capital(
+        vertsCap = getProfile(
+            'capital',
+            self.cap_type,
             0.0,
             0.0,
             capH,
             self.cap_width - self.properties.col_taper, # size to top of column
             baseH + plinthH + colTubeH,
-            capM,
-            self.cap_type,
+            capM
             )
 
     if self.col_finale: # making top/cover of column.
@@ -998,56 +1275,266 @@ def create_columnObj(self,context):
 
     # Stage all operators....
 
-    verts, faces = add_column(
+    colFaces = self.col_faces
+    colFlutes = self.col_flutes
+    if self.col_bake and colFlutes: # flutes go in the normal map.
+        colFaces = min(COLUMN_BAKE_FACES, colFaces)
+        colFlutes = 0
+
+    shaftArgs = (
         baseH + plinthH,
         colWidth,
         self.col_taper/self.col_blocks, # taper column per number of rows.
-        self.col_faces, # "faces" on column, per quadrant, 1 = square.
+        colFaces, # "faces" on column, per quadrant, 1 = square.
         self.col_blocks + 1, # need extra to complete row.
         self.row_height,
-        self.col_flutes,
+        colFlutes,
         self.addendum,
         self.flute_sides,
         radians(self.skew)
         )
+    verts, faces = colCaches['shaft'].get(shaftArgs, lambda: add_column(*shaftArgs))
+
+    # Spin the profiles, 4 quadrants of "faces" steps each (plinth and finale are square).
+    # Base, column and capital are one surface: the base is left open at the
+    # top and the capital at the bottom, and their open rings are joined to
+    # the column's end rings by uSeam(). A profile end lying on the column's
+    # end ring is left out, the column's ring is used in its place, so no
+    # vertex is made twice. Base and capital only depend on their profiles,
+    # so changing the column doesn't spin them again.
+    ringLen = len(verts) // (self.col_blocks + 1)
+    shaftStart = 0
+    body = []
+    seams = []
+
+    # 1 if the open end of a profile, past its axis point, is on the ring.
+    def onRing(ends, ring):
+        ends = [p for p in ends if abs(p[-2]) > 0.0001][:1]
+        radius = numpy.hypot(ring[:, 0], ring[:, 1])
+        return int(any(abs(p[-1] - ring[0, 2]) <= 0.0001
+            and radius.min() - 0.0001 <= abs(p[-2]) <= radius.max() + 0.0001 for p in ends))
 
-    scene = context.scene
+    if self.col_base: # decorative base.
+        trim = onRing(vertsBase[::-1], verts[:ringLen])
 
-    # Deselect all objects.
-    bpy.ops.object.select_all(action='DESELECT')
+        baseSteps = self.base_faces*16
+        baseV, baseF = colCaches['base'].get((vertsBase.tobytes(), baseSteps, trim),
+            lambda: uLathe(vertsBase, baseSteps, capEnd=False, trimEnd=trim))
+        body.append((baseV, baseF))
+        shaftStart = len(baseV)
 
-    if self.col_plinth: # platform (sub-base).
-        obj_360("Plinth", vertsPlinth, edgesPlinth, scene)
+        # column over the base, the base's open ring is its last.
+        seams.append((shaftStart + numpy.arange(ringLen), numpy.arange(shaftStart - baseSteps, shaftStart)))
 
-    if self.col_base: # decorative base.
-        obj_360("Base", vertsBase, edgesBase, scene, self.base_faces*4)
+    body.append((verts, [faces]))
 
     if self.col_cap: # decorative top.
-        obj_360("Capital", vertsCap, edgesCap, scene, self.cap_faces*4)
+        trim = onRing(vertsCap, verts[-ringLen:])
+
+        capSteps = self.cap_faces*16
+        capV, capF = colCaches['capital'].get((vertsCap.tobytes(), capSteps, trim),
+            lambda: uLathe(vertsCap, capSteps, capStart=False, trimStart=trim))
+        body.append((capV, capF))
+        capStart = shaftStart + len(verts)
+
+        # capital over the column, the capital's open ring is its first.
+        seams.append((capStart + numpy.arange(capSteps), numpy.arange(capStart - ringLen, capStart)))
+
+    bodyV, bodyF = uMerge(body)
+    bodyF += [uSeam(bodyV, upper, lower) for upper, lower in seams]
+
+    parts = [(bodyV, bodyF)]
+
+    # The square plinth and finale stay closed shells of their own, touching
+    # the body's bottom and top faces; an n-gon caps each so that no vertex
+    # of theirs sits on the axis points of the base and capital.
+    if self.col_plinth: # platform (sub-base).
+        parts.append(uLathe(vertsPlinth, 4, fan=False))
 
     if self.col_finale: # structural "cover".
-        obj_360("Finale", vertsFinale, edgesFinale, scene)
+        parts.append(uLathe(vertsFinale, 4, fan=False))
 
-    # this is where the rubber meets the road... ;)
+    verts, faces = uMerge(parts)
+
+    uvs = None
+    if colFlutes != self.col_flutes:
+        uvs = col_flute_uvs(faces, shaftStart, ringLen, self.col_blocks + 1)
+
+    return verts, faces, uvs
+
+
+################################################################################
+#
+# Column mesh datablock for the operator settings.
+#
+def create_columnMesh(self):
+    verts, faces, uvs = create_columnGeom(self)
 
     mesh = bpy.data.meshes.new("Column")
-    mesh.from_pydata(verts, [], faces)
-    mesh.materials.append(uMatRGBSet('Col_mat',self.cMatRGB,matMod=True))
+    uMeshSet(mesh, verts, faces, uvs)
+
+    if uvs is None:
+        mesh.materials.append(uMatRGBSet('Col_mat',self.cMatRGB,matMod=True))
+    else:
+        img = column_normal_image(self)
+        mtl = uMatRGBSet('Col_mat_' + img.name,self.cMatRGB,matMod=True)
+        mesh.materials.append(uMatNormalSet(mtl, img))
+
+    return mesh
+
+
+################################################################################
+#
+# Level of detail.
+#
+#  A column can come with lower detail copies of its mesh; every mesh of the
+#   chain has the names of all of them in its "column_lods" property, and
+#   assign_column_lods() swaps each column object to the level that suits its
+#   size on screen.
+#  Only one level is used by an object at a time, so the chain meshes get a
+#   fake user to be saved with the file; free_column_lods() removes chains
+#   no object uses (an operator redo leaves the last one behind).
+#
+# @todo: more levels, or levels set by the user.
+#
+COLUMN_LODS = (
+    {}, # full detail, settings as given.
+    {'col_flutes': 0, 'col_faces': 16, 'base_faces': 2, 'cap_faces': 2}, # plain cylinder.
+    {'col_flutes': 0, 'col_faces': 8, 'base_faces': 1, 'cap_faces': 1}, # low-poly prism.
+    )
+
+# Projected height (fraction of the frame) below which each lower level is used.
+COLUMN_LOD_SIZES = (0.08, 0.02)
+
+
+class ColumnLOD:
+    '''
+   Operator settings with some of them replaced, for create_columnGeom().
+
+    Face counts are only ever lowered.
+    '''
+    def __init__(self, settings, overrides):
+        self.__dict__['settings'] = settings
+        self.__dict__['overrides'] = {}
+
+        for name, value in overrides.items():
+            if name != 'col_flutes':
+                value = min(value, getattr(settings, name))
+            self.overrides[name] = value
+
+    def __getattr__(self, name):
+        if name == 'properties':
+            return self
+        if name in self.overrides:
+            return self.overrides[name]
+        return getattr(self.settings, name)
+
+    def __setattr__(self, name, value): # validation resets stay local.
+        self.overrides[name] = value
 
-    mesh.update()
+
+def create_columnLODs(self):
+    '''
+   Column mesh and its lower detail copies, highest detail first.
+    '''
+    free_column_lods()
+
+    meshes = [create_columnMesh(ColumnLOD(self, level)) for level in COLUMN_LODS]
+
+    names = '|'.join(mesh.name for mesh in meshes)
+    for mesh in meshes:
+        mesh["column_lods"] = names
+        mesh.use_fake_user = True
+
+    return meshes
+
+
+def free_column_lods():
+    '''
+   Remove the LOD chains that no object uses any more.
+
+    Returns:
+        number of meshes removed.
+    '''
+    chains = collections.defaultdict(list)
+    for mesh in bpy.data.meshes:
+        if "column_lods" in mesh:
+            chains[mesh["column_lods"]].append(mesh)
+
+    removed = 0
+    for meshes in chains.values():
+        if any(mesh.users > mesh.use_fake_user for mesh in meshes):
+            continue
+        for mesh in meshes:
+            mesh.use_fake_user = False
+            bpy.data.meshes.remove(mesh)
+            removed += 1
+
+    return removed
+
+
+def assign_column_lods(scene, camera=None, sizes=COLUMN_LOD_SIZES):
+    '''
+   Give every column object the mesh level that suits its size on screen.
+
+    Params:
+        scene   scene to update.
+        camera  camera object, default is the scene camera.
+        sizes   projected heights (fraction of frame) to drop a level at.
+
+    Returns:
+        number of objects that changed mesh.
+    '''
+    camera = camera or scene.camera
+    if camera is None:
+        return 0
+
+    cols = [ob for ob in scene.objects if ob.type == 'MESH' and "column_lods" in ob.data]
+    if not cols:
+        return 0
+
+    locs = numpy.array([tuple(ob.matrix_world.translation) for ob in cols])
+    heights = numpy.array([max(ob.dimensions) for ob in cols])
+
+    dist = numpy.sqrt(((locs - tuple(camera.matrix_world.translation))**2).sum(axis=1))
+    view = 2 * numpy.tan(camera.data.angle / 2) # frame height at distance 1.
+    projected = heights / numpy.maximum(dist * view, 1e-9)
+
+    levels = numpy.zeros(len(cols), dtype=int)
+    for size in sizes:
+        levels += projected < size
+
+    changed = 0
+    for ob, level in zip(cols, levels.tolist()):
+        names = ob.data["column_lods"].split('|')
+        mesh = bpy.data.meshes.get(names[min(level, len(names)-1)])
+        if mesh is not None and ob.data != mesh:
+            ob.data = mesh
+            changed += 1
+
+    return changed
+
+
+################################################################################
+#
+def create_columnObj(self,context):
+    if self.col_lods:
+        mesh = create_columnLODs(self)[0]
+    else:
+        mesh = create_columnMesh(self)
+
+    scene = context.scene
+
+    # Deselect all objects.
+    bpy.ops.object.select_all(action='DESELECT')
+
+    # this is where the rubber meets the road... ;)
 
     ob_new = bpy.data.objects.new("Column", mesh)
     scene.objects.link(ob_new)
     scene.objects.active = ob_new
     ob_new.select = True
 
-    if self.col_base or self.col_cap or self.col_plinth or self.col_finale:
-        bpy.ops.object.join()
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.mesh.remove_doubles(threshold=0.0001)
-        bpy.ops.object.editmode_toggle()
-
     ob_new.location = tuple(context.scene.cursor_location)
 
 
@@ -1072,6 +1559,13 @@ class AddColumn(bpy.types.Operator):
     curStyle=Style
 
     cMatRGB=FloatVectorProperty(min=0,max=1,default=(0.5,0.5,0.5),subtype='COLOR',size=3)
+
+    col_lods = BoolProperty(name="LOD chain",
+        description="Also make lower detail meshes, swapped in by Column LODs.",
+        default = False)
+    col_bake = BoolProperty(name="Bake flutes",
+        description="Plain low-poly shaft, flutes drawn by a normal map.",
+        default = False)
 
 
     col_radius = FloatProperty(name="Radius",
@@ -1167,9 +1661,9 @@ class AddColumn(bpy.types.Operator):
          description="Column capital",
          default = True)
     cap_type = IntProperty(name="Type",
-        description="Type of capital to generate.",
+        description="Type of capital to generate; 21 Ionic, 22 Corinthian.",
         min=1,
-        max=20,
+        max=22,
         default=1)
     cap_faces = IntProperty(name="Faces",
         description="Number of faces per quadrant, 1 = square.",
@@ -1210,6 +1704,7 @@ class AddColumn(bpy.types.Operator):
 
         box=layout.box()
         box.prop(self,'cMatRGB',text='Color')
+        box.prop(self,'col_lods')
 
 #        box = layout.box()
 #        box.label(text='Column Sizing')
@@ -1226,6 +1721,7 @@ class AddColumn(bpy.types.Operator):
         if self.properties.col_flutes:
             box.prop(self, 'addendum')
             box.prop(self, 'flute_sides')
+            box.prop(self, 'col_bake')
 
 	#sub-base object - works as simple base too.
         box = layout.box()
@@ -1275,3 +1771,246 @@ class AddColumn(bpy.types.Operator):
         else:
             self.report({'WARNING'},"Option only valid in Object mode")
             return {'CANCELLED'}
+
+
+################################################################################
+#
+# Colonnade layouts.
+#
+#  Each returns an array of column positions (n x 3) relative to the
+#   colonnade origin, worked out for all columns at once.
+#
+def colonnadeRect(width, length, countX, countY):
+    '''
+   Columns around a rectangle centred on the origin, corners shared.
+
+    Params:
+        width   size along X.
+        length  size along Y.
+        countX  columns along each X side, corners included (min 2).
+        countY  columns along each Y side, corners included (min 2).
+    '''
+    countX = max(countX, 2)
+    countY = max(countY, 2)
+
+    workX = numpy.linspace(-width/2, width/2, countX)
+    workY = numpy.linspace(-length/2, length/2, countY)[1:-1] # corners are on the X sides.
+
+    posX = numpy.concatenate((workX, workX, numpy.full(len(workY), -width/2), numpy.full(len(workY), width/2)))
+    posY = numpy.concatenate((numpy.full(countX, -length/2), numpy.full(countX, length/2), workY, workY))
+
+    return numpy.column_stack((posX, posY, numpy.zeros(len(posX))))
+
+
+def colonnadeCircle(radius, count, startA=pi/2):
+    '''
+   Columns evenly spaced on a circle (tholos), none for count < 1.
+    '''
+    if count < 1:
+        return numpy.zeros((0, 3))
+
+    angles = startA + numpy.arange(count) * (2*pi/count)
+
+    return numpy.column_stack((radius*numpy.cos(angles), radius*numpy.sin(angles), numpy.zeros(count)))
+
+
+def colonnadePath(points, count=0, spacing=1.0, closed=False):
+    '''
+   Columns along a polyline, evenly spaced by length.
+
+    Params:
+        points   path points (n x 3).
+        count    number of columns, 0 to use spacing.
+        spacing  distance between columns when count is 0.
+        closed   path returns to its first point.
+    '''
+    points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+    if not len(points):
+        return numpy.zeros((0, 3))
+    if closed:
+        points = numpy.vstack((points, points[:1]))
+
+    segLen = numpy.sqrt(((points[1:] - points[:-1])**2).sum(axis=1))
+    pathLen = numpy.concatenate(([0.0], numpy.cumsum(segLen)))
+    total = pathLen[-1]
+
+    if count < 1:
+        count = int(total / spacing) + (not closed) if spacing > 0 else 1
+        count = max(count, 1)
+
+    if closed: # last column would sit on the first.
+        at = numpy.arange(count) * (total / count)
+    else:
+        at = numpy.linspace(0, total, count)
+
+    return numpy.column_stack([numpy.interp(at, pathLen, points[:, I]) for I in range(3)])
+
+
+################################################################################
+#
+# Place columns, all sharing one mesh.
+#
+def add_colonnade(context, mesh, positions, origin=(0,0,0), name="Column"):
+    '''
+   Link one object per position using mesh (linked duplicates).
+
+    Returns:
+        list of the new objects, left selected.
+    '''
+    scene = context.scene
+    positions = numpy.asarray(positions, dtype=float).reshape(-1, 3) + origin
+
+    cols = []
+    for pos in positions.tolist():
+        ob_new = bpy.data.objects.new(name, mesh)
+        ob_new.location = pos
+        scene.objects.link(ob_new)
+        ob_new.select = True
+        cols.append(ob_new)
+
+    if cols:
+        scene.objects.active = cols[0]
+
+    return cols
+
+
+################################################################################
+#
+# Add a colonnade; same settings as a column plus the layout.
+#
+class AddColonnade(AddColumn):
+
+    bl_idname = "mesh.add_colonnade"
+    bl_label = "Add Colonnade"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    layout_type = EnumProperty(items=(
+        ('RECT',"Rectangle","Peristyle around a rectangle"),
+        ('CIRCLE',"Circle","Ring of columns, tholos"),
+        ('CURVE',"Curve","Along the active curve object")
+        ),
+        name="Layout",description="Where the columns go.")
+
+    lay_width = FloatProperty(name="Width",
+        description="Rectangle size along X",
+        min=0.0,
+        max=1000.0,
+        default=6.0)
+    lay_length = FloatProperty(name="Length",
+        description="Rectangle size along Y",
+        min=0.0,
+        max=1000.0,
+        default=10.0)
+    lay_countX = IntProperty(name="Columns X",
+        description="Columns on each X side, corners included",
+        min=2,
+        max=500,
+        default=4)
+    lay_countY = IntProperty(name="Columns Y",
+        description="Columns on each Y side, corners included",
+        min=2,
+        max=500,
+        default=6)
+    lay_radius = FloatProperty(name="Radius",
+        description="Circle radius",
+        min=0.0,
+        max=1000.0,
+        default=4.0)
+    lay_count = IntProperty(name="Columns",
+        description="Number of columns on circle or curve, 0 uses spacing for curve",
+        min=0,
+        max=5000,
+        default=12)
+    lay_spacing = FloatProperty(name="Spacing",
+        description="Distance between columns along the curve",
+        min=0.01,
+        max=1000.0,
+        default=2.0)
+
+
+    def draw(self, context):
+        layout = self.layout
+
+        box = layout.box()
+        box.prop(self, 'layout_type')
+        if self.layout_type == 'RECT':
+            box.prop(self, 'lay_width')
+            box.prop(self, 'lay_length')
+            box.prop(self, 'lay_countX')
+            box.prop(self, 'lay_countY')
+        elif self.layout_type == 'CIRCLE':
+            box.prop(self, 'lay_radius')
+            box.prop(self, 'lay_count')
+        else:
+            box.prop(self, 'lay_count')
+            box.prop(self, 'lay_spacing')
+
+        AddColumn.draw(self, context)
+
+    ##########-##########-##########-##########
+
+    def execute(self, context):
+        if bpy.context.mode != "OBJECT":
+            self.report({'WARNING'},"Option only valid in Object mode")
+            return {'CANCELLED'}
+
+        if self.curStyle!=self.Style:
+            ColumnStyles(self,self.Style)
+            self.curStyle=self.Style
+
+        origin = tuple(context.scene.cursor_location)
+
+        if self.layout_type == 'RECT':
+            positions = colonnadeRect(self.lay_width, self.lay_length, self.lay_countX, self.lay_countY)
+        elif self.layout_type == 'CIRCLE':
+            positions = colonnadeCircle(self.lay_radius, self.lay_count)
+        else:
+            curveObj = context.active_object
+            if curveObj is None or curveObj.type != 'CURVE':
+                self.report({'WARNING'},"Select a curve object for the colonnade path")
+                return {'CANCELLED'}
+
+            # evaluated curve as a polyline, in world space.
+            pathMesh = curveObj.to_mesh(context.scene, True, 'PREVIEW')
+            points = [tuple(curveObj.matrix_world * v.co) for v in pathMesh.vertices]
+            bpy.data.meshes.remove(pathMesh)
+
+            closed = bool(curveObj.data.splines) and curveObj.data.splines[0].use_cyclic_u
+            positions = colonnadePath(points, self.lay_count, self.lay_spacing, closed)
+            origin = (0,0,0)
+
+        if not len(positions):
+            self.report({'WARNING'},"No columns to place")
+            return {'CANCELLED'}
+
+        # one column mesh for all of them.
+        if self.col_lods:
+            mesh = create_columnLODs(self)[0]
+        else:
+            mesh = create_columnMesh(self)
+
+        bpy.ops.object.select_all(action='DESELECT')
+        add_colonnade(context, mesh, positions, origin)
+
+        return {'FINISHED'}
+
+
+################################################################################
+#
+# Pick column levels of detail for the scene camera.
+#
+class ColumnLODs(bpy.types.Operator):
+
+    bl_idname = "object.column_lods"
+    bl_label = "Column LODs"
+    bl_description = "Swap columns made with a LOD chain to the detail level that suits the camera"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        if context.scene.camera is None:
+            self.report({'WARNING'},"Scene has no camera")
+            return {'CANCELLED'}
+
+        changed = assign_column_lods(context.scene)
+        self.report({'INFO'},"%d columns changed level" % changed)
+        return {'FINISHED'}
@@ -42,6 +42,32 @@ def uMatRGBSet(matName,RGBs,matMod=False,dShader='LAMBERT',dNtz=1.0):
     return mtl
 
 
+################################################################################
+#
+# Add a tangent space normal map (UV mapped) to a material, once.
+#
+def uMatNormalSet(mtl,img,nFactor=1.0):
+
+    for slot in mtl.texture_slots:
+        if slot and slot.texture and slot.texture.type=='IMAGE' and slot.texture.image==img:
+            return mtl
+
+    tex=bpy.data.textures.new(img.name,type='IMAGE')
+    tex.image=img
+    tex.use_normal_map=True
+    tex.use_mipmap=False
+
+    slot=mtl.texture_slots.add()
+    slot.texture=tex
+    slot.texture_coords='UV'
+    slot.use_map_color_diffuse=False
+    slot.use_map_normal=True
+    slot.normal_map_space='TANGENT'
+    slot.normal_factor=nFactor
+
+    return mtl
+
+
 ################################################################################
 #
 # Standard set of material colors - only used by Balcony.
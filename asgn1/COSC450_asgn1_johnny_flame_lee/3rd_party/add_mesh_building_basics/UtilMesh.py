@@ -0,0 +1,426 @@
+################################################################################
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This is free software; you may redistribute it, and/or modify it,
+# under the terms of the GNU General Public License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License (http://www.gnu.org/licenses/) for more details.
+#
+# ***** END GPL LICENSE BLOCK *****
+'''
+Utility routines for building mesh geometry as arrays.
+'''
+#
+# Geometry is kept as a numpy array of vertices (n x 3) and a list of face
+#  arrays, one array per face size (n x 3 triangles, n x 4 quads...), so it
+#  can be built, offset and merged without Python loops per vertex.
+#
+################################################################################
+
+import numpy
+from math import pi
+
+
+################################################################################
+#
+# Surface of revolution around the Z axis, replaces spinning a profile mesh.
+#
+def uLathe(profile, steps, startA=pi/2, weld=0.0001, capStart=True, capEnd=True, trimStart=0, trimEnd=0, fan=True):
+    '''
+   Turn a profile into a closed solid.
+
+    Params:
+        profile  list of points, last two values of each are radius and Z;
+                  [0, radius, z] as made by makeProfile works as is.
+        steps    number of segments around the axis, or an array with the
+                  angle of each segment, to match a ring made elsewhere.
+        startA   angle of the profile plane, default is the Y axis.
+        weld     distance under which points are merged.
+        capStart close the first end of the profile if it is on the axis.
+        capEnd   same for the last end.
+        trimStart points to leave off an open first end, after its axis
+                  point; where it meets a ring made elsewhere.
+        trimEnd  same for the last end.
+        fan      cap ends with triangles to a vertex on the axis, else with
+                  one face (a square for 4 steps) and no axis vertex.
+
+    Returns:
+        vertices (n x 3 array) and list of face arrays.
+
+    Points on the axis become a single vertex, repeated points are merged,
+     points on the axis in the middle of the profile (where profiles are
+     joined end to end) are dropped and so are spikes where the profile goes
+     out and straight back, so the result has no doubles.
+
+    Vertices follow the profile, a ring of steps vertices per point; an end
+     left open is the first (or last) ring, ready to be joined to more geometry.
+    '''
+    pts = []
+    for p in profile:
+        r, z = float(p[-2]), float(p[-1])
+        if abs(r) <= weld:
+            r = 0.0
+        pts.append((r, z))
+
+    # axis points only at the ends.
+    pts = [p for i, p in enumerate(pts) if p[0] or i == 0 or i == len(pts)-1]
+
+    def same(p1, p2):
+        return abs(p1[0]-p2[0]) <= weld and abs(p1[1]-p2[1]) <= weld
+
+    work = []
+    for p in pts:
+        if work and same(work[-1], p):
+            continue
+        if len(work) > 1 and same(work[-2], p): # back to where it was.
+            work.pop()
+            continue
+        work.append(p)
+    pts = work
+
+    # outward faces need the profile counter-clockwise in (radius, Z).
+    area = 0.0
+    for I in range(len(pts)):
+        r1, z1 = pts[I]
+        r2, z2 = pts[(I+1) % len(pts)]
+        area += r1*z2 - r2*z1
+
+    # open ends, after the winding is known from the whole profile.
+    if not capEnd:
+        if len(pts) > 1 and not pts[-1][0]:
+            pts.pop()
+        del pts[len(pts)-min(trimEnd, len(pts)-1):]
+    if not capStart:
+        if len(pts) > 1 and not pts[0][0]:
+            pts.pop(0)
+        del pts[:min(trimStart, len(pts)-1)]
+
+    if numpy.ndim(steps):
+        angles = numpy.asarray(steps, dtype=float).ravel()
+        steps = len(angles)
+    else:
+        angles = startA + numpy.arange(steps) * (2*pi/steps)
+    cosA = numpy.cos(angles)
+    sinA = numpy.sin(angles)
+
+    verts = []
+    rings = [] # vertex index (or indices) of each point.
+    count = 0
+    for r, z in pts:
+        if r:
+            verts.append(numpy.column_stack((r*cosA, r*sinA, numpy.full(steps, z))))
+            rings.append(numpy.arange(count, count+steps))
+            count += steps
+        elif fan:
+            verts.append(numpy.array([[0.0, 0.0, z]]))
+            rings.append(count)
+            count += 1
+        else:
+            rings.append(None)
+
+    quads = []
+    tris = []
+    caps = []
+    for I in range(len(pts)-1):
+        a = rings[I]
+        b = rings[I+1]
+        if a is None: # one face for the end.
+            caps.append(b[None, ::-1])
+        elif b is None:
+            caps.append(a[None, :])
+        elif numpy.ndim(a) and numpy.ndim(b):
+            quads.append(numpy.column_stack((a, numpy.roll(a, -1), numpy.roll(b, -1), b)))
+        elif numpy.ndim(b): # fan out from the axis.
+            tris.append(numpy.column_stack((numpy.full(steps, a), numpy.roll(b, -1), b)))
+        elif numpy.ndim(a): # fan in to the axis.
+            tris.append(numpy.column_stack((a, numpy.roll(a, -1), numpy.full(steps, b))))
+
+    faces = []
+    if quads:
+        faces.append(numpy.concatenate(quads))
+    if tris:
+        faces.append(numpy.concatenate(tris))
+    faces += caps
+
+    if area < 0:
+        faces = [fSet[:, ::-1] for fSet in faces]
+
+    if verts:
+        verts = numpy.concatenate(verts)
+    else:
+        verts = numpy.zeros((0, 3))
+
+    return verts, faces
+
+
+################################################################################
+#
+# Put several pieces of geometry into one set of arrays.
+#
+def uMerge(parts):
+    '''
+   Merge geometry.
+
+    Params:
+        parts  list of (vertices, list of face arrays).
+
+    Returns:
+        vertices and list of face arrays, one array per face size.
+    '''
+    verts = []
+    bySize = {}
+    count = 0
+    for pVerts, pFaces in parts:
+        verts.append(numpy.asarray(pVerts, dtype=float).reshape(-1, 3))
+        for fSet in pFaces:
+            fSet = numpy.asarray(fSet)
+            if len(fSet):
+                bySize.setdefault(fSet.shape[1], []).append(fSet + count)
+        count += len(verts[-1])
+
+    if verts:
+        verts = numpy.concatenate(verts)
+    else:
+        verts = numpy.zeros((0, 3))
+
+    return verts, [numpy.concatenate(bySize[n]) for n in sorted(bySize)]
+
+
+################################################################################
+#
+# Load geometry into an (empty) mesh datablock.
+#
+def uMeshSet(mesh, verts, faces, uvs=None):
+    '''
+   Fill mesh with vertices and faces in bulk.
+
+    Params:
+        mesh   new bpy mesh.
+        verts  vertices (n x 3).
+        faces  list of face arrays.
+        uvs    optional UV per face corner, list of (n x size x 2) arrays
+                matching faces; makes a UV map.
+    '''
+    verts = numpy.asarray(verts, dtype=numpy.float32).reshape(-1, 3)
+    faces = [numpy.asarray(fSet, dtype=numpy.int32) for fSet in faces if len(fSet)]
+
+    loops = numpy.concatenate([fSet.ravel() for fSet in faces]) if faces else numpy.zeros(0, numpy.int32)
+    totals = numpy.concatenate([numpy.full(len(fSet), fSet.shape[1], numpy.int32) for fSet in faces]) if faces else numpy.zeros(0, numpy.int32)
+    starts = (numpy.cumsum(totals) - totals).astype(numpy.int32)
+
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.ravel())
+
+    mesh.loops.add(len(loops))
+    mesh.loops.foreach_set("vertex_index", loops)
+
+    mesh.polygons.add(len(totals))
+    mesh.polygons.foreach_set("loop_start", starts)
+    mesh.polygons.foreach_set("loop_total", totals)
+
+    if uvs is not None:
+        uvs = [numpy.asarray(uSet, dtype=numpy.float32) for uSet in uvs if len(uSet)]
+        mesh.uv_textures.new()
+        mesh.uv_layers[-1].data.foreach_set("uv", numpy.concatenate([uSet.ravel() for uSet in uvs]))
+
+    mesh.update(calc_edges=True)
+
+
+################################################################################
+#
+# Faces between two rows of vertices, the array version of createFaces.
+#
+def uBridge(vertIdx1, vertIdx2, vertLoop=True, flipped=False):
+    '''
+   Connect two vertex index rows with faces.
+
+    Params:
+        vertIdx1  first row of vertex indices, a single index for a fan.
+        vertIdx2  second row, at least 2 indices.
+        vertLoop  close the loop with a face from the last to the first.
+        flipped   reverse the winding (normals).
+
+    Returns:
+        faces (n x 4 array, n x 3 for a fan); None for invalid rows.
+
+    The closing face comes first, then the faces in row order, the same
+     faces and order createFaces always gave.
+    '''
+    vertIdx1 = numpy.asarray(vertIdx1, dtype=int).ravel()
+    vertIdx2 = numpy.asarray(vertIdx2, dtype=int).ravel()
+
+    if not len(vertIdx1) or len(vertIdx2) < 2:
+        return None
+
+    # rows must match if not fan/star effect.
+    fanFaces = len(vertIdx1) != len(vertIdx2)
+    if fanFaces and len(vertIdx1) != 1:
+        return None
+
+    num = numpy.arange(len(vertIdx2) - 1)
+    lo2 = vertIdx2[num]
+    hi2 = vertIdx2[num + 1]
+    if fanFaces:
+        lo1 = numpy.full(len(num), vertIdx1[0])
+    else:
+        lo1 = vertIdx1[num]
+        hi1 = vertIdx1[num + 1]
+
+    if flipped:
+        close = [vertIdx1[0], vertIdx2[0], vertIdx2[-1], vertIdx1[-1]]
+        cols = [lo2, lo1, hi2] if fanFaces else [lo2, lo1, hi1, hi2]
+    else:
+        close = [vertIdx2[0], vertIdx1[0], vertIdx1[-1], vertIdx2[-1]]
+        cols = [lo1, lo2, hi2] if fanFaces else [lo1, lo2, hi2, hi1]
+
+    # a fan has no second point on the first row.
+    if fanFaces:
+        close.pop(3 if flipped else 2)
+
+    faces = numpy.column_stack(cols)
+    if vertLoop:
+        faces = numpy.concatenate(([close], faces))
+
+    return faces
+
+
+################################################################################
+#
+# Triangles between two closed rings of any sizes.
+#
+def uSeam(verts, vertIdx1, vertIdx2):
+    '''
+   Connect two closed rings around the Z axis with triangles.
+
+    Params:
+        verts     vertices (n x 3), for where each ring vertex is.
+        vertIdx1  first ring, vertex indices counter-clockwise about Z.
+        vertIdx2  second ring, the same way round; any size.
+
+    Returns:
+        faces (n x 3 array), one per vertex of the two rings (none for a
+         ring of one vertex, that is a fan), wound like uBridge(vertIdx1,
+         vertIdx2) would wind quads; None for an empty ring.
+
+    The rings are walked together, each step moves to the next vertex of
+     whichever ring comes first (see uRingAt), so any two ring sizes match.
+    '''
+    vertIdx1 = numpy.asarray(vertIdx1, dtype=int).ravel()
+    vertIdx2 = numpy.asarray(vertIdx2, dtype=int).ravel()
+    verts = numpy.asarray(verts, dtype=float)
+
+    if not len(vertIdx1) or not len(vertIdx2) or len(vertIdx1) + len(vertIdx2) < 3:
+        return None
+
+    # around from the first vertex of ring 1, ring 2 starts at its first after that.
+    at1 = uRingAt(verts[vertIdx1])
+    at2 = uRingAt(verts[vertIdx2])
+    turn = numpy.arctan2(verts[[vertIdx1[0], vertIdx2[0]], 1], verts[[vertIdx1[0], vertIdx2[0]], 0])
+    at2 = numpy.mod(at2 + turn[1] - turn[0], 2*pi)
+
+    first = numpy.argmin(at2)
+    vertIdx2 = numpy.roll(vertIdx2, -first)
+    at2 = numpy.roll(at2, -first)
+
+    # next place on each ring, ending back at its first vertex; a single
+    # vertex ring never moves.
+    next1 = numpy.append(at1[1:], at1[0] + 2*pi)[:len(vertIdx1) - (len(vertIdx1) == 1)]
+    next2 = numpy.append(at2[1:], at2[0] + 2*pi)[:len(vertIdx2) - (len(vertIdx2) == 1)]
+
+    order = numpy.argsort(numpy.concatenate((next1, next2)), kind='stable')
+    step1 = order < len(next1) # moving along ring 1 at this step?
+
+    # position on each ring before each step.
+    pos1 = numpy.cumsum(step1) - step1
+    pos2 = numpy.cumsum(~step1) - ~step1
+
+    cur1 = vertIdx1[pos1 % len(vertIdx1)]
+    cur2 = vertIdx2[pos2 % len(vertIdx2)]
+    new1 = vertIdx1[(pos1 + 1) % len(vertIdx1)]
+    new2 = vertIdx2[(pos2 + 1) % len(vertIdx2)]
+
+    return numpy.column_stack((cur1, cur2, numpy.where(step1, new1, new2)))
+
+
+def uRingAt(ring):
+    '''
+   How far round the Z axis each vertex of a closed ring is, from the first.
+
+    Params:
+        ring  ring vertices (n x 3), counter-clockwise about Z.
+
+    Returns:
+        increasing array from 0, below 2*pi: the angles, or for a ring that
+         turns back on itself (or doesn't go once round) the length along it
+         scaled to a full turn.
+    '''
+    ring = numpy.asarray(ring, dtype=float)
+    if len(ring) < 2:
+        return numpy.zeros(len(ring))
+
+    angles = numpy.arctan2(ring[:, 1], ring[:, 0])
+    gaps = numpy.mod(numpy.roll(angles, -1) - angles, 2*pi)
+
+    if (gaps <= 0.000001).any() or round(gaps.sum() / (2*pi)) != 1:
+        gaps = numpy.hypot(*(numpy.roll(ring[:, :2], -1, axis=0) - ring[:, :2]).T)
+        gaps *= 2*pi / max(gaps.sum(), 1e-12)
+
+    return numpy.cumsum(gaps) - gaps
+
+
+################################################################################
+#
+# Bend flat wall geometry, in place, like the Blockwall "Curve" and "Round"
+#  options; for domes, drums and towers made of blocks.
+#
+def uCurve(verts, height):
+    '''
+   Curve a wall back over the top, in place.
+
+    Params:
+        verts   vertices (n x 3) float array, changed in place.
+        height  wall height; the wall turns a quarter turn about the X axis
+                 from z 0 to z == height, at radius height + y.
+
+    Returns:
+        verts.
+
+    The wall depth (y) is added to the radius, so y is out from the center.
+    '''
+    angle = verts[:, 2] * (pi / (height * 2))
+    radius = verts[:, 1] + height
+
+    numpy.cos(angle, out=verts[:, 1])
+    verts[:, 1] *= radius
+    numpy.sin(angle, out=verts[:, 2])
+    verts[:, 2] *= radius
+
+    return verts
+
+
+def uRound(verts):
+    '''
+   Wrap a wall around the Z axis, in place.
+
+    Params:
+        verts  vertices (n x 3) float array, changed in place; x is the
+                angle (radians), z the radius and y becomes the height.
+
+    Returns:
+        verts.
+
+    A flat wall becomes a disc, after uCurve a dome.
+    '''
+    angle = verts[:, 0].copy()
+    height = verts[:, 1].copy()
+
+    numpy.cos(angle, out=verts[:, 0])
+    verts[:, 0] *= verts[:, 2]
+    numpy.sin(angle, out=verts[:, 1])
+    verts[:, 1] *= verts[:, 2]
+    verts[:, 2] = height
+
+    return verts
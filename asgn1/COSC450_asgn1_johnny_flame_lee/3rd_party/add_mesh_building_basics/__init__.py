@@ -70,6 +70,7 @@ class buildingbasicsMenu(bpy.types.Menu):
         layout.operator("mesh.add_balcony",text="Balcony",icon="COLLAPSEMENU")
         layout.operator("mesh.add_beam",text="Beams",icon="MESH_CUBE")
         layout.operator("mesh.add_wall",text="Block Wall",icon="MOD_BUILD")
+        layout.operator("mesh.add_colonnade",text="Colonnade",icon="MESH_CYLINDER")
         layout.operator("mesh.add_column",text="Column",icon="MESH_CYLINDER")
         layout.operator("mesh.add_doorway",text="Doorway",icon="MOD_LATTICE")
 
@@ -0,0 +1,766 @@
+import random
+import collections
+from math import sin, cos, pi
+
+
+# Plain vertex/face generators for the pieces a temple is made of.
+# Nothing in here touches bpy, the lists can be loaded into a mesh
+# datablock directly (see Meshes.py) or inspected outside Blender.
+#
+# The unit primitives match the ones bpy.ops.mesh.primitive_*_add makes,
+# so an object built from them and scaled the same way looks identical.
+#
+# plan_temple() and build_temple() are the whole temple generator: the first
+# makes every random decision and works out the sizes, the second turns that
+# into meshes and placed parts. Temple.py only links the result into a scene.
+
+
+
+
+def cube():
+    """2x2x2 cube centred on the origin, same vertex order as primitive_cube_add"""
+
+    verts = [(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)]
+
+    faces = [(0, 1, 3, 2),
+             (2, 3, 7, 6),
+             (6, 7, 5, 4),
+             (4, 5, 1, 0),
+             (2, 6, 4, 0),
+             (7, 3, 1, 5)]
+
+    return verts, faces
+
+
+
+def plane():
+    """2x2 plane on the xy plane, same vertex order as primitive_plane_add"""
+
+    verts = [(-1, -1, 0), (1, -1, 0), (-1, 1, 0), (1, 1, 0)]
+    faces = [(0, 1, 3, 2)]
+
+    return verts, faces
+
+
+
+def cylinder(segments=32):
+    """Radius 1, depth 2 cylinder with n-gon caps, like primitive_cylinder_add"""
+
+    verts = []
+    faces = []
+
+    # Bottom and top vertex of each segment are stored next to each other.
+    for s in range(segments):
+        phi = 2 * pi * s / segments
+        verts.append((sin(phi), cos(phi), -1))
+        verts.append((sin(phi), cos(phi), 1))
+
+    for s in range(segments):
+        n = (s + 1) % segments
+        faces.append((2 * s, 2 * s + 1, 2 * n + 1, 2 * n))
+
+    faces.append(tuple(2 * s for s in range(segments)))
+    faces.append(tuple(2 * s + 1 for s in reversed(range(segments))))
+
+    return verts, faces
+
+
+
+def uv_sphere(segments=32, rings=16):
+    """Radius 1 sphere with poles on the z axis, like primitive_uv_sphere_add"""
+
+    verts = [(0, 0, -1)]
+    faces = []
+
+    for r in range(1, rings):
+        theta = pi * r / rings
+        for s in range(segments):
+            phi = 2 * pi * s / segments
+            verts.append((sin(theta) * cos(phi), sin(theta) * sin(phi), -cos(theta)))
+
+    verts.append((0, 0, 1))
+    top = len(verts) - 1
+
+    # Triangle fans at the poles, quads everywhere else.
+    for s in range(segments):
+        n = (s + 1) % segments
+        faces.append((0, 1 + n, 1 + s))
+
+    for r in range(rings - 2):
+        row = 1 + r * segments
+        for s in range(segments):
+            n = (s + 1) % segments
+            faces.append((row + s, row + n, row + segments + n, row + segments + s))
+
+    row = 1 + (rings - 2) * segments
+    for s in range(segments):
+        n = (s + 1) % segments
+        faces.append((row + s, row + n, top))
+
+    return verts, faces
+
+
+
+def gable_roof(width=1.0, length=1.0, height=1.0, overhang=0.0, pediment=0.0):
+    """Gable roof centred on the origin, ridge along y at the top
+
+    width, length and height are half-extents like a scaled cube, so with the
+    defaults this is the 2x2x2 prism a cube turns into when its top edges are
+    merged towards x = 0. overhang pushes the eaves and the gable ends out by
+    that much. pediment sets the triangle at each gable end back into the roof
+    by that depth, leaving a frame a fifth of the way in from its edges."""
+
+    w = width + overhang
+    l = length + overhang
+    h = height
+
+    # Gable end triangle in (x, z), base corners then the ridge.
+    triangle = [(-w, -h), (w, -h), (0, h)]
+
+    if pediment <= 0:
+        verts = [(x, y, z) for y in (-l, l) for x, z in triangle]
+        faces = [(0, 3, 4, 1),
+                 (0, 2, 5, 3),
+                 (1, 4, 5, 2),
+                 (0, 1, 2),
+                 (3, 5, 4)]
+        return verts, faces
+
+    # The set back triangle is the end triangle shrunk about its incentre,
+    # so the frame around it is the same width on all three sides.
+    side = (w * w + 4 * h * h) ** 0.5
+    centre = h * (w - side) / (w + side)
+    inner = [(x * 0.8, centre + (z - centre) * 0.8) for x, z in triangle]
+
+    verts = []
+    faces = []
+
+    # Per end: outer triangle 0-2, inner triangle on the end face 3-5 and
+    # the same inner triangle pushed back by pediment 6-8.
+    for end, y in ((0, -l), (1, l)):
+        inward = pediment if y < 0 else -pediment
+        verts += [(x, y, z) for x, z in triangle]
+        verts += [(x, y, z) for x, z in inner]
+        verts += [(x, y + inward, z) for x, z in inner]
+
+    for end in (0, 1):
+        o = 9 * end
+        ring = [((o + i, o + (i + 1) % 3), (o + 3 + i, o + 3 + (i + 1) % 3), (o + 6 + i, o + 6 + (i + 1) % 3)) for i in range(3)]
+
+        for (a, b), (c, d), (e, f) in ring:
+            frame = (a, b, d, c)
+            wall = (c, d, f, e)
+            # The -y end faces -y, the +y end is the same with the winding flipped.
+            if end:
+                frame = frame[::-1]
+                wall = wall[::-1]
+            faces.append(frame)
+            faces.append(wall)
+
+        back = (o + 6, o + 7, o + 8)
+        faces.append(back[::-1] if end else back)
+
+    faces += [(0, 9, 10, 1),
+              (0, 2, 11, 9),
+              (1, 10, 11, 2)]
+
+    return verts, faces
+
+
+
+def stairs(steps, rise, depth, width=1.0):
+    """Solid flight of steps climbing along +y from the origin, centred on x"""
+
+    # Side profile in (y, z), bottom front corner first, then up each step.
+    profile = [(0, 0)]
+    for s in range(steps):
+        profile.append((s * depth, (s + 1) * rise))
+        profile.append(((s + 1) * depth, (s + 1) * rise))
+    profile.append((steps * depth, 0))
+
+    n = len(profile)
+    half = width / 2
+
+    verts = [(-half, y, z) for y, z in profile] + [(half, y, z) for y, z in profile]
+    faces = [tuple(range(n)), tuple(range(2 * n - 1, n - 1, -1))]
+
+    for i in range(n):
+        j = (i + 1) % n
+        faces.append((i, n + i, n + j, j))
+
+    return verts, faces
+
+
+
+def box_minus_box(cut_location, cut_size):
+    """2x2x2 cube centred on the origin with an axis aligned box taken out of it
+
+    The box to remove is given by its centre and half-extents in the cube's
+    own space and may stick out of the cube. The cube is split on the planes
+    of the box into at most 3x3x3 cells, the cells inside the box are dropped
+    and the faces of the rest that are not shared with a kept cell are the
+    surface, so the result is closed and every face a grid rectangle."""
+
+    # Grid lines along each axis: the cube's sides and the box sides inside it.
+    lines = []
+    for axis in range(3):
+        coords = [-1.0, 1.0]
+        for side in (-1, 1):
+            c = cut_location[axis] + side * cut_size[axis]
+            if -1.0 < c < 1.0:
+                coords.append(c)
+        lines.append(sorted(set(coords)))
+
+    def inside_cut(cell):
+        for axis in range(3):
+            lo, hi = lines[axis][cell[axis]], lines[axis][cell[axis] + 1]
+            middle = (lo + hi) / 2
+            if abs(middle - cut_location[axis]) >= cut_size[axis]:
+                return False
+        return True
+
+    shape = [len(coords) - 1 for coords in lines]
+    solid = set()
+    for i in range(shape[0]):
+        for j in range(shape[1]):
+            for k in range(shape[2]):
+                if not inside_cut((i, j, k)):
+                    solid.add((i, j, k))
+
+    verts = []
+    index = {}
+
+    def vert(point):
+        if point not in index:
+            index[point] = len(verts)
+            verts.append(tuple(lines[axis][point[axis]] for axis in range(3)))
+        return index[point]
+
+    faces = []
+    for cell in sorted(solid):
+        for axis in range(3):
+            b = (axis + 1) % 3
+            c = (axis + 2) % 3
+
+            for side in (0, 1):
+                neighbour = list(cell)
+                neighbour[axis] += 1 if side else -1
+                if tuple(neighbour) in solid:
+                    continue
+
+                # Corners of the cell face, counter-clockwise seen from outside.
+                corners = []
+                for db, dc in ((0, 0), (1, 0), (1, 1), (0, 1)):
+                    point = list(cell)
+                    point[axis] += side
+                    point[b] += db
+                    point[c] += dc
+                    corners.append(vert(tuple(point)))
+
+                if not side:
+                    corners.reverse()
+                faces.append(tuple(corners))
+
+    return verts, faces
+
+
+
+def local_box(location, scale, box_location, box_size):
+    """A box given in world space, in the space of a unit primitive placed at
+    location with the given scale"""
+
+    return (tuple((box_location[i] - location[i]) / scale[i] for i in range(3)),
+            tuple(box_size[i] / scale[i] for i in range(3)))
+
+
+
+
+################################################################################
+# The temple itself.
+
+# Material ids used by the parts, Temple.py makes one material for each.
+MATERIALS = ('podium', 'stair', 'temple', 'roof', 'dome', 'dome_roof', 'column')
+
+
+# One object in the temple: which mesh it uses and where it goes.
+# Parts with the same mesh name share one mesh datablock.
+Part = collections.namedtuple('Part', 'name mesh location scale rotation material')
+
+
+
+class TempleModel:
+    """A temple as plain data
+
+    meshes      mesh name -> (verts, faces) in object space
+    primitives  mesh name -> unit primitive it was made from ('cube', ...)
+    parts       list of Part
+    plan        the plan_temple() dictionary this was built from
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.meshes = {}
+        self.primitives = {}
+        self.parts = []
+
+
+    def add_mesh(self, name, geometry, primitive=None):
+        self.meshes[name] = geometry
+        if primitive is not None:
+            self.primitives[name] = primitive
+
+
+    def add_part(self, name, mesh, location, scale=(1, 1, 1), rotation=0.0, material=None):
+        self.parts.append(Part(name, mesh, tuple(location), tuple(scale), rotation, material))
+
+
+    def flatten(self):
+        """All parts in world space: verts, faces and a material index per face"""
+
+        verts = []
+        faces = []
+        materials = []
+
+        for part in self.parts:
+            mesh_verts, mesh_faces = self.meshes[part.mesh]
+            c = cos(part.rotation)
+            s = sin(part.rotation)
+            offset = len(verts)
+
+            for x, y, z in mesh_verts:
+                x *= part.scale[0]
+                y *= part.scale[1]
+                z *= part.scale[2]
+                verts.append((part.location[0] + c * x - s * y,
+                              part.location[1] + s * x + c * y,
+                              part.location[2] + z))
+
+            material = MATERIALS.index(part.material)
+            for face in mesh_faces:
+                faces.append(tuple(i + offset for i in face))
+                materials.append(material)
+
+        return verts, faces, materials
+
+
+
+def colonnade_rect(x0, y0, x1, y1, countX, countY):
+    """Column positions around the rectangle (x0, y0) - (x1, y1), countX along
+    each side parallel to x and countY along each side parallel to y, with
+    the corner columns shared. Same layout as Column.colonnadeRect()."""
+
+    xs = [x0 + (x1 - x0) * i / (countX - 1) for i in range(countX)]
+    ys = [y0 + (y1 - y0) * j / (countY - 1) for j in range(1, countY - 1)]
+
+    return ([(x, y0) for x in xs] + [(x, y1) for x in xs] +
+            [(x0, y) for y in ys] + [(x1, y) for y in ys])
+
+
+
+def temple_colour(rng=random):
+    """Random stone colour. The spread between R, G and B is no larger than 20%,
+    giving the building a mild look and avoiding any extreme colours."""
+
+    red = rng.uniform(0.4,0.7)
+
+    # A boolean flag is used each time to determine whether to subtract or add to the previous colour.
+    if bool(rng.getrandbits(1)):
+        green = red + red * rng.uniform(0,0.18)
+    else:
+        green = red - red * rng.uniform(0,0.18)
+
+    if bool(rng.getrandbits(1)):
+        blue = green + green * rng.uniform(0,0.18)
+    else:
+        blue = green - green * rng.uniform(0,0.18)
+
+    return (red,green,blue)
+
+
+
+def plan_temple(xSize,ySize,height,rng=random,colour=None,pediment=False):
+    """Make all the random choices for a temple and work out the size and place
+    of each component. Returns a dictionary, see build_temple().
+
+    colour fixes the stone colour instead of drawing a random one. pediment
+    sets the gable ends of the roof back by a random depth, without it the
+    roof is the plain prism temples have always had."""
+
+    p = {}
+
+    if colour is None:
+        colour = temple_colour(rng)
+    p['colour'] = colour
+
+    # Boolean flags with default values, chages with input dimensions.
+    has_dome = False
+    p['use_library'] = False
+    p['is_fluted'] = False
+
+    p['cap_height'] = rng.uniform(0.1,0.5)
+    p['cap_style'] = rng.randint(0,20)
+    p['flute_num'] = 8
+
+    p['col_faces'] = rng.randint(20,40)
+    p['addendum_factor'] = rng.uniform(0,0.3)
+
+    # 25% chance that the temple will have a flat roof
+    p['flat_top'] = rng.uniform(0,1) < 0.25
+
+    columns_per_shortedge = rng.choice([2,4,6])
+    columns_per_longedge = rng.randint(4,8)
+
+    box_width = xSize
+    box_length = ySize
+    box_height = height
+
+    #NOTE: 1:1:0.7 seems to work quite well for a ratio
+    if box_length/box_width >=1.5:
+        columns_per_longedge = rng.randint(6,15)
+
+    p['columns_per_shortedge'] = columns_per_shortedge
+    p['columns_per_longedge'] = columns_per_longedge
+
+    podium_x = box_width * 0.5
+    podium_y = box_length * 0.5
+
+    MAX_PODIUM_WIDTH = box_width * 0.5
+    MAX_PODIUM_LENGTH = box_length * 0.5
+
+    MAX_BUILDING_HEIGHT = box_height * 0.5
+    available_height = MAX_BUILDING_HEIGHT
+
+    podium_width = MAX_PODIUM_WIDTH * rng.uniform(0.35,0.65)
+    podium_length = MAX_PODIUM_LENGTH
+
+    podium_height = available_height * rng.uniform(0.05,0.20)
+    available_height -= podium_height
+
+    #Decision making for dome using random number
+    dome_generator = rng.uniform(0,1)
+
+    # If the length of the input is drastically greater than width,dome is very likely.
+    if box_length/box_width >= 1.5 and box_length/box_width <= 2:
+        if dome_generator > 0.3:
+            has_dome = True
+
+    p['has_dome'] = has_dome
+    p['side_stairs'] = []
+
+    # If the building has a dome, a new list of parameters are needed to make it look sensible.
+    if has_dome:
+        length_factor = rng.uniform(0.43,0.63)
+
+        podium_width = MAX_PODIUM_WIDTH * rng.uniform(0.35,0.8)
+        podium_length = MAX_PODIUM_LENGTH * length_factor
+
+        podium_x = box_width * 0.5
+        podium_y = box_length * 0.5 + MAX_PODIUM_LENGTH * (1-length_factor)
+
+        # Dome Parameters
+        dome_body_height = MAX_BUILDING_HEIGHT * 0.77
+        dome_body_radius = MAX_PODIUM_WIDTH
+
+        p['dome'] = {'location': (podium_x, MAX_PODIUM_LENGTH - (MAX_PODIUM_LENGTH-dome_body_radius), dome_body_height),
+                     'height': dome_body_height,
+                     'radius': dome_body_radius}
+
+        #determines the ratio of the rest of the temple to dome
+        available_height *= rng.uniform(0.5,0.8)
+
+    else:
+        podium_width = MAX_PODIUM_WIDTH * rng.uniform(0.5,0.8)
+
+        side_stair_width = podium_length * 0.44
+        side_stair_length = (MAX_PODIUM_WIDTH -podium_width) * 2
+        side_stair_height = podium_height * 2
+
+        side_stair_locY = MAX_PODIUM_LENGTH * 2 -  (MAX_PODIUM_LENGTH -side_stair_width)/1.8
+        side_stair_locZ = side_stair_height
+
+        # Side stairs go on the left (x = box width, facing -x), the right (x = 0), both or neither.
+        stair_generator = rng.uniform(0,1)
+        sides = []
+
+        if stair_generator < 0.33 :
+            side_stair_length *= 0.5
+            sides = [True, False]
+        elif stair_generator >= 0.33 and stair_generator < 0.66:
+            podium_x = podium_x + (MAX_PODIUM_WIDTH - podium_width)
+            sides = [False]
+        elif stair_generator >= 0.66 and stair_generator < 0.95:
+            podium_x = podium_x - (MAX_PODIUM_WIDTH - podium_width)
+            sides = [True]
+        else:
+            podium_width = MAX_PODIUM_WIDTH
+
+        for left_side in sides:
+            p['side_stairs'].append({'location': (box_width if left_side else 0.0, side_stair_locY, side_stair_locZ),
+                                     'width': side_stair_width,
+                                     'length': side_stair_length,
+                                     'height': side_stair_height,
+                                     'left_side': left_side,
+                                     'steps': rng.randint(4,8)})
+
+    # Calculate the size of the column base, using a nested min function to eliminated edge cases.
+    column_base_size = min((podium_width/8),min(podium_width/(columns_per_shortedge * 2),podium_length/(columns_per_longedge * 2)))
+
+    column_base_height = podium_height / 10
+    available_height -= column_base_height
+
+    #paramized according to building height
+    column_pillar_height = available_height * rng.uniform(0.60,0.85)
+    available_height -= column_pillar_height
+
+    top_height = available_height * rng.uniform(0.1,0.5)
+    available_height -=top_height
+
+    roof_base_height = available_height * rng.uniform(0.1,0.5)
+    available_height -=roof_base_height
+
+    p['podium'] = {'x': podium_x, 'y': podium_y,
+                   'width': podium_width, 'length': podium_length, 'height': podium_height}
+
+    p['column_base_size'] = column_base_size
+    p['column_base_height'] = column_base_height
+    p['column_pillar_height'] = column_pillar_height
+
+    p['top_height'] = top_height
+    p['roof_base_height'] = roof_base_height
+    p['roof_height'] = available_height
+
+    p['stair_steps'] = rng.randint(4,9)
+
+    # Gable roof details, as fractions of the roof's half width and half length.
+    p['roof_overhang'] = 0.0
+    p['pediment_depth'] = rng.uniform(0.0,0.08) if pediment else 0.0
+
+    return p
+
+
+
+def build_temple(p):
+    """Geometry for a plan_temple() plan, as a TempleModel"""
+
+    model = TempleModel(p)
+
+    podium_x = p['podium']['x']
+    podium_y = p['podium']['y']
+    podium_width = p['podium']['width']
+    podium_length = p['podium']['length']
+    podium_height = p['podium']['height']
+
+    columns_per_shortedge = p['columns_per_shortedge']
+    columns_per_longedge = p['columns_per_longedge']
+
+    column_base_size = p['column_base_size']
+    column_base_height = p['column_base_height']
+    column_base_edge = column_base_size / 4.0
+
+    column_pillar_height = p['column_pillar_height']
+    column_pillar_radius = column_base_size * 0.9
+
+    temple_body_width = podium_width * 0.90
+    temple_body_length = podium_length * 0.5
+    temple_body_height = column_pillar_height + column_base_height
+
+    top_width = temple_body_width * 1.1
+    top_length = podium_length * 0.75
+    top_height = p['top_height']
+
+    roof_base_height = p['roof_base_height']
+    roof_width = podium_width * 1.1
+    roof_length = top_length * 1.1
+    roof_height = p['roof_height']
+
+    # Every box and cylinder is a unit primitive scaled by the part.
+    for name in ('top', 'roofbase', 'column_base'):
+        model.add_mesh(name, cube(), 'cube')
+    model.add_mesh('column_pillar', cylinder(), 'cylinder')
+
+    # A gable roof is built at its full size, so its part isn't scaled.
+    if p['flat_top']:
+        model.add_mesh('roof', cube(), 'cube')
+        roof_scale = (roof_width,roof_length,roof_height)
+    else:
+        model.add_mesh('roof', gable_roof(roof_width, roof_length, roof_height,
+                                          p['roof_overhang'] * roof_width, p['pediment_depth'] * roof_length))
+        roof_scale = (1,1,1)
+
+    # The podium has the notch for the front stairs built in.
+    podium_location = (podium_x,podium_y,podium_height)
+    podium_scale = (podium_width,podium_length,podium_height)
+
+    stair_length = podium_length * 0.25 - column_base_size
+    stair_width = podium_width * 0.31
+    stair_height = podium_height
+
+    notch = local_box(podium_location, podium_scale, (podium_x,podium_y + podium_length,podium_height),
+                      (stair_width,(stair_length * 2) - column_base_size,stair_height*2))
+    model.add_mesh('podium', box_minus_box(*notch))
+    model.add_part("Podium", 'podium', podium_location, podium_scale, material='podium')
+
+    # And the body has the doorway through its front.
+    temple_body_location = (podium_x, podium_y - podium_length/2 + column_pillar_radius, 2 * podium_height + temple_body_height)
+    temple_body_scale = (temple_body_width,temple_body_length,temple_body_height)
+
+    door_width = temple_body_width * 0.5
+    door_length = temple_body_length * 0.1
+    door_height = temple_body_height * 0.8
+
+    door = local_box(temple_body_location, temple_body_scale, (podium_x, podium_y + door_length * 0.5, 2 * podium_height + door_height),
+                     (door_width, door_length*1.4, door_height*1.1))
+    model.add_mesh('temple_body', box_minus_box(*door))
+    model.add_part("temple_body", 'temple_body', temple_body_location, temple_body_scale, material='temple')
+
+    top_y = podium_y - podium_length/4 + column_pillar_radius
+    top_z = 2 * podium_height + 2*column_base_height + 2*column_pillar_height + top_height
+    model.add_part("Top", 'top', (podium_x,top_y,top_z), (top_width,top_length,top_height), material='temple')
+
+    roof_base_z = top_z + top_height + roof_base_height
+    model.add_part("roofbase", 'roofbase', (podium_x,top_y,roof_base_z),
+                   (roof_width,roof_length,roof_base_height), material='temple')
+
+    roof_z = roof_base_z + roof_base_height + roof_height
+    model.add_part("Roof", 'roof', (podium_x,top_y,roof_z), roof_scale, material='roof')
+
+    # Placing the column base tiles and the columns.
+    base_z_location = 2 * podium_height + column_base_height
+    column_z_location = 2 * podium_height + 2 * column_base_height + column_pillar_height
+
+    base_scale = (column_base_size,column_base_size,column_base_height)
+    pillar_scale = (column_pillar_radius,column_pillar_radius,column_pillar_height)
+
+    x_offset = podium_width - column_base_size -column_base_edge
+
+    front = podium_y + podium_length/2.0
+    back = podium_y - (podium_length - column_base_size - column_base_edge)
+
+    for x, y in colonnade_rect(podium_x - x_offset, back, podium_x + x_offset, front,
+                               columns_per_shortedge, columns_per_longedge):
+        model.add_part("Column_base", 'column_base', (x, y, base_z_location), base_scale, material='column')
+        model.add_part("Column_pillar", 'column_pillar', (x, y, column_z_location), pillar_scale, material='column')
+
+    # The 'dome' part of the building, as seen in Pantheon.
+    if p['has_dome']:
+        dome = p['dome']
+        locX, locY, locZ = dome['location']
+
+        model.add_mesh('dome', cylinder(), 'cylinder')
+        model.add_mesh('dome_roof', uv_sphere(), 'uv_sphere')
+
+        model.add_part("Dome", 'dome', dome['location'], (dome['radius'],dome['radius'],dome['height']), material='dome')
+
+        dome_radius = dome['radius'] * 0.95
+        dome_height = dome['height'] * 0.9
+        model.add_part("Dome_Roof", 'dome_roof', (locX,locY,locZ + 0.8 * dome_height),
+                       (dome_radius,dome_radius,dome_height), material='dome_roof')
+
+    # Front stairs, set into the notch in the podium.
+    stair_locX = podium_x
+    stair_locY = podium_y + podium_length
+    stair_locZ = podium_height
+
+    steps_no = p['stair_steps']
+    stair_depth = stair_length/steps_no
+    model.add_mesh('stairs', stairs(steps_no, stair_height*2/steps_no, stair_depth))
+    model.add_part("stairs", 'stairs', (stair_locX,stair_locY-stair_depth,stair_locZ - stair_height * 1.1),
+                   (stair_width*2,stair_length*2,1), pi, material='stair')
+
+    for i, side in enumerate(p['side_stairs']):
+        locX, locY, locZ = side['location']
+        steps_no = side['steps']
+        mesh = 'side_stairs_%d' % i
+
+        model.add_mesh(mesh, stairs(steps_no, side['height']/steps_no, side['length']/steps_no, side['width']))
+        model.add_part("side_stairs", mesh, (locX,locY,locZ - side['height']), rotation=pi/2 if side['left_side'] else pi*1.5, material='stair')
+
+    return model
+
+
+
+def temple_model(xSize,ySize,height,rng=random,colour=None,pediment=False):
+    """Plan and build a temple in one go"""
+
+    return build_temple(plan_temple(xSize,ySize,height,rng,colour,pediment))
+
+
+
+################################################################################
+# Laying out many temples on one site.
+
+class SpatialHash:
+    """Uniform grid over the xy plane for finding overlapping rectangles
+
+    Rectangles are (x0, y0, x1, y1). Each one is stored in every cell it
+    touches, so a query only looks at the rectangles in the cells the query
+    rectangle touches. With cell_size about the size of the largest rectangle
+    that is a handful of cells per query, whatever the number stored.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.cells = collections.defaultdict(list)
+        self.count = 0
+
+
+    def _cells(self, rect):
+        x0, y0, x1, y1 = rect
+        size = self.cell_size
+        for i in range(int(x0 // size), int(x1 // size) + 1):
+            for j in range(int(y0 // size), int(y1 // size) + 1):
+                yield (i, j)
+
+
+    def overlaps(self, rect, gap=0.0):
+        """True if rect, grown by gap on every side, overlaps a stored rectangle"""
+
+        x0, y0, x1, y1 = rect
+        grown = (x0 - gap, y0 - gap, x1 + gap, y1 + gap)
+        for cell in self._cells(grown):
+            for other in self.cells.get(cell, ()):
+                if (grown[0] < other[2] and other[0] < grown[2] and
+                        grown[1] < other[3] and other[1] < grown[3]):
+                    return True
+        return False
+
+
+    def insert(self, rect):
+        for cell in self._cells(rect):
+            self.cells[cell].append(rect)
+        self.count += 1
+
+
+    def __len__(self):
+        return self.count
+
+
+
+def plan_district(footprints, siteX, siteY, gap=1.0, attempts=30, rng=random):
+    """Place temples on a siteX by siteY site without any two overlapping
+
+    footprints is a list of (xSize, ySize) pairs, a temple covers the
+    rectangle (x, y) - (x + xSize, y + ySize) just like the ground made for
+    it. Each one gets up to attempts random spots and is left out if none of
+    them is free. Returns a list of (index, x, y) for the ones placed.
+    """
+
+    largest = max([max(xSize, ySize) for xSize, ySize in footprints] or [1.0])
+    index = SpatialHash(largest + gap)
+
+    placed = []
+    for i, (xSize, ySize) in enumerate(footprints):
+        if xSize > siteX or ySize > siteY:
+            continue
+
+        for attempt in range(attempts):
+            x = rng.uniform(0, siteX - xSize)
+            y = rng.uniform(0, siteY - ySize)
+            rect = (x, y, x + xSize, y + ySize)
+
+            if not index.overlaps(rect, gap):
+                index.insert(rect)
+                placed.append((i, x, y))
+                break
+
+    return placed
@@ -0,0 +1,539 @@
+import imp
+import bpy
+import collections
+import threading
+import Geometry
+imp.reload(Geometry)
+
+
+# Object construction for the temple.
+#
+# Every box, cylinder and sphere in the temple goes through the add_* functions
+# below. BACKEND picks how they are made:
+#
+#   'OPS'  - bpy.ops primitive + transform.resize, the way the temple was first
+#            written. Every call runs through the operator and depsgraph machinery.
+#   'DATA' - vertices and faces from Geometry.py are loaded straight into a mesh
+#            datablock with foreach_set, and the object is linked into the scene.
+#
+# Both give the same object: unit mesh, location and scale set on the object.
+
+BACKEND = 'DATA'
+
+
+
+
+def new_mesh(name, verts, faces):
+    """Load vertex and face lists into a new mesh datablock in bulk"""
+
+    mesh = bpy.data.meshes.new(name)
+
+    loop_start = []
+    loop_total = []
+    loop_verts = []
+    for face in faces:
+        loop_start.append(len(loop_verts))
+        loop_total.append(len(face))
+        loop_verts.extend(face)
+
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", [c for v in verts for c in v])
+
+    mesh.loops.add(len(loop_verts))
+    mesh.loops.foreach_set("vertex_index", loop_verts)
+
+    mesh.polygons.add(len(faces))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    mesh.polygons.foreach_set("loop_total", loop_total)
+
+    mesh.update(calc_edges=True)
+
+    return mesh
+
+
+
+def add_object(name, mesh, location, scale=(1, 1, 1), mat=None):
+    """Link a new object using mesh into the scene and make it the active one"""
+
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = location
+    obj.scale = scale
+
+    if mat is not None:
+        obj.data.materials.append(mat)
+
+    scene = bpy.context.scene
+    scene.objects.link(obj)
+
+    # Same selection state an operator leaves behind, the temple code relies on it.
+    for selected in bpy.context.selected_objects:
+        selected.select = False
+    obj.select = True
+    scene.objects.active = obj
+
+    return obj
+
+
+
+def _add_with_ops(operator, name, location, scale, mat):
+    operator(location=location)
+    bpy.ops.transform.resize(value=scale)
+
+    obj = bpy.context.object
+    obj.name = name
+    if mat is not None:
+        obj.data.materials.append(mat)
+
+    return obj
+
+
+
+def add_cube(name, location, scale, mat=None):
+    """Box centred on location with half-extents scale"""
+
+    if BACKEND == 'OPS':
+        return _add_with_ops(bpy.ops.mesh.primitive_cube_add, name, location, scale, mat)
+
+    verts, faces = Geometry.cube()
+    return add_object(name, new_mesh(name, verts, faces), location, scale, mat)
+
+
+
+def add_plane(name, location, scale, mat=None):
+    """Flat rectangle centred on location with half-extents scale"""
+
+    if BACKEND == 'OPS':
+        return _add_with_ops(bpy.ops.mesh.primitive_plane_add, name, location, scale, mat)
+
+    verts, faces = Geometry.plane()
+    return add_object(name, new_mesh(name, verts, faces), location, scale, mat)
+
+
+
+def add_cylinder(name, location, scale, mat=None):
+    """Upright cylinder centred on location, scale is (radius, radius, half height)"""
+
+    if BACKEND == 'OPS':
+        return _add_with_ops(bpy.ops.mesh.primitive_cylinder_add, name, location, scale, mat)
+
+    verts, faces = Geometry.cylinder()
+    return add_object(name, new_mesh(name, verts, faces), location, scale, mat)
+
+
+
+def add_uv_sphere(name, location, scale, mat=None):
+    """Sphere centred on location, scale is the radius along each axis"""
+
+    if BACKEND == 'OPS':
+        return _add_with_ops(bpy.ops.mesh.primitive_uv_sphere_add, name, location, scale, mat)
+
+    verts, faces = Geometry.uv_sphere()
+    return add_object(name, new_mesh(name, verts, faces), location, scale, mat)
+
+
+
+class Instancer:
+    """Adds objects that all share one mesh datablock (linked duplicates)
+
+    The first call builds the mesh with the given add_* function, every call
+    after that only makes a new object pointing at the same mesh, so editing
+    the mesh changes all of them.
+    """
+
+    def __init__(self, add, mat=None):
+        self.add = add
+        self.mat = mat
+        self.mesh = None
+
+
+    def __call__(self, name, location, scale):
+        if self.mesh is None:
+            obj = self.add(name, location, scale, self.mat)
+            self.mesh = obj.data
+            return obj
+
+        return add_object(name, self.mesh, location, scale)
+
+
+
+
+class MeshCache:
+    """Least-recently-used cache of mesh datablocks keyed on what built them
+
+    instance() builds the object for a key the first time it is asked for, and
+    after that only adds objects that share the cached mesh (and its scale).
+    When more than size keys are held the oldest is dropped, and its mesh is
+    removed if nothing uses it any more.
+    """
+
+    def __init__(self, size=32):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    def instance(self, name, key, build, location):
+        """Object for key at location, build() makes it when the key is new"""
+
+        entry = self.entries.get(key)
+
+        # The mesh may have been removed from bpy.data behind our back.
+        if entry is not None:
+            try:
+                entry[0].name
+            except ReferenceError:
+                del self.entries[key]
+                entry = None
+
+        if entry is None:
+            self.misses += 1
+            obj = build()
+            obj.location = location
+            self.entries[key] = (obj.data, tuple(obj.scale))
+            self.evict()
+            return obj
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        mesh, scale = entry
+        return add_object(name, mesh, location, scale)
+
+
+    def evict(self):
+        while len(self.entries) > self.size:
+            key, (mesh, scale) = self.entries.popitem(last=False)
+            try:
+                # A column LOD chain has fake users, Column.free_column_lods() frees it.
+                if mesh.users == 0:
+                    bpy.data.meshes.remove(mesh)
+            except ReferenceError:
+                pass
+
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+    def __repr__(self):
+        return "MeshCache(%d/%d entries, %d hits, %d misses)" % (len(self.entries), self.size, self.hits, self.misses)
+
+
+
+PRIMITIVES = {
+    'cube': add_cube,
+    'plane': add_plane,
+    'cylinder': add_cylinder,
+    'uv_sphere': add_uv_sphere,
+}
+
+
+
+def link_model(model, materials, parts=None):
+    """Add the parts of a Geometry.TempleModel to the scene
+
+    Parts naming the same mesh share one datablock. materials maps the
+    material names in the model to bpy materials. Returns the objects in the
+    same order as parts (model.parts when not given).
+    """
+
+    if parts is None:
+        parts = model.parts
+
+    instancers = {}
+    objects = []
+    for part in parts:
+        add = instancers.get(part.mesh)
+        if add is None:
+            if BACKEND == 'OPS' and part.mesh in model.primitives:
+                adder = PRIMITIVES[model.primitives[part.mesh]]
+            else:
+                def adder(name, location, scale, mat=None, key=part.mesh):
+                    verts, faces = model.meshes[key]
+                    return add_object(name, new_mesh(key, verts, faces), location, scale, mat)
+            add = Instancer(adder, materials.get(part.material))
+            instancers[part.mesh] = add
+
+        obj = add(part.name, part.location, part.scale)
+        obj.rotation_euler[2] = part.rotation
+        objects.append(obj)
+
+    return objects
+
+
+
+
+class Registry:
+    """The objects making up one temple, parented to its axes empty
+
+    Builders hand back what they create and it is added here, so the
+    temple never has to search bpy.data.objects for its parts, and the
+    whole temple can be deleted, moved, joined or exported at once.
+    When index is given (a dict of registries, like Temple.temples) the
+    registry is listed there under name until delete().
+    """
+
+    def __init__(self, axes, pool=None, index=None, name=None):
+        self.axes = axes
+        self.objects = []
+
+        # Materials taken from pool for this temple, given back on delete().
+        self.pool = pool
+        self.materials = []
+
+        self.index = index
+        self.name = name
+        if index is not None:
+            index[name] = self
+
+
+    def add(self, *objects):
+        """Add objects (or lists of objects) and parent them to the axes"""
+
+        for obj in objects:
+            if isinstance(obj, (list, tuple)):
+                self.add(*obj)
+            elif obj is not None:
+                obj.parent = self.axes
+                self.objects.append(obj)
+
+
+    def select(self):
+        for selected in bpy.context.selected_objects:
+            selected.select = False
+        for obj in self.objects:
+            obj.select = True
+        if self.objects:
+            bpy.context.scene.objects.active = self.objects[0]
+
+
+    def move(self, location):
+        self.axes.location = location
+
+
+    def delete(self):
+        """Remove the temple and its axes from the file"""
+
+        for obj in self.objects + [self.axes]:
+            try:
+                bpy.data.objects.remove(obj, do_unlink=True)
+            except ReferenceError:
+                pass
+        self.objects = []
+
+        if self.pool is not None:
+            for mat in self.materials:
+                self.pool.release(mat)
+        self.materials = []
+
+        # A new temple may have taken the name since.
+        if self.index is not None and self.index.get(self.name) is self:
+            del self.index[self.name]
+
+
+    def join(self):
+        """Join every mesh object into one, which is returned"""
+
+        meshes = [obj for obj in self.objects if obj.type == 'MESH']
+        if not meshes:
+            return None
+
+        self.select()
+        for obj in self.objects:
+            if obj.type != 'MESH':
+                obj.select = False
+        bpy.context.scene.objects.active = meshes[0]
+        bpy.ops.object.join()
+
+        joined = bpy.context.object
+        self.objects = [obj for obj in self.objects if obj.type != 'MESH'] + [joined]
+        return joined
+
+
+    def export(self, filepath):
+        """Write the temple on its own to an .obj file"""
+
+        self.select()
+        bpy.ops.export_scene.obj(filepath=filepath, use_selection=True)
+
+
+    def __len__(self):
+        return len(self.objects)
+
+
+
+
+class MaterialPool:
+    """Shared materials keyed on a quantized colour and a texture type
+
+    get() hands out the material for (colour, texture type), making it with
+    make(name, colour, texture_type) the first time. The colour is rounded to
+    levels steps per channel and the material is made in the rounded colour,
+    so close colours share one. Every get() adds a reference and release()
+    drops one; purge() removes materials (and their textures) that nothing
+    holds any more. When size distinct materials exist and none can be
+    purged, the closest existing material is handed out instead of a new one.
+    """
+
+    def __init__(self, make, levels=16, size=64):
+        self.make = make
+        self.levels = levels
+        self.size = size
+        self.entries = {}
+        self.refs = collections.Counter()
+        self.hits = 0
+        self.misses = 0
+
+
+    def key(self, colour, texture_type):
+        steps = self.levels - 1
+        return tuple(int(round(c * steps)) for c in colour) + (texture_type,)
+
+
+    def get(self, colour, texture_type):
+        key = self.key(colour, texture_type)
+
+        mat = self.entries.get(key)
+        if mat is not None:
+            try:
+                mat.name
+            except ReferenceError:
+                self.forget(key)
+                mat = None
+
+        if mat is None and len(self.entries) >= self.size:
+            self.purge()
+            if len(self.entries) >= self.size:
+                key = self.closest(key)
+                mat = self.entries[key]
+
+        if mat is None:
+            self.misses += 1
+            steps = float(self.levels - 1)
+            rounded = tuple(c / steps for c in key[:-1])
+            name = "pool_%s_%d_%d_%d" % ((texture_type,) + key[:-1])
+            mat = self.make(name, rounded, texture_type)
+            self.entries[key] = mat
+        else:
+            self.hits += 1
+
+        self.refs[key] += 1
+        return mat
+
+
+    def closest(self, key):
+        """Key of the held material nearest to key, same texture type first"""
+
+        def distance(other):
+            return (other[-1] != key[-1], sum((a - b) ** 2 for a, b in zip(key[:-1], other[:-1])))
+
+        return min(self.entries, key=distance)
+
+
+    def release(self, mat):
+        for key, held in self.entries.items():
+            if held == mat:
+                if self.refs[key] > 0:
+                    self.refs[key] -= 1
+                return
+
+
+    def forget(self, key):
+        del self.entries[key]
+        del self.refs[key]
+
+
+    def purge(self):
+        """Remove materials nothing holds a reference to"""
+
+        for key in [key for key in self.entries if self.refs[key] <= 0]:
+            mat = self.entries[key]
+            self.forget(key)
+            try:
+                textures = [slot.texture for slot in mat.texture_slots if slot is not None and slot.texture is not None]
+                bpy.data.materials.remove(mat, do_unlink=True)
+                for tex in textures:
+                    if tex.users == 0:
+                        bpy.data.textures.remove(tex)
+            except ReferenceError:
+                pass
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def __repr__(self):
+        return "MaterialPool(%d/%d materials, %d hits, %d misses)" % (len(self.entries), self.size, self.hits, self.misses)
+
+
+
+
+class GroundCache:
+    """Ground materials, one per image in a directory of numbered .jpg files
+
+    Each image is loaded at most once, and the image, its texture and the
+    material around it are shared by every ground that uses it.
+
+    preload() reads the files in a background thread so they are already in
+    the OS file cache when Blender loads them. Only the reading is done off
+    the main thread, bpy itself is not safe to call from other threads.
+    """
+
+    def __init__(self, directory, count):
+        self.directory = directory
+        self.count = count
+        self.materials = {}
+        self.thread = None
+
+
+    def path(self, index):
+        return self.directory + str(index) + '.jpg'
+
+
+    def preload(self):
+        if self.thread is not None:
+            return
+
+        paths = [bpy.path.abspath(self.path(index)) for index in range(self.count)]
+
+        def read():
+            for path in paths:
+                try:
+                    with open(path, 'rb') as f:
+                        while f.read(1 << 20):
+                            pass
+                except IOError:
+                    pass
+
+        self.thread = threading.Thread(target=read, daemon=True)
+        self.thread.start()
+
+
+    def material(self, index):
+        """The shared ground material for image number index"""
+
+        mat = self.materials.get(index)
+        if mat is not None:
+            try:
+                mat.name
+                return mat
+            except ReferenceError:
+                del self.materials[index]
+
+        groundTexture = bpy.data.textures.new('groundTexture', type='IMAGE')
+        groundTexture.image = bpy.data.images.load(self.path(index), check_existing=True)
+
+        # Make a new material with this texture
+        mat = bpy.data.materials.new('groundMaterial')
+        mat.specular_intensity = 0.0 # Not shiny
+
+        # And add the texture to the material
+        groundMatTex = mat.texture_slots.add()
+        groundMatTex.texture = groundTexture
+        groundMatTex.scale = (1, 1, 1)
+
+        self.materials[index] = mat
+        return mat
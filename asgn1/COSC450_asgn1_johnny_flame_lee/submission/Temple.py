@@ -4,8 +4,13 @@ import Init
 import random
 import bmesh
 import mathutils
+import time
 import Render 
 imp.reload(Render)
+import Geometry
+imp.reload(Geometry)
+import Meshes
+imp.reload(Meshes)
 
 
 
@@ -13,6 +18,9 @@ imp.reload(Render)
 
 def main():
 
+    # Start reading the ground images while the scene is set up
+    ground_cache.preload()
+
     # Set up lighting and camera
     setup()    
 
@@ -27,6 +35,71 @@ def main():
     
     
     
+# Builds a whole site of temples in one scene. footprints is a list of
+# (xSize, ySize, height), each temple is put somewhere free on the siteX by
+# siteY ground (see Geometry.plan_district), the ones that don't fit are left out.
+# All of them share one light rig, one ground and the material pool, which is
+# capped at max_materials, so the cost per temple is just its own geometry.
+# view is the (location, target) of the camera the column detail is picked for,
+# by default looking over the whole site; render from the same view.
+def district(footprints,siteX,siteY,gap=1.0,max_materials=64,seed=None,view=None):
+    
+    if seed is not None:
+        random.seed(seed)
+    
+    ground_cache.preload()
+    setup()
+    
+    material_pool.size = max_materials
+    
+    placed = Geometry.plan_district([(xSize,ySize) for xSize,ySize,height in footprints],siteX,siteY,gap)
+    
+    names = []
+    for i, x, y in placed:
+        xSize, ySize, height = footprints[i]
+        name = "temple_%d" % i
+        temple(xSize,ySize,height,name)
+        temples[name].move((x, y, 0))
+        names.append(name)
+    
+    top = max([height for xSize,ySize,height in footprints] or [0])
+    make_ground(siteX,siteY,top)
+    
+    # Far away columns get the low detail meshes, if any were made with a
+    # LOD chain (library columns); the camera has to go in first.
+    scene = bpy.context.scene
+    if any(obj.type == 'MESH' and "column_lods" in obj.data for obj in scene.objects):
+        from add_mesh_building_basics import Column
+        if view is None:
+            view = ((siteX*1.25, -siteY*0.25, top*1.5), (siteX*0.5, siteY*0.5, 0))
+        Column.assign_column_lods(scene, place_camera(*view))
+    
+    # Names of the temples built, temples[name] has each one's objects.
+    return names
+    
+    
+    
+# Builds the same temple with each mesh backend (see Meshes.py) and prints how
+# long it took and how much geometry came out, so the two paths can be compared.
+def compare_backends(xSize=10,ySize=10,height=10,seed=0):
+    
+    for backend in ('OPS','DATA'):
+        Meshes.BACKEND = backend
+        setup()
+        
+        # Same seed for both runs so they make the same temple.
+        random.seed(seed)
+        start = time.time()
+        create(xSize,ySize,height,"temple")
+        elapsed = time.time() - start
+        
+        meshes = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+        verts = sum(len(obj.data.vertices) for obj in meshes)
+        faces = sum(len(obj.data.polygons) for obj in meshes)
+        print(backend, "%.3fs" % elapsed, len(meshes), "objects", verts, "verts", faces, "faces")
+    
+    
+
 
 
 
@@ -34,17 +107,21 @@ def main():
 
 
 
+TEXTURE_TYPES = ['NOISE','MUSGRAVE',"MARBLE","CLOUDS"]
+
+
 
 # These textures are procedurally generated.
 # Sampled the example code here. 
-def procedural_material(name, colour):
+def procedural_material(name, colour, texture_type=None):
     # Shade is a brighter version of colour
     # Made by multiplying all of colour values by 1.2
     shade = list(map(lambda x: x*1.2, colour))
     
     
     #Texture type is randomly selected out of a list of appropriate patterns
-    texture_type = random.choice(['NOISE','MUSGRAVE',"MARBLE","CLOUDS"])
+    if texture_type is None:
+        texture_type = random.choice(TEXTURE_TYPES)
     
     # A noise texture
     tex = bpy.data.textures.new(name+'_tex', type=texture_type)
@@ -67,6 +144,23 @@ def procedural_material(name, colour):
     
 
 
+# Materials shared by every temple in the file, so a batch of temples doesn't
+# make seven new materials and textures each. print(material_pool) shows its use.
+material_pool = Meshes.MaterialPool(procedural_material, levels=16, size=64)
+
+
+
+# One material per kind of part, all in the given colour, each with a random texture.
+# The materials come from material_pool and have to be given back with release().
+def temple_materials(colour):
+    materials = {}
+    for material in Geometry.MATERIALS:
+        materials[material] = material_pool.get(colour, random.choice(TEXTURE_TYPES))
+    
+    return materials
+
+
+
 def setup():
     """Clear the scene then set up materials, lights, etc."""
         
@@ -74,6 +168,12 @@ def setup():
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete()
     
+    # Those temples are gone, so are their claims on the material pool.
+    for registry in temples.values():
+        for mat in registry.materials:
+            material_pool.release(mat)
+    temples.clear()
+    
     sun_energy = random.uniform(0.5,0.9)
 
     # Add a sun
@@ -100,16 +200,39 @@ def setup():
 
 
 
+# Points the scene camera from location at target, adding a camera if setup()
+# left none. The column LOD pass reads the camera's matrix_world.
+def place_camera(location, target):
+    scene = bpy.context.scene
+    camera = scene.camera
+    if camera is None:
+        camera = bpy.data.objects.new("Camera", bpy.data.cameras.new("Camera"))
+        scene.objects.link(camera)
+        scene.camera = camera
+    
+    camera.location = location
+    direction = mathutils.Vector(target) - mathutils.Vector(location)
+    camera.rotation_euler = direction.to_track_quat('-Z', 'Y').to_euler()
+    
+    # matrix_world is only worked out on an update.
+    scene.update()
+    return camera
+
+
+
 def create(xSize, ySize, height, name):
     """Create a building with the given dimensions and name"""
     
 
     # Create the ground where the temple sits, the ground also represents the area specified by user
-    make_ground(xSize,ySize,height)
+    ground = make_ground(xSize,ySize,height)
     
     
     # Create a temple.
     obj = temple(xSize,ySize,height,name)
+    
+    # The ground moves with the temple.
+    temples[name].add(ground)
 
 
     # Return the reference so that the building can be moved
@@ -119,46 +242,44 @@ def create(xSize, ySize, height, name):
 
 
 
+# Ground images and the materials made from them, shared by every ground.
+ground_cache = Meshes.GroundCache('//materials/ground/', 8)
+
+
+
 def make_ground(xSize,ySize,height):
     dimensions = (xSize,ySize,height)
-    ground = bpy.ops.mesh.primitive_plane_add
-    
-    ground(location = (xSize*0.5,ySize*0.5,0))
     
     groundsize = [x * 0.5 for x in dimensions]
-    bpy.ops.transform.resize(value = groundsize)
-    bpy.context.selected_objects[0].name = "Ground"
+    ground = Meshes.add_plane("Ground",(xSize*0.5,ySize*0.5,0),groundsize)
     
 
-    groundTexture = bpy.data.textures.new('groundTexture', type='IMAGE')
+    # The images are 0.jpg to 7.jpg, each is loaded once and its material shared.
+    groundimage = random.randint(0,ground_cache.count - 1) 
     
-    groundimage = random.randint(0,8) 
-     
-    groundTexture.image = bpy.data.images.load('//materials/ground/' + str(groundimage) + '.jpg')
-
-    # Make a new material with this texture
-    groundMaterial = bpy.data.materials.new('groundMaterial')
-    groundMaterial.specular_intensity = 0.0 # Not shiny
-
-    # And add the texture to the material
-    groundMatTex = groundMaterial.texture_slots.add()
-    groundMatTex.texture = groundTexture
- #   groundMatTex.mapping = 'SPHERE'
+    ground.data.materials.append(ground_cache.material(groundimage))
     
-    bpy.context.object.data.materials.append(groundMaterial)
-    bpy.context.object.active_material.texture_slots[0].scale[0] = 1
-    bpy.context.object.active_material.texture_slots[0].scale[1] = 1
-    bpy.context.object.active_material.texture_slots[0].scale[2] = 1
+    return ground
  
     
         
 
-def temple(xSize,ySize,height,name):
+# Registry of the objects of every temple made, by name. temples[name] can
+# delete, move, join or export a temple as a whole; delete() also takes it out
+# of here.
+temples = {}
+
+
+
+def temple(xSize,ySize,height,name,colour=None,materials=None,pediment=False):
     
     bpy.ops.object.empty_add(location=(0,0,0))
     bpy.context.selected_objects[0].name = name
     axes = bpy.data.objects[name]
     
+    # Everything made for this temple is collected here and parented to axes.
+    registry = Meshes.Registry(axes, material_pool, temples, name)
+    
    
    
     """
@@ -187,529 +308,53 @@ def temple(xSize,ySize,height,name):
     
     '''
     
-
-    # colours are precedurally generated. The spread between R,G and B is no larger than 20%, giving the building a mild look, avoiding any extreme colours. A boolean flag is used each time to determine whether to subtract or add to the previous colour.
-    
-    red = random.uniform(0.4,0.7)
-    
-    if bool(random.getrandbits(1)):
-        green = red + red * random.uniform(0,0.18)
-    else:
-        green = red - red * random.uniform(0,0.18)
-        
-    if bool(random.getrandbits(1)):   
-        blue = green + green * random.uniform(0,0.18)
-    else:
-        blue = green - green * random.uniform(0,0.18)
-    
-    temple_colour = (red,green,blue)
-    
-    
-    podium_material = procedural_material('podium_skin',temple_colour)
-    stair_material = procedural_material('stair_skin', temple_colour)
-    temple_material = procedural_material('temple_skin', temple_colour)
-    roof_material =   procedural_material('roof_skin', temple_colour)  
-    dome_material =   procedural_material('dome_skin', (red, green, blue))  
-    dome_roof_material = procedural_material('dome_roof_skin', (red, green, blue))
-    
-    column_material =  procedural_material('column_skin', (red, green, blue))  
     
+    # The planning and the geometry are done in Geometry.py without bpy,
+    # all that is left here is putting the result into the scene.
+    # Note the side stairs are not what they were: archimesh made them curved
+    # (curve=True, a random model), Geometry.stairs() makes a straight flight
+    # with the same width, length, height and number of steps.
+    model = Geometry.temple_model(xSize,ySize,height,colour=colour,pediment=pediment)
+    plan = model.plan
     
     
+    if materials is None:
+        materials = temple_materials(plan['colour'])
+        registry.materials = list(materials.values())
     
     
+    parts = model.parts
     
-    #######################################################################################################################
-    ### This section is for randomized variables
-    
-    
-    
-    # Boolean flags with default values, chages with input dimensions.
-    has_dome = False
-    use_library = False
-    is_fluted = False
-    
-    cap_height = random.uniform(0.1,0.5)
-    cap_style = random.randint(0,20)
-    flute_num = 8
-    
-    col_faces = random.randint(20,40)
-    addendum_factor = random.uniform(0,0.3)
- 
-    # 25% chance that the temple will have a flat roof
-    flat_top = random.uniform(0,1) < 0.25
-    
-    
-    
-    
-     
-    columns_per_shortedge = random.choice([2,4,6]) 
-    columns_per_longedge =  random.randint(4,8)
-    
-    use_library = False
-    
-    
-    #####################################################################################################################
-    
-    box_width = xSize
-    box_length = ySize
-    
-    box_height = height
-    
-  
-
-    # TODO: Currently the height shouldn't be greater than width, if it is, make the dome have extensions. 
+    # Columns from the add-on replace the plain cylinders.
+    if plan['use_library']:
+        parts = [part for part in parts if part.mesh != 'column_pillar']
     
+    objects = Meshes.link_model(model, materials, parts)
+    registry.add(objects)
     
-    #NOTE: 1:1:0.7 seems to work quite well for a ratio
     
-    if box_length/box_width >=1.5:
-        columns_per_longedge =  random.randint(6,15)
-    
-    
-    
-   # make_ground(box_width,box_length,box_height)
-   
-    
-                
-    
-    podium_x = box_width * 0.5
-    podium_y = box_length * 0.5
-    
-    MAX_PODIUM_WIDTH = box_width * 0.5
-    MAX_PODIUM_LENGTH = box_length * 0.5
-    
-    MAX_BUILDING_HEIGHT = box_height * 0.5
-    available_height = MAX_BUILDING_HEIGHT
-    
-   
- 
-    
-    
-    
-    podium_width = MAX_PODIUM_WIDTH * random.uniform(0.35,0.65)
-    podium_length = MAX_PODIUM_LENGTH #parametise this, work out valid range
-    
-    podium_height = available_height * random.uniform(0.05,0.20)#parametise this, work out a range.    
-    available_height -= podium_height 
-    
-    
-   
-    
-    #Decision making for dome using random number  
-    dome_generator = random.uniform(0,1)
-    
-    # If the length of the input is drastically greater than width,dome is very likely.
-    if box_length/box_width >= 1.5 and box_length/box_width <= 2:
-        if dome_generator > 0.3:
-            has_dome = True
-
-    
-    
-    
-    # If the building has a dome, a new list of parameters are needed to make it look sensible.
-    if has_dome:
-        
-        length_factor = random.uniform(0.43,0.63)
-        
-        podium_width = MAX_PODIUM_WIDTH * random.uniform(0.35,0.8)
-        podium_length = MAX_PODIUM_LENGTH * length_factor#parametise this, work out valid range
-    
-        
-        podium_x = box_width * 0.5
-        podium_y = box_length * 0.5 + MAX_PODIUM_LENGTH * (1-length_factor)
-        
-        # Dome Parameters
-   
-        dome_body_height = MAX_BUILDING_HEIGHT * 0.77 
-
-        dome_body_radius = MAX_PODIUM_WIDTH
-        
-        dome_locX = podium_x 
-        dome_locY = MAX_PODIUM_LENGTH - (MAX_PODIUM_LENGTH-dome_body_radius)
-        dome_locZ = dome_body_height 
-        
-        
-        #determines the ratio of the rest of the temple to dome
-        available_height *= random.uniform(0.5,0.8)
-        
-     
-            
-            
-    else:
-        podium_width = MAX_PODIUM_WIDTH * random.uniform(0.5,0.8)
-        
-        side_stair_width = podium_length * 0.44
-        side_stair_length = (MAX_PODIUM_WIDTH -podium_width) * 2
-        side_stair_height = podium_height * 2
-        side_stair_model = random.choice(['1','2'])
+    if plan['use_library']:
+        for part in model.parts:
+            if part.mesh == 'column_pillar':
+                locX, locY, locZ = part.location
+                pillar_height = part.scale[2]
                 
-        side_stair_locY = MAX_PODIUM_LENGTH * 2 -  (MAX_PODIUM_LENGTH -side_stair_width)/1.8 
-        side_stair_locZ = side_stair_height
-        
-        stair_generator = random.uniform(0,1)
-        
-        if stair_generator < 0.33 :
-            side_stair_length *= 0.5
-            # Weird magic number, not sure why this works, but it works.
-            side_stair_locX = MAX_PODIUM_WIDTH + MAX_PODIUM_WIDTH
-            left_side = True                        
-            make_side_stairs(side_stair_locX,side_stair_locY,side_stair_locZ,side_stair_width,side_stair_length,side_stair_height,left_side,side_stair_model,mat=stair_material)
-            left_side = False
-            side_stair_locX = MAX_PODIUM_WIDTH - MAX_PODIUM_WIDTH
-            make_side_stairs(side_stair_locX,side_stair_locY,side_stair_locZ,side_stair_width,side_stair_length,side_stair_height,left_side,side_stair_model,mat=stair_material)
-            
-        elif stair_generator >= 0.33 and stair_generator < 0.66:
-            podium_x = podium_x + (MAX_PODIUM_WIDTH - podium_width)
-            # Weird magic number, not sure why this works, but it works.
-            side_stair_locX = MAX_PODIUM_WIDTH - MAX_PODIUM_WIDTH
-            left_side = False
-            make_side_stairs(side_stair_locX,side_stair_locY,side_stair_locZ,side_stair_width,side_stair_length,side_stair_height,left_side,side_stair_model,mat=stair_material)
-        elif stair_generator >= 0.66 and stair_generator < 0.95:
-            podium_x = podium_x - (MAX_PODIUM_WIDTH - podium_width)
-            # Weird magic number, not sure why this works, but it works.
-            side_stair_locX = MAX_PODIUM_WIDTH + MAX_PODIUM_WIDTH
-            left_side = True
-            make_side_stairs(side_stair_locX,side_stair_locY,side_stair_locZ,side_stair_width,side_stair_length,side_stair_height,left_side,side_stair_model,mat=stair_material)
-        else:
-            podium_width = MAX_PODIUM_WIDTH
-            
-            
-
-            
-        
-        
-        
-        
-        
-         
-         
-         
-   
-            
-    # Calculate the size of the column base, using a nested min function to eliminated edge cases.
-    
-    column_base_size = min((podium_width/8),min(podium_width/(columns_per_shortedge * 2),podium_length/(columns_per_longedge * 2))) # determins the size of the pillars
-        
-    column_base_height = podium_height / 10
-    column_base_edge = column_base_size / 4.0
-    
-    
-    available_height -= column_base_height
-    
-    
-    #paramized according to building height
-    
-   
-    column_pillar_height = available_height * random.uniform(0.60,0.85)
-    
-    available_height -= column_pillar_height 
-    
-     
-    column_pillar_radius = column_base_size * 0.9   
-    
-    temple_body_width = podium_width * 0.90
-    temple_body_length = podium_length * 0.5
-    temple_body_height = column_pillar_height + column_base_height
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    top_width = temple_body_width * 1.1
-    top_length = podium_length * 0.75
-    top_height = available_height * random.uniform(0.1,0.5)
-    
-    available_height -=top_height   
-    roof_base_height = available_height * random.uniform(0.1,0.5)
-    
-    available_height -=roof_base_height 
-    
-    roof_width = podium_width * 1.1
-    roof_length = top_length * 1.1
-    roof_height = available_height
+                column = stylized_pillars(locX, locY, locZ - pillar_height,height=(pillar_height*2),b_width=plan['column_base_size'],cap_height=plan['cap_height'],cap_style=plan['cap_style'],flute_num=plan['flute_num'],col_faces=plan['col_faces'],addendum_factor=plan['addendum_factor'],column_colour=plan['colour'])
+                registry.add(column)
     
     
+    return axes
 
     
-    
-    
-    stair_locX = podium_x
-    stair_locY = podium_y + podium_length
-    stair_locZ = podium_height
-    
-    stair_length = podium_length * 0.25 - column_base_size
-    stair_width = podium_width * 0.31 
-    stair_height = podium_height 
-    
-  
-    
-    
-    
-    door_width = temple_body_width * 0.5
-    door_length = temple_body_length * 0.1
-    door_height = temple_body_height * 0.8
-
-    door_locX = podium_x
-    door_locY = podium_y
-    door_locZ = 2 * podium_height + door_height
-    
-    
-
-    
-    # Construction of the temple starts here.
-    
-    
-    podium = bpy.ops.mesh.primitive_cube_add
-    podium(location = (podium_x,podium_y,podium_height))   
-    bpy.ops.transform.resize(value = (podium_width,podium_length,podium_height))
-    bpy.context.selected_objects[0].name = "Podium"
-    
-    
-    podium_skin = bpy.data.objects["Podium"]
-    podium_skin.data.materials.append(podium_material);
-
-    #podium_skin.data.materials.append(random.choice(building_materials))
-    
-    
-    
-    temple_body_locX = podium_x
-    temple_body_locY = podium_y - podium_length/2 + column_pillar_radius
-    temple_body_locZ = 2 * podium_height + temple_body_height
-         
-    temple_body = bpy.ops.mesh.primitive_cube_add
-    temple_body(location = (temple_body_locX,temple_body_locY,temple_body_locZ))  
-    bpy.ops.transform.resize(value = (temple_body_width,temple_body_length,temple_body_height))
-    bpy.context.selected_objects[0].name = "temple_body"
-    temple_body_skin = bpy.data.objects["temple_body"]
-    temple_body_skin.data.materials.append(temple_material);
-    
-    make_door(door_locX,door_locY,door_locZ,door_width,door_length,door_height)
-                
-    
-    top_locX = podium_x
-    top_locY = podium_y - podium_length/4 + column_pillar_radius
-    top_locZ = 2 * podium_height + 2*column_base_height + 2*column_pillar_height + top_height
-    
-    
-    
-    
-    top = bpy.ops.mesh.primitive_cube_add
-    top(location = (top_locX,top_locY,top_locZ))
-    bpy.ops.transform.resize(value = (top_width,top_length,top_height))
-    bpy.context.selected_objects[0].name = "Top"
-    
-    top_skin = bpy.data.objects["Top"]
-    top_skin.data.materials.append(temple_material);
-
-    roofbase = bpy.ops.mesh.primitive_cube_add
-    roofbase(location = (podium_x,podium_y - podium_length/4 + column_pillar_radius,2 * podium_height + 2*column_base_height + 2*column_pillar_height + 2*top_height + roof_base_height))
-    bpy.ops.transform.resize(value = (roof_width,roof_length,roof_base_height))
-    bpy.context.selected_objects[0].name = "roofbase"
-    
-    roof_base_skin = bpy.data.objects["roofbase"]
-    roof_base_skin.data.materials.append(temple_material);
-
-
-    roof = bpy.ops.mesh.primitive_cube_add
-    roof(location = (podium_x,podium_y - podium_length/4 + column_pillar_radius,2 * podium_height + 2*column_base_height + 2* column_pillar_height + 2*top_height + 2*roof_base_height+ 
-    roof_height ))
-    bpy.ops.transform.resize(value = (roof_width,roof_length,roof_height))
-    bpy.context.selected_objects[0].name = "Roof"
-    
-    Roof_skin = bpy.data.objects["Roof"]
-    Roof_skin.data.materials.append(roof_material);
-   
-    
- 
-
-   # Make roof by folding in vertices
-    if not flat_top: 
-        bpy.ops.object.mode_set(mode = 'EDIT')
-        mesh = bmesh.from_edit_mesh(bpy.context.object.data)
-            
-        if hasattr(mesh.verts, "ensure_lookup_table"): 
-            mesh.verts.ensure_lookup_table()
-                
-        for i in range (0,len(mesh.verts)):
-            if (i == 7 or i == 3):    
-                mesh.verts[i].select = True
-            else:
-                mesh.verts[i].select = False            
-        bpy.ops.mesh.merge(type='CENTER')
-       
-       
-        if hasattr(mesh.verts, "ensure_lookup_table"): 
-            mesh.verts.ensure_lookup_table()
-            
-        for i in range (0,len(mesh.verts)):
-            if (i == 1 or i == 5):    
-                mesh.verts[i].select = True
-            else:
-                mesh.verts[i].select = False        
-        bpy.ops.mesh.merge(type='CENTER')   
-        bpy.ops.object.mode_set(mode = 'OBJECT')
-        
-    
-    # Placing the column base tiles and the columns.
- 
-    
-
-    
-    
-    for s in range(0,columns_per_longedge):
-        
-        x_offset = podium_width - column_base_size -column_base_edge
-        y_offset = podium_length/2.0 - s * (2 * (podium_length * 0.75) - column_base_size - column_base_edge )/(columns_per_longedge - 1)
-        
-        base_z_location = (2 * podium_height + column_base_height)
-        column_z_location =  2 * podium_height + 2 * column_base_height + column_pillar_height
-        
-        
-                   
-        #left-hand side column bases on long edge
-        bpy.ops.mesh.primitive_cube_add(location = (podium_x + x_offset, podium_y + y_offset
-        , base_z_location))        
-        bpy.ops.transform.resize(value = (column_base_size,column_base_size,column_base_height))
-        
-        bpy.context.selected_objects[0].name = "Columns_longedge"        
-        column_base_skin = bpy.data.objects["Columns_longedge"]
-        column_base_skin.data.materials.append(column_material) 
-       
-        
-        
-        
-        #RHS column bases    
-        bpy.ops.mesh.primitive_cube_add(location = (podium_x - x_offset , podium_y +
-        y_offset, base_z_location))        
-        bpy.ops.transform.resize(value = (column_base_size,column_base_size,column_base_height)) 
-        
-        bpy.context.selected_objects[0].name = "Columns_longedge"        
-        column_base_skin = bpy.data.objects["Columns_longedge"]
-        column_base_skin.data.materials.append(column_material) 
-          
-
-        if use_library:
-            
-            stylized_pillars(podium_x + x_offset, podium_y + y_offset
-            , base_z_location +column_base_height,height=(column_pillar_height*2),b_width=column_base_size,cap_height=cap_height,cap_style=cap_style,flute_num=flute_num,col_faces=col_faces,addendum_factor=addendum_factor,column_colour=temple_colour)
-                
-            stylized_pillars(podium_x - x_offset, podium_y + y_offset
-            , base_z_location +column_base_height,height=(column_pillar_height*2),b_width=column_base_size,cap_height=cap_height,cap_style=cap_style,flute_num=flute_num,col_faces=col_faces,addendum_factor=addendum_factor,column_colour=temple_colour)
-            
-
-            
-        else:
-                
-            #LHS columns 
-            column = bpy.ops.mesh.primitive_cylinder_add        
-            column(location = (podium_x + x_offset , podium_y + y_offset,
-              column_z_location ))
-            bpy.ops.transform.resize(value = (column_pillar_radius,column_pillar_radius,column_pillar_height))
-            
-            bpy.context.selected_objects[0].name = "Columns_longedge_pillars"        
-            column_skin = bpy.data.objects["Columns_longedge_pillars"]
-            column_skin.data.materials.append(column_material)                  
-            #RHS columns     
-            column = bpy.ops.mesh.primitive_cylinder_add        
-            column(location = (podium_x - x_offset , podium_y + y_offset,
-              column_z_location ))
-            bpy.ops.transform.resize(value = (column_pillar_radius,column_pillar_radius,column_pillar_height))
-            
-            bpy.context.selected_objects[0].name = "Columns_longedge_pillars"        
-            column_skin = bpy.data.objects["Columns_longedge_pillars"]
-            column_skin.data.materials.append(column_material)  
-            
-            #bpy.ops.object.mode_set(mode = 'EDIT')   
-        
-     
-    bpy.ops.object.mode_set(mode = 'OBJECT')      
-    for s in range (0, columns_per_shortedge):
-        
-        x_offset=(podium_width - column_base_size - column_base_edge) - s * (2 * (podium_width - column_base_size - column_base_edge)/(columns_per_shortedge -1))
-        y_offset = podium_length /2.0
-        base_z_location = 2 * podium_height + column_base_height
-        
-        # This ensures no overlap of objects.
-        
-        if s != 0 and s != columns_per_shortedge-1:
-        
-            bpy.ops.mesh.primitive_cube_add(location = (podium_x + x_offset, podium_y + y_offset, base_z_location))
-            bpy.ops.transform.resize(value = (column_base_size,column_base_size,column_base_height))
-            
-            bpy.context.selected_objects[0].name = "Columns_shortedge_base"        
-            column_base_skin = bpy.data.objects["Columns_shortedge_base"]
-            column_base_skin.data.materials.append(column_material);
-                    
-            bpy.ops.mesh.primitive_cube_add(location = (podium_x + x_offset, podium_y - (podium_length - column_base_size -column_base_edge), 2 * podium_height + column_base_height))               
-            bpy.ops.transform.resize(value = (column_base_size,column_base_size,column_base_height))
-            
-            bpy.context.selected_objects[0].name = "Columns_shortedge_base"        
-            column_base_skin = bpy.data.objects["Columns_shortedge_base"]
-            column_base_skin.data.materials.append(column_material);
-            
-             
-            
-            #bpy.ops.object.mode_set(mode = 'EDIT')   
-        
-            if use_library:
-                       
-                stylized_pillars(podium_x + x_offset, podium_y + y_offset
-                    , base_z_location + column_base_height,height=(column_pillar_height*2),b_width=column_base_size,cap_height=cap_height,cap_style=cap_style,flute_num=flute_num,col_faces=col_faces,addendum_factor=addendum_factor,column_colour=temple_colour)
-                    
-                stylized_pillars(podium_x + x_offset, podium_y - (podium_length - column_base_size -column_base_edge), base_z_location + column_base_height,height=(column_pillar_height*2),b_width=column_base_size,cap_height=cap_height,cap_style=cap_style,flute_num=flute_num,col_faces=col_faces,addendum_factor=addendum_factor,column_colour=temple_colour)
-                
-  
-            else:    
-                column = bpy.ops.mesh.primitive_cylinder_add
-                column(location = (podium_x + (podium_width - column_base_size - column_base_edge) - s * (2 * (podium_width - column_base_size - column_base_edge)/(columns_per_shortedge -1)), podium_y + podium_length/2.0,  column_z_location))       
-                bpy.ops.transform.resize(value = (column_pillar_radius,column_pillar_radius,column_pillar_height))
-                
-                bpy.context.selected_objects[0].name = "Columns_shortedge_pillar"        
-                column_skin = bpy.data.objects["Columns_shortedge_pillar"]
-                column_skin.data.materials.append(column_material);
-                     
-                   
-                column = bpy.ops.mesh.primitive_cylinder_add
-                column(location = (podium_x + (podium_width - column_base_size - column_base_edge) - s * (2 * (podium_width - column_base_size - column_base_edge)/(columns_per_shortedge -1)), podium_y - (podium_length - column_base_size -column_base_edge),  column_z_location ))
-                
-                bpy.ops.transform.resize(value = (column_pillar_radius,column_pillar_radius,column_pillar_height))
-                
-                bpy.context.selected_objects[0].name = "Columns_shortedge_pillar"        
-                column_skin = bpy.data.objects["Columns_shortedge_pillar"]
-                column_skin.data.materials.append(column_material);
-                
-                     
-    bpy.ops.object.mode_set(mode = 'OBJECT') 
-    
-    
 
-    if has_dome:
-        make_dome(dome_locX,dome_locY,dome_locZ,height=dome_body_height,radius=dome_body_radius,body_mat=dome_material,roof_mat=dome_roof_material)
-        
-    make_stairs(stair_locX,stair_locY,stair_locZ,stair_height,stair_width,stair_length,length_offset=column_base_size,mat=stair_material)
-    
     
-    #attach everything in the scene, apart from the sun and the camera, to an axis
-    for obj in bpy.data.objects:
-        if obj.name != "Sun" and obj.name != "Camera" and obj.name != "Sun.001" and obj.name != "temple":
-            obj.parent = axes
-            
-            
-            
-            
-    return axes
 
-    
 
     
 
 
-    
+# Columns made by the add-on, shared between temples. print(column_cache) shows hits/misses.
+column_cache = Meshes.MeshCache(size=32)
 
 
 #Using an addon to generate beautiful, stylized columns, lots of parameters to randomize here.
@@ -721,164 +366,31 @@ def stylized_pillars(locX,locY,locZ,height,b_width,cap_height,cap_style,flute_nu
     total_height = height
     row_height=height
     
- 
-    bpy.ops.mesh.add_column(Style="0",col_base=True,addendum=addendum_factor,col_plinth=False,base_type=7,col_taper=0.01,col_flutes=flute_num,base_width=b_width,col_radius=b_width,cap_width=b_width*1.2,row_height=height*0.2,col_blocks=5,col_cap=True,cap_type=cap_style,cap_height=cap_height,cap_faces=6,col_faces=col_faces)
-    
-    bpy.context.object.location = (locX,locY,locZ)
-    bpy.context.object.dimensions[2] = height
-    
-    bpy.context.object.active_material.diffuse_color = column_colour
-
-    
-
-    
-
-        
-
-
-# The 'dome' part of the building, as seen in Pantheon.
-def make_dome(locX,locY,locZ,height,radius,body_mat,roof_mat):
-    
-    dome_radius = radius * 0.95
-    dome_height = height * 0.9
-    dome_locZ = locZ + 0.8 * dome_height
-    
-    
-    dome_body = bpy.ops.mesh.primitive_cylinder_add
-    dome_body(location = (locX,locY,locZ))
-    bpy.ops.transform.resize(value=(radius,radius,height))
-    
-    bpy.context.selected_objects[0].name = "Dome"        
-    dome_skin = bpy.data.objects["Dome"]
-    dome_skin.data.materials.append(body_mat)
-    
-
-    dome = bpy.ops.mesh.primitive_uv_sphere_add
-    dome(location = (locX,locY,dome_locZ))
-    bpy.ops.transform.resize(value=(dome_radius,dome_radius,dome_height))
-    
-    bpy.context.selected_objects[0].name = "Dome_Roof"        
-    dome_roof_skin = bpy.data.objects["Dome_Roof"]
-    dome_roof_skin.data.materials.append(roof_mat)
-    
-   
-    
-    
-    
-def make_stairs(locX,locY,locZ,height,width,length,length_offset,mat):
-        
-    cutaway = bpy.ops.mesh.primitive_cube_add    
-    cutaway(location = (locX,locY,locZ))
-    bpy.ops.transform.resize(value = (width,(length * 2) - length_offset,height*2))
-    bpy.context.selected_objects[0].name = "Cutaway"
-        
-    object = bpy.data.objects['Cutaway']
-    object.select = False
-    
-    current_object = bpy.data.objects['Podium']
-    current_object.select = True
+    column_params = dict(Style="0",col_base=True,addendum=addendum_factor,col_plinth=False,base_type=7,col_taper=0.01,col_flutes=flute_num,base_width=b_width,col_radius=b_width,cap_width=b_width*1.2,row_height=height*0.2,col_blocks=5,col_cap=True,cap_type=cap_style,cap_height=cap_height,cap_faces=6,col_faces=col_faces,col_lods=True)
     
-    bpy.context.scene.objects.active = current_object
+    # Every column of a temple has the same parameters, so the add-on only has to
+    # build the first one, the rest are instances of its mesh.
+    def build():
+        bpy.ops.mesh.add_column(**column_params)
+        column = bpy.context.object
+        column.dimensions[2] = height
+        # The add-on gives every column the one 'Col_mat', so recolouring it would
+        # recolour them all; each cached mesh (and its LOD chain) gets its own copy.
+        mat = column.active_material.copy()
+        mat.diffuse_color = column_colour
+        for name in column.data.get("column_lods", column.data.name).split('|'):
+            bpy.data.meshes[name].materials[0] = mat
+        return column
     
-    bpy.ops.object.modifier_add(type='BOOLEAN')
-    
-    
-    bpy.context.object.modifiers["Boolean"].operation = 'DIFFERENCE'
-    bpy.context.object.modifiers["Boolean"].object = bpy.data.objects["Cutaway"]    
-    bpy.ops.object.modifier_apply(apply_as='DATA', modifier="Boolean")
-    current_object = bpy.data.objects['Podium']
-    current_object.select = False 
-    
-    current_object = bpy.data.objects['Cutaway']
-    current_object.select = True
-    bpy.ops.object.delete(use_global=False)
-    
-    
-    
-    steps_no = random.randint(4,9)
-    step_height = height * 2
-    stair_depth = (length)/(steps_no)
-        
-    bpy.ops.mesh.archimesh_stairs(step_num = steps_no,height = step_height/(steps_no),
-    depth=stair_depth,back=False,thickness=0,front_gap=0)
-    bpy.context.object.location = (locX,locY-stair_depth ,locZ - height * 1.1)
-    
-    bpy.context.object.rotation_euler[2] = 3.14159
-
-    bpy.ops.transform.resize(value = (width*2,length*2,1))
-    
-    bpy.context.selected_objects[0].name = "stairs"        
-    stairs_skin = bpy.data.objects["stairs"]
-    stairs_skin.data.materials.append(mat)
-    
-     
-    
-    
-def make_side_stairs(locX,locY,locZ,width,length,height,left_side,model,mat):
-    steps_no = random.randint(4,8)
-    step_height = height 
-    stair_depth = (length)/(steps_no)
-        
-    bpy.ops.mesh.archimesh_stairs(model=model,curve=True,max_width=width,step_num = steps_no,height = step_height/(steps_no),
-    depth=stair_depth,back=True,thickness=0,front_gap=0)
-    
-    bpy.context.object.location = (locX,locY ,locZ - height)
-    
-    if left_side:
-        bpy.context.object.rotation_euler[2] = 1.5708
-    else:
-        bpy.context.object.rotation_euler[2] = 4.71239
-
+    # The material goes with the cached mesh, so the colour is part of the key.
+    key = tuple(sorted(column_params.items())) + (height, tuple(column_colour))
+    return column_cache.instance("Column",key,build,(locX,locY,locZ))
 
-    bpy.context.selected_objects[0].name = "side_stairs"        
-    stairs_skin = bpy.data.objects["side_stairs"]
-    stairs_skin.data.materials.append(mat)
     
 
-  #  bpy.ops.transform.resize(value = (width*2,length*2,1))
     
 
-def make_door(locX,locY,locZ,width,length,height):
-    
-    door_length = length
-    print("making a door")
-    
-    cutaway = bpy.ops.mesh.primitive_cube_add    
-    cutaway(location = (locX,locY + length * 0.5,locZ))
-    bpy.ops.transform.resize(value = (width,length*1.4,height*1.1))
-    bpy.context.selected_objects[0].name = "DoorCutaway"
         
-    object = bpy.data.objects['DoorCutaway']
-    object.select = False
-    
-    current_object = bpy.data.objects['temple_body']
-    current_object.select = True
-    
-    bpy.context.scene.objects.active = current_object
-    
-    
-    
-    bpy.ops.object.modifier_add(type='BOOLEAN')
-    
-    
-    bpy.context.object.modifiers["Boolean"].operation = 'DIFFERENCE'
-    bpy.context.object.modifiers["Boolean"].object = bpy.data.objects["DoorCutaway"]    
-    bpy.ops.object.modifier_apply(apply_as='DATA', modifier="Boolean")
-    current_object = bpy.data.objects['temple_body']
-    current_object.select = False 
-    
-    
-    
-    
-     
-    current_object = bpy.data.objects['DoorCutaway']
-    current_object.select = True
-    bpy.ops.object.delete(use_global=False)
-    
-    
- 
-  
-    
 
 
 
@@ -0,0 +1,70 @@
+'''
+Blockwall.fill() against the one-block-at-a-time loop it replaced; short rows
+still take the loop, long ones the numpy batches.
+
+Run from anywhere: python tests/bench_fill.py
+Prints microseconds per call for rows of a few sizes, loop then batched.
+'''
+import os
+import sys
+import timeit
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+import numpy
+from add_mesh_building_basics import Blockwall
+
+
+def old_fill(objXO, objXL, avedst, mindst=0.0, dev=0.0, center=0, rnd=random):
+    '''fill() before the batched version, as it was but for the random source.'''
+    random = rnd.random
+    def rndc(): return (random() - 0.5)
+    def rndd(): return rndc()*2
+
+    curpos = objXO
+    poslist = [curpos]
+
+    if center:
+        curpos += ((objXL-objXO-mindst*2)%avedst)/2+mindst
+        if curpos-poslist[-1]<mindst: curpos = poslist[-1]+mindst+random()*dev/2
+
+        if (objXL-curpos<mindst) or (objXL-curpos< mindst):
+            poslist.append(objXL)
+            return poslist
+        else: poslist.append(curpos)
+
+    while True:
+        curpos += avedst+rndd()*dev
+        if curpos-poslist[-1]<mindst:
+            curpos = poslist[-1]+mindst+random()*dev/2
+
+        if (objXL-curpos<mindst) or (objXL-curpos< mindst):
+            poslist.append(objXL)
+            return poslist
+        else: poslist.append(curpos)
+
+
+# (left, right, average, minimum, deviation, center)
+CASES = [
+    (-3, 3, 1.2, 0.5, 0.3, 0),
+    (-10, 10, 1.5, 0.75, 0.5, 1),
+    (0, 20, 0.7, 0.25, 0.3, 0),
+    (-50, 50, 0.5, 0.25, 0.2, 0),
+    (0, 500, 1.0, 0.5, 0.3, 0),
+    ]
+
+
+def main():
+    rng = numpy.random.default_rng(0)
+    rnd = random.Random(0)
+    print('row                                  loop     new (us per call)')
+    for case in CASES:
+        number = 2000 if case[1]-case[0] < 200 else 200
+        loop = min(timeit.repeat(lambda: old_fill(*case, rnd=rnd), number=number, repeat=7))
+        batch = min(timeit.repeat(lambda: Blockwall.fill(*case, rng=rng, rnd=rnd), number=number, repeat=7))
+        print('%-34s %7.1f %7.1f' % (case, loop/number*1e6, batch/number*1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+'''
+Test setup: makes the add-on and submission modules importable outside
+Blender. When bpy is missing, only the pieces the geometry code touches at
+import time are stubbed; anything that really needs Blender is not tested.
+'''
+import os
+import sys
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ADDON = os.path.join(HERE, '..', '3rd_party', 'add_mesh_building_basics')
+sys.path.insert(0, os.path.join(HERE, '..', 'submission'))
+
+try:
+    import bpy
+except ImportError:
+    def _prop(**kw):
+        return kw.get('default')
+
+    props = types.ModuleType('bpy.props')
+    for name in ('BoolProperty', 'EnumProperty', 'FloatProperty',
+                 'FloatVectorProperty', 'IntProperty', 'StringProperty'):
+        setattr(props, name, _prop)
+    bpy = types.ModuleType('bpy')
+    bpy.props = props
+    bpy.types = types.SimpleNamespace(Operator=object, Panel=object, Menu=object)
+    sys.modules['bpy'] = bpy
+    sys.modules['bpy.props'] = props
+    sys.modules['mathutils'] = types.ModuleType('mathutils')
+
+    # The package __init__ registers operators; load the modules without it.
+    package = types.ModuleType('add_mesh_building_basics')
+    package.__path__ = [ADDON]
+    sys.modules['add_mesh_building_basics'] = package
+    mats = types.ModuleType('add_mesh_building_basics.UtilMats')
+    mats.uMatRGBSet = mats.uMatRGBSel = mats.uMatNormalSet = None
+    sys.modules['add_mesh_building_basics.UtilMats'] = mats
+else:
+    sys.path.insert(0, os.path.join(ADDON, '..'))
@@ -0,0 +1,75 @@
+'''
+Mesh checks shared by the tests. Faces are any iterable of index sequences.
+'''
+import collections
+import numpy
+
+
+def flat_faces(faces):
+    '''Flatten uMeshSet style face blocks (2D arrays) into one list of faces.'''
+    out = []
+    for face in faces:
+        if numpy.ndim(face) == 2:
+            out.extend(list(f) for f in face)
+        else:
+            out.append(list(face))
+    return out
+
+
+def is_closed(faces):
+    '''True when every edge is used once in each direction.'''
+    edges = collections.Counter()
+    for face in faces:
+        for i in range(len(face)):
+            edges[(face[i], face[(i+1) % len(face)])] += 1
+    return all(n == 1 for n in edges.values()) and all(edges[(b, a)] == 1 for a, b in edges)
+
+
+def volume(verts, faces):
+    '''Signed volume, positive for outward facing normals.'''
+    verts = numpy.asarray(verts, dtype=float)
+    total = 0.0
+    for face in faces:
+        p = verts[face]
+        for i in range(1, len(face)-1):
+            total += numpy.dot(p[0], numpy.cross(p[i], p[i+1]))
+    return total / 6
+
+
+def coincident(verts, tol=1e-7):
+    '''Number of vertex pairs closer than about tol.'''
+    keys = numpy.round(numpy.asarray(verts, dtype=float) / tol).astype(numpy.int64)
+    _, counts = numpy.unique(keys, axis=0, return_counts=True)
+    return int((counts * (counts-1) // 2).sum())
+
+
+def zero_area(verts, faces, tol=1e-9):
+    '''Number of faces with (near) zero area.'''
+    verts = numpy.asarray(verts, dtype=float)
+    count = 0
+    for face in faces:
+        p = verts[face]
+        n = sum(numpy.cross(p[i]-p[0], p[i+1]-p[0]) for i in range(1, len(face)-1))
+        count += numpy.linalg.norm(n) < tol
+    return int(count)
+
+
+def shells(faces):
+    '''Groups of vertex indices joined by faces, one per connected shell.'''
+    parent = {}
+
+    def find(i):
+        while parent.setdefault(i, i) != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for face in faces:
+        root = find(face[0])
+        for i in face[1:]:
+            parent[find(i)] = root
+
+    groups = collections.defaultdict(set)
+    for i in list(parent):
+        groups[find(i)].add(i)
+    return sorted(groups.values(), key=min)
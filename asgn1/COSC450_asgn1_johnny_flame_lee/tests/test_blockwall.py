@@ -0,0 +1,207 @@
+import random
+import types
+from math import fmod
+
+import numpy
+import pytest
+
+from add_mesh_building_basics import Blockwall
+from bench_fill import old_fill
+
+
+@pytest.mark.parametrize('center', [0, 1])
+def test_fill_without_spacing(center):
+    assert Blockwall.fill(0, 10, 0, 0, 0, center) == [0, 10]
+    assert Blockwall.fill(-2, 3, -1, 0, 0, center) == [-2, 3]
+
+
+@pytest.mark.parametrize('avedst', [0, -1])
+def test_fill_without_spacing_deviated(avedst):
+    # with a deviation the loop does get there, same as it always did.
+    for seed in range(50):
+        edges = Blockwall.fill(0, 10, avedst, 0, 0.5, rnd=random.Random(seed))
+        assert edges == old_fill(0, 10, avedst, 0, 0.5, rnd=random.Random(seed))
+
+
+def test_fill_short_rows_match_loop():
+    rnd = random.Random(8)
+    for seed in range(2000):
+        left = rnd.uniform(-10, 10)
+        avedst = rnd.uniform(0.1, 2)
+        right = left + rnd.uniform(0, avedst*Blockwall.FILL_LOOP_BLOCKS)
+        mindst = rnd.uniform(0, avedst)
+        dev = rnd.choice([0, rnd.uniform(0, avedst)])
+        center = rnd.randint(0, 1)
+        edges = Blockwall.fill(left, right, avedst, mindst, dev, center, rnd=random.Random(seed))
+        assert edges == old_fill(left, right, avedst, mindst, dev, center, rnd=random.Random(seed))
+
+
+@pytest.mark.parametrize('case', [(0, 100, 1.0, 0.5, 0.3), (0, 60, 0.5, 0.45, 0.2), (-40, 40, 1.0, 0.0, 0.9)])
+def test_fill_long_rows_match_loop_distribution(case):
+    rng = numpy.random.default_rng(3)
+    rnd = random.Random(3)
+    new = [numpy.diff(Blockwall.fill(*case, rng=rng))[:-1] for _ in range(400)]
+    old = [numpy.diff(old_fill(*case, rnd=rnd))[:-1] for _ in range(400)]
+    new = numpy.concatenate(new)
+    old = numpy.concatenate(old)
+    assert new.min() >= case[3]
+    assert new.mean() == pytest.approx(old.mean(), rel=0.02)
+    assert new.std() == pytest.approx(old.std(), rel=0.05)
+
+
+def test_fill_edges():
+    rnd = random.Random(2)
+    rng = numpy.random.default_rng(2)
+    for _ in range(2000):
+        left = rnd.uniform(-10, 10)
+        right = left + rnd.uniform(0, 200)
+        avedst = rnd.uniform(0.1, 2)
+        mindst = rnd.uniform(0, avedst)
+        dev = rnd.choice([0, rnd.uniform(0, avedst)])
+        edges = Blockwall.fill(left, right, avedst, mindst, dev, rnd.randint(0, 1), rng, rnd)
+
+        assert edges[0] == left and edges[-1] == right
+        assert len(edges) >= 2
+        assert min(numpy.diff(edges)) >= min(mindst, right-left) - 1e-9
+
+
+def test_fill_matches_loop_without_deviation():
+    rnd = random.Random(5)
+    for _ in range(2000):
+        left = rnd.uniform(-10, 10)
+        right = left + rnd.uniform(0, 200)
+        size = rnd.uniform(0.1, 2)
+        center = rnd.randint(0, 1)
+        # long rows too: the batches sum in the loop's order.
+        assert Blockwall.fill(left, right, size, size, center=center) == old_fill(left, right, size, size, center=center)
+
+
+@pytest.mark.parametrize('right', [10, 200])
+def test_fill_is_reproducible(right):
+    def edges():
+        return Blockwall.fill(0, right, 1, 0.3, 0.5, rng=numpy.random.default_rng(5), rnd=random.Random(5))
+    assert edges() == edges()
+
+
+def wall_props(**kw):
+    '''add_Blockwall defaults, with overrides, shaped like an operator's properties.'''
+    props = {k: v for k, v in vars(Blockwall.add_Blockwall).items()
+             if not k.startswith('_') and not callable(v) and not isinstance(v, (str, dict, set))}
+    props.update(kw)
+    return types.SimpleNamespace(**props)
+
+
+def blocks_one_by_one(bounds, segsize, Offsets=None, vll=0):
+    '''The MakeABlock loop MakeBlocks replaced, in MakeBlocks' shape.'''
+    verts, faces = [], []
+    for block, corners in zip(bounds, Offsets):
+        corners = corners.tolist() if corners.any() else None
+        points, quads = Blockwall.MakeABlock(block.tolist(), segsize, vll+len(verts), corners)
+        verts += points
+        faces += quads
+    return numpy.array(verts, dtype=numpy.float32).reshape(-1, 3), numpy.array(faces, dtype=numpy.int32).reshape(-1, 4)
+
+
+# unstaggered rows, else no blocks line up to merge.
+@pytest.mark.parametrize('change', [{}, {'wallCurve': True}, {'wallCirc': True}, {'MergeBlock': True, 'EdgeOffset': 0.0},
+                                    {'wallCurve': True, 'wallCirc': True, 'MergeBlock': True, 'EdgeOffset': 0.0}])
+@pytest.mark.parametrize('seed', range(3))
+def test_make_blocks_matches_make_a_block(monkeypatch, change, seed):
+    props = wall_props(WidthVar=0.0, HeightVar=0.0, DepthVar=0.0, **change)
+    verts, faces = Blockwall.buildWall(props, seed)
+    monkeypatch.setattr(Blockwall, 'MakeBlocks', blocks_one_by_one)
+    old_verts, old_faces = Blockwall.buildWall(props, seed)
+
+    assert len(verts) > 1000
+    assert numpy.array_equal(faces, old_faces)
+    assert numpy.abs(verts - old_verts).max() < 1e-5
+
+
+def old_wall_plan(wall, holeList):
+    '''wallPlan as it was before bisect and merge: the reference.'''
+    rows = []
+
+    wallTop = wall.props.wallZ
+    wallWid = wall.props.wallX
+    blockHMin = wall.props.HeightMin
+    blockHMax = wall.props.blockZ
+    blockHVar = wall.props.HeightVar
+    groutG = wall.props.Grout
+
+    blockHMin += groutG
+    rowHMin = blockHMin
+
+    splits = [0]
+    for hole in holeList: splits += hole.crits()
+    splits.append(wallTop)
+    splits.sort()
+
+    divs = wall.fill(splits[0], splits[-1], blockHMax, blockHMin, blockHVar)[1:-1]
+
+    for i in range(len(divs)-1, -1, -1):
+        for j in range(len(splits)):
+            diff = abs(divs[i] - splits[j])
+            if diff < (blockHMax-blockHVar+groutG):
+                del(divs[i])
+                break
+
+    divs += splits
+    divs.sort()
+
+    if divs[0] < 0: divs[:1] = []
+    if divs[-1] > wallTop: divs[-1:] = []
+
+    divCount = len(divs)-1
+    divCheck = 0
+
+    while divCheck < divCount:
+        RowZ = (divs[divCheck]+divs[divCheck+1])/2
+        RowHeight = divs[divCheck+1]-divs[divCheck]-groutG
+        EdgeOffset = wall.settings['eoff']*(fmod(divCheck, 2)-0.5)
+
+        if RowHeight < rowHMin:
+            del(divs[divCheck+1])
+            divCount -= 1
+            continue
+
+        rows.append(Blockwall.rowOb(RowZ, RowHeight, EdgeOffset))
+        divCheck += 1
+
+    WallBoundaries = Blockwall.OpeningInv(wall, (wall.dims['s'] + wall.dims['e'])/2, wallTop/2, wallWid, wallTop)
+
+    for rownum in range(len(rows)):
+        Blockwall.rowProcessing(wall, rows[rownum], holeList, WallBoundaries)
+
+    return rows
+
+
+OPENINGS = ['wallPort', 'portRpt', 'portArchT', 'portArchB', 'SlotV', 'SlotH', 'SlotVRpt', 'SlotHRpt',
+            'CrenelTog', 'slotHArchT', 'slotHArchB', 'slotVArchT', 'slotVArchB', 'wallCirc', 'wallCurve']
+
+
+def random_wall_props(seed):
+    rnd = random.Random(seed)
+    props = wall_props(**{name: rnd.random() < 0.5 for name in OPENINGS})
+    props.wallX = rnd.uniform(5, 30)
+    props.wallZ = rnd.uniform(3, 20)
+    props.blockX = rnd.uniform(0.5, 2.5)
+    props.blockZ = rnd.uniform(0.4, 1.2)
+    props.WidthVar = rnd.uniform(0, 1)
+    props.HeightVar = rnd.uniform(0, 0.5)
+    props.HeightMin = min(props.blockZ, rnd.uniform(0.1, 0.5))
+    props.Grout = min(props.Grout, props.blockZ-props.HeightMin)
+    return props
+
+
+def row_plan(plan, props, seed):
+    wall = Blockwall.WallBuilder(props, numpy.random.default_rng(seed))
+    rows = plan(wall, Blockwall.openList(wall))
+    return [(row.z, row.h, row.EdgeOffset, row.BlocksEdge, row.BlocksNorm) for row in rows]
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_wall_plan_matches_loop(seed):
+    props = random_wall_props(seed)
+    rows = row_plan(Blockwall.wallPlan, props, seed)
+    assert rows
+    assert rows == row_plan(old_wall_plan, props, seed)
@@ -0,0 +1,144 @@
+import itertools
+import random
+
+import pytest
+
+import Geometry
+import meshcheck
+
+
+def check_solid(verts, faces):
+    faces = [list(f) for f in faces]
+    assert meshcheck.is_closed(faces)
+    volume = meshcheck.volume(verts, faces)
+    assert volume > 0
+    return volume
+
+
+@pytest.mark.parametrize('make', [Geometry.cube, Geometry.cylinder, Geometry.uv_sphere])
+def test_primitives_are_solid(make):
+    check_solid(*make())
+
+
+def test_stairs_are_solid():
+    volume = check_solid(*Geometry.stairs(4, 0.5, 1.0, 2.0))
+    assert volume == pytest.approx(2.0 * 0.5 * 1.0 * (1 + 2 + 3 + 4))
+
+
+@pytest.mark.parametrize('overhang', [0.0, 0.3])
+@pytest.mark.parametrize('pediment', [0.0, 0.05, 0.2])
+def test_gable_roof_is_watertight(overhang, pediment):
+    volume = check_solid(*Geometry.gable_roof(1.5, 2.0, 0.7, overhang, pediment))
+    prism = 2 * (1.5 + overhang) * 2 * (2.0 + overhang) * 0.7
+    if pediment:
+        assert volume < prism
+    else:
+        assert volume == pytest.approx(prism)
+
+
+def test_gable_roof_defaults_match_merged_cube():
+    assert check_solid(*Geometry.gable_roof()) == pytest.approx(4.0)
+
+
+def test_box_minus_box_is_watertight():
+    rng = random.Random(4)
+    for _ in range(200):
+        location = [rng.uniform(-1.5, 1.5) for axis in range(3)]
+        size = [rng.uniform(0.05, 1.0) for axis in range(3)]
+        verts, faces = Geometry.box_minus_box(location, size)
+
+        cut = 1.0
+        for axis in range(3):
+            lo = max(location[axis] - size[axis], -1.0)
+            hi = min(location[axis] + size[axis], 1.0)
+            cut *= max(hi - lo, 0.0)
+
+        assert check_solid(verts, faces) == pytest.approx(8.0 - cut)
+
+
+def test_box_minus_box_through_cube():
+    # a hole right through still leaves a closed (ring) solid.
+    verts, faces = Geometry.box_minus_box((0, 0, 0), (0.5, 2.0, 0.5))
+    assert check_solid(verts, faces) == pytest.approx(8.0 - 2.0)
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('size', [(10, 10, 10), (6, 12, 8), (5, 9, 6), (20, 8, 5)])
+def test_temple_is_solid(seed, size):
+    model = Geometry.temple_model(*size, rng=random.Random(seed))
+    for name, (verts, faces) in model.meshes.items():
+        check_solid(verts, faces)
+
+    verts, faces, materials = model.flatten()
+    assert len(materials) == len(faces)
+    check_solid(verts, faces)
+
+
+def overlap(a, b, gap=0.0):
+    return (a[0] - gap < b[2] and b[0] < a[2] + gap and
+            a[1] - gap < b[3] and b[1] < a[3] + gap)
+
+
+def test_spatial_hash_matches_brute_force():
+    rng = random.Random(7)
+    index = Geometry.SpatialHash(3.0)
+    stored = []
+    for _ in range(300):
+        x, y = rng.uniform(-20, 20), rng.uniform(-20, 20)
+        rect = (x, y, x + rng.uniform(0.1, 3.0), y + rng.uniform(0.1, 3.0))
+        gap = rng.choice([0.0, 0.5])
+        assert index.overlaps(rect, gap) == any(overlap(rect, other, gap) for other in stored)
+        if rng.random() < 0.5:
+            index.insert(rect)
+            stored.append(rect)
+    assert len(index) == len(stored)
+
+
+@pytest.mark.parametrize('gap', [0.0, 1.0])
+def test_plan_district_has_no_overlaps(gap):
+    rng = random.Random(3)
+    footprints = [(rng.uniform(2, 10), rng.uniform(2, 10)) for _ in range(60)] + [(80, 5)]
+    placed = Geometry.plan_district(footprints, 50, 40, gap, rng=rng)
+    assert 1 < len(placed) < len(footprints)
+
+    rects = []
+    for i, x, y in placed:
+        xSize, ySize = footprints[i]
+        assert 0 <= x and x + xSize <= 50
+        assert 0 <= y and y + ySize <= 40
+        rects.append((x, y, x + xSize, y + ySize))
+
+    assert len({i for i, x, y in placed}) == len(placed)
+    for a, b in itertools.combinations(rects, 2):
+        assert not overlap(a, b, gap)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_default_roof_is_plain_prism(seed):
+    # without pediment the roof is the merged cube the temples always had.
+    model = Geometry.temple_model(10, 10, 10, rng=random.Random(seed))
+    p = model.plan
+    assert p['pediment_depth'] == 0.0
+    if p['flat_top']:
+        return
+
+    w = p['podium']['width'] * 1.1
+    l = p['podium']['length'] * 0.75 * 1.1
+    h = p['roof_height']
+    verts, faces = model.meshes['roof']
+    assert len(verts) == 6 and len(faces) == 5
+    want = sorted([(x, y, -h) for x in (-w, w) for y in (-l, l)] + [(0, y, h) for y in (-l, l)])
+    assert sorted(verts) == pytest.approx(want)
+
+
+def test_pediment_on_request():
+    rng = random.Random(1)
+    plans = [Geometry.plan_temple(10, 10, 10, rng, pediment=True) for _ in range(20)]
+    assert all(0 <= p['pediment_depth'] <= 0.08 for p in plans)
+    assert any(p['pediment_depth'] > 0 for p in plans)
+
+    # the pediment is drawn last, the rest of the plan is the same.
+    plain = Geometry.plan_temple(10, 10, 10, random.Random(2))
+    recessed = Geometry.plan_temple(10, 10, 10, random.Random(2), pediment=True)
+    del plain['pediment_depth'], recessed['pediment_depth']
+    assert plain == recessed
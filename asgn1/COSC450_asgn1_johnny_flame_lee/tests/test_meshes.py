@@ -0,0 +1,197 @@
+import types
+
+import pytest
+
+import Meshes
+
+
+class FakeID:
+    '''A datablock: name raises ReferenceError once removed, like Blender's.'''
+    def __init__(self, name, users=0):
+        self._name = name
+        self.users = users
+        self.removed = False
+
+    @property
+    def name(self):
+        if self.removed:
+            raise ReferenceError("StructRNA of type %s has been removed" % type(self).__name__)
+        return self._name
+
+
+class FakeMaterial(FakeID):
+    def __init__(self, name, colour=None, textures=()):
+        super().__init__(name)
+        self.diffuse_color = colour
+        self.texture_slots = [None] + [types.SimpleNamespace(texture=tex) for tex in textures]
+
+
+class FakeData(list):
+    '''A bpy.data collection.'''
+    def new(self, name, data=None):
+        block = FakeID(name)
+        block.data = data
+        self.append(block)
+        return block
+
+    def remove(self, block, do_unlink=False):
+        if block.removed:
+            raise ReferenceError("StructRNA of type %s has been removed" % type(block).__name__)
+        block.removed = True
+        list.remove(self, block)
+
+
+@pytest.fixture
+def data(monkeypatch):
+    data = types.SimpleNamespace(materials=FakeData(), textures=FakeData(), meshes=FakeData(), objects=FakeData())
+    scene = types.SimpleNamespace(objects=types.SimpleNamespace(link=lambda obj: None, active=None))
+    monkeypatch.setattr(Meshes.bpy, 'data', data, raising=False)
+    monkeypatch.setattr(Meshes.bpy, 'context', types.SimpleNamespace(scene=scene, selected_objects=[]), raising=False)
+    return data
+
+
+@pytest.fixture
+def pool(data):
+    def make(name, colour, texture_type):
+        texture = FakeID(name + "_tex")
+        data.textures.append(texture)
+        mat = FakeMaterial(name, colour, [texture])
+        data.materials.append(mat)
+        return mat
+    return Meshes.MaterialPool(make, levels=16, size=3)
+
+
+def test_pool_shares_close_colours(pool):
+    mat = pool.get((0.5, 0.2, 0.1), 'CLOUDS')
+    assert mat.diffuse_color == (8/15, 3/15, 2/15) # made in the rounded colour.
+    assert pool.get((0.51, 0.19, 0.1), 'CLOUDS') is mat
+    assert pool.get((0.5, 0.2, 0.1), 'WOOD') is not mat
+    assert pool.get((0.6, 0.2, 0.1), 'CLOUDS') is not mat
+    assert (pool.hits, pool.misses, len(pool)) == (1, 3, 3)
+    assert pool.refs[pool.key((0.5, 0.2, 0.1), 'CLOUDS')] == 2
+
+
+def test_registry_delete_releases_materials(pool, data):
+    axes = data.objects.new("temple")
+    registry = Meshes.Registry(axes, pool)
+    registry.add(data.objects.new("podium"), [data.objects.new("roof"), None])
+    registry.materials = [pool.get((0.5, 0.2, 0.1), 'CLOUDS'), pool.get((0.5, 0.2, 0.1), 'CLOUDS')]
+    held = pool.get((0.5, 0.2, 0.1), 'CLOUDS') # another temple's.
+
+    registry.delete()
+    assert data.objects == [] and len(registry) == 0
+    assert pool.refs[pool.key((0.5, 0.2, 0.1), 'CLOUDS')] == 1
+
+    registry.delete() # twice is harmless.
+    pool.release(held)
+    assert pool.refs[pool.key((0.5, 0.2, 0.1), 'CLOUDS')] == 0
+    pool.release(held) # never below none.
+    assert pool.refs[pool.key((0.5, 0.2, 0.1), 'CLOUDS')] == 0
+
+
+def test_pool_purge(pool, data):
+    kept = pool.get((0.5, 0.2, 0.1), 'CLOUDS')
+    freed = pool.get((0.1, 0.2, 0.5), 'WOOD')
+    pool.release(freed)
+
+    pool.purge()
+    assert data.materials == [kept]
+    assert [tex.name for tex in data.textures] == [kept.name + "_tex"]
+    assert freed.removed and len(pool) == 1
+
+    # A material removed from the file some other way is made again.
+    data.materials.remove(kept)
+    again = pool.get((0.5, 0.2, 0.1), 'CLOUDS')
+    assert again is not kept and data.materials == [again]
+
+
+def test_pool_full_hands_out_closest(pool, data):
+    red = pool.get((1.0, 0.0, 0.0), 'CLOUDS')
+    blue = pool.get((0.0, 0.0, 1.0), 'CLOUDS')
+    wood = pool.get((0.9, 0.1, 0.0), 'WOOD')
+
+    # Full and all held: the nearest colour of the same texture type.
+    assert pool.get((0.8, 0.2, 0.0), 'CLOUDS') is red
+    assert pool.get((0.1, 0.1, 0.9), 'WOOD') is wood
+    assert len(data.materials) == 3 and pool.misses == 3
+    assert pool.refs[pool.key((1.0, 0.0, 0.0), 'CLOUDS')] == 2
+
+    # Once one is released it is purged to make room instead.
+    pool.release(blue)
+    green = pool.get((0.0, 1.0, 0.0), 'CLOUDS')
+    assert green not in (red, blue, wood)
+    assert blue.removed and len(pool) == 3
+
+
+@pytest.fixture
+def cache(data):
+    return Meshes.MeshCache(size=2)
+
+
+def column(cache, key):
+    '''A column from cache; a new mesh named key when it has to be built.'''
+    def build():
+        data = Meshes.bpy.data
+        obj = data.objects.new("Column", data.meshes.new(key))
+        obj.scale = (1, 1, 2)
+        return obj
+    return cache.instance("Column", key, build, (0, 0, 0))
+
+
+def test_cache_instances_share_mesh(cache, data):
+    first = column(cache, 'a')
+    again = column(cache, 'a')
+    assert again is not first and again.data is first.data
+    assert again.scale == (1, 1, 2)
+    assert len(data.meshes) == 1 and (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used(cache, data):
+    a = column(cache, 'a').data
+    b = column(cache, 'b').data
+    column(cache, 'a')
+    column(cache, 'c')
+
+    assert list(cache.entries) == ['a', 'c']
+    assert b.removed and not a.removed
+    assert [mesh.name for mesh in data.meshes] == ['a', 'c']
+
+
+def test_cache_keeps_used_meshes(cache, data):
+    kept = column(cache, 'a').data
+    kept.users = 1 # an object, or a LOD chain's fake user.
+    column(cache, 'b')
+    column(cache, 'c')
+
+    assert list(cache.entries) == ['b', 'c']
+    assert not kept.removed and kept in data.meshes
+
+
+def test_cache_rebuilds_removed_mesh(cache, data):
+    gone = column(cache, 'a').data
+    data.meshes.remove(gone)
+
+    rebuilt = column(cache, 'a')
+    assert rebuilt.data is not gone and rebuilt.data.name == 'a'
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    # an evicted entry removed from bpy.data is dropped quietly.
+    data.meshes.remove(rebuilt.data)
+    column(cache, 'b')
+    column(cache, 'c')
+    assert list(cache.entries) == ['b', 'c']
+
+
+def test_registry_delete_unlists_temple(data):
+    temples = {}
+    first = Meshes.Registry(data.objects.new("temple"), index=temples, name="temple")
+    other = Meshes.Registry(data.objects.new("other"), index=temples, name="other")
+    assert temples == {"temple": first, "other": other}
+
+    first.delete()
+    assert temples == {"other": other}
+
+    # The name taken again: deleting the old registry leaves the new one.
+    second = Meshes.Registry(data.objects.new("temple"), index=temples, name="temple")
+    first.delete()
+    assert temples == {"other": other, "temple": second}
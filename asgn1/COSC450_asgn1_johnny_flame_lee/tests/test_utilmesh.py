@@ -0,0 +1,193 @@
+from math import cos, pi, sin
+
+import numpy
+import pytest
+
+import meshcheck
+from add_mesh_building_basics import Column
+from add_mesh_building_basics.UtilMesh import uBridge, uCurve, uRound, uSeam
+
+
+def old_createFaces(vertIdx1, vertIdx2, vertLoop=True, flipped=False):
+    '''
+   The per-face loop uBridge replaced, kept as the reference. The flipped
+    branch appended an undefined name; here it appends workFace.
+    '''
+    if not vertIdx1 or not vertIdx2:
+        return None
+    if len(vertIdx2) < 2:
+        return None
+
+    itmFaces = []
+    fanFaces = False
+    if len(vertIdx1) != len(vertIdx2):
+        if len(vertIdx1) == 1:
+            fanFaces = True
+        else:
+            return None
+
+    total = len(vertIdx2)
+    if vertLoop:
+        if flipped:
+            workFace = [vertIdx1[0], vertIdx2[0], vertIdx2[total - 1]]
+            if not fanFaces:
+                workFace.append(vertIdx1[total - 1])
+            itmFaces.append(workFace)
+        else:
+            workFace = [vertIdx2[0], vertIdx1[0]]
+            if not fanFaces:
+                workFace.append(vertIdx1[total - 1])
+            workFace.append(vertIdx2[total - 1])
+            itmFaces.append(workFace)
+
+    for num in range(total - 1):
+        if flipped:
+            if fanFaces:
+                workFace = [vertIdx2[num], vertIdx1[0], vertIdx2[num + 1]]
+            else:
+                workFace = [vertIdx2[num], vertIdx1[num], vertIdx1[num + 1], vertIdx2[num + 1]]
+            itmFaces.append(workFace)
+        else:
+            if fanFaces:
+                workFace = [vertIdx1[0], vertIdx2[num], vertIdx2[num + 1]]
+            else:
+                workFace = [vertIdx1[num], vertIdx2[num], vertIdx2[num + 1], vertIdx1[num + 1]]
+            itmFaces.append(workFace)
+
+    return itmFaces
+
+
+ROWS = [
+    (list(range(0, 5)), list(range(5, 10))),   # equal rows
+    ([3, 1, 4, 1], [5, 9, 2, 6]),              # not in order
+    ([0, 1], [2, 3]),                          # one face
+    ([0], list(range(1, 7))),                  # fan
+    ([7], [8, 9]),                             # smallest fan
+]
+
+
+@pytest.mark.parametrize('flipped', [False, True])
+@pytest.mark.parametrize('vertLoop', [False, True])
+@pytest.mark.parametrize('rows', ROWS)
+def test_uBridge_matches_createFaces(rows, vertLoop, flipped):
+    want = old_createFaces(rows[0], rows[1], vertLoop, flipped)
+    faces = uBridge(rows[0], rows[1], vertLoop, flipped)
+    assert faces.tolist() == want
+    assert Column.createFaces(rows[0], rows[1], vertLoop, flipped) == want
+
+
+@pytest.mark.parametrize('rows', [
+    ([], [1, 2]),            # no first row
+    ([0], []),               # no second row
+    ([0], [1]),              # second row too short
+    ([0, 1, 2], [3, 4]),     # unequal, not a fan
+    ([0, 1], [2, 3, 4]),
+])
+def test_uBridge_invalid_rows(rows):
+    assert old_createFaces(*rows) is None
+    assert uBridge(*rows) is None
+    assert Column.createFaces(*rows) is None
+
+
+def test_flipped_open_rows():
+    # the case that failed before: flipped without a loop hit the bad name.
+    assert Column.createFaces([0, 1, 2], [3, 4, 5], False, True) == [[3, 0, 1, 4], [4, 1, 2, 5]]
+    assert Column.createFaces([0], [1, 2, 3], False, True) == [[1, 0, 2], [2, 0, 3]]
+
+
+def test_flipped_reverses_winding():
+    for rows in ROWS:
+        faces = uBridge(rows[0], rows[1])
+        flipped = uBridge(rows[0], rows[1], flipped=True)
+        edges = {(f[i], f[i-1]) for f in faces.tolist() for i in range(len(f))}
+        back = {(f[i-1], f[i]) for f in flipped.tolist() for i in range(len(f))}
+        assert edges == back
+
+
+def ring(n, z, radius=1.0):
+    a = numpy.arange(n) * (2*numpy.pi/n)
+    return numpy.column_stack((radius*numpy.cos(a), radius*numpy.sin(a), numpy.full(n, z)))
+
+
+@pytest.mark.parametrize('n1, n2', [(6, 6), (4, 12), (12, 4), (4, 7), (9, 5), (1, 5), (5, 1)])
+def test_uSeam_closes_tube(n1, n2):
+    # two rings seamed, each capped by an n-gon, make a closed solid.
+    verts = numpy.vstack((ring(n1, 1), ring(n2, 0, 1.5)))
+    upper = numpy.arange(n1)
+    lower = numpy.arange(n1, n1 + n2)
+    seam = uSeam(verts, upper, lower)
+    assert seam.shape == ((n1 > 1)*n1 + (n2 > 1)*n2, 3)
+
+    faces = [list(f) for f in seam]
+    if n1 > 2:
+        faces.append(list(upper))
+    if n2 > 2:
+        faces.append(list(lower[::-1]))
+    assert meshcheck.is_closed(faces)
+    assert meshcheck.volume(verts, faces) > 0
+    assert meshcheck.zero_area(verts, faces) == 0
+
+
+def test_uSeam_ring_turning_back():
+    # a fluted ring goes back round the axis in places; still one seam.
+    a = numpy.linspace(0, 2*numpy.pi, 24, endpoint=False)
+    a[1::4] += 0.4
+    fluted = numpy.column_stack((numpy.cos(a), numpy.sin(a), numpy.ones(24)))
+    verts = numpy.vstack((fluted, ring(10, 0, 1.2)))
+    upper = numpy.arange(24)
+    lower = numpy.arange(24, 34)
+    faces = [list(f) for f in uSeam(verts, upper, lower)] + [list(upper), list(lower[::-1])]
+    assert meshcheck.is_closed(faces)
+
+
+def test_uSeam_empty_rings():
+    verts = ring(4, 0)
+    assert uSeam(verts, [], [0, 1]) is None
+    assert uSeam(verts, [0], [1]) is None
+
+
+def old_curve(wallVs, wallTop):
+    '''The per-vertex Blockwall "Curve" loop uCurve replaced.'''
+    wallTop2 = wallTop*2
+    for i, vert in enumerate(wallVs):
+        wallVs[i] = [vert[0], (wallTop+vert[1])*cos(vert[2]*pi/wallTop2), (wallTop+vert[1])*sin(vert[2]*pi/wallTop2)]
+    return wallVs
+
+
+def old_round(wallVs):
+    '''The per-vertex Blockwall "Round" loop uRound replaced.'''
+    for i, vert in enumerate(wallVs):
+        wallVs[i] = [vert[2]*cos(vert[0]), vert[2]*sin(vert[0]), vert[1]]
+    return wallVs
+
+
+def wall_verts(seed, n=500):
+    rng = numpy.random.default_rng(seed)
+    return rng.uniform([-pi, -1, 0], [pi, 1, 10], (n, 3))
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('height', [0.5, 10.0, 40.0])
+def test_uCurve_matches_loop(seed, height):
+    verts = wall_verts(seed)
+    expected = old_curve(verts.tolist(), height)
+    assert uCurve(verts, height) is verts
+    assert numpy.allclose(verts, expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_uRound_matches_loop(seed):
+    verts = wall_verts(seed)
+    expected = old_round(verts.tolist())
+    assert uRound(verts) is verts
+    assert numpy.allclose(verts, expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_uCurve_uRound_float32(seed):
+    # the wall buffer is float32; a dome, as wallBuild makes one.
+    verts = wall_verts(seed).astype(numpy.float32)
+    expected = old_round(old_curve(verts.tolist(), 10.0))
+    uRound(uCurve(verts, 10.0))
+    assert verts.dtype == numpy.float32
+    assert numpy.allclose(verts, expected, rtol=0, atol=1e-4)